@@ -1,4 +1,4 @@
-import { useEffect, useMemo, useState } from 'react';
+import { useEffect, useMemo, useRef, useState } from 'react';
 import UploadForm from './components/UploadForm';
 import KanbanBoard from './components/KanbanBoard';
 import RuleDetail from './components/RuleDetail';
@@ -6,7 +6,7 @@ import DetectedRulesList from './components/DetectedRulesList';
 import SeverityBoard from './components/SeverityBoard';
 import DetectionRulesPanel from './components/DetectionRulesPanel';
 import { uploadRegulation } from './services/api';
-import { exportReport } from './services/api';
+import { exportDocumentReport, patchDocumentTasks, replaceDocumentTasks } from './services/api';
 import MetricsDashboard from './components/MetricsDashboard';
 import BeforeAfterPanel from './components/BeforeAfterPanel';
 import StakeholderPanel from './components/StakeholderPanel';
@@ -36,6 +36,16 @@ const moveRuleToColumn = (prevColumns, rule, target) => {
   return updated;
 };
 
+// Workflow column a rule belongs in once its steps have these statuses.
+const columnForSteps = (steps) => {
+  if (steps.length === 0) return 'in-progress';
+  if (steps.every((s) => s.status === 'later')) return 'completed-later';
+  if (steps.every((s) => s.status !== 'todo')) return 'implemented';
+  return 'in-progress';
+};
+
+const COMMENT_SYNC_DELAY_MS = 500;
+
 function App() {
   const [columns, setColumns] = useState({
     'analyzed': [],
@@ -62,6 +72,14 @@ function App() {
   const [uploading, setUploading] = useState(false);
   const [processingMs, setProcessingMs] = useState(0);
   const [exporting, setExporting] = useState(false);
+  // Server-side copy of the board for the last upload; every move and step edit is sent as a small PATCH.
+  const [documentId, setDocumentId] = useState(null);
+  const commentTimers = useRef({});
+
+  const syncTasks = (ops) => {
+    if (!documentId || ops.length === 0) return;
+    patchDocumentTasks(documentId, ops).catch((err) => console.error('Task sync failed', err));
+  };
 
   const runUpload = async (file, rules, preserveWorkflow = false) => {
     if (!file) return;
@@ -110,6 +128,19 @@ function App() {
         nextSteps = {};
       }
 
+      if (preserveWorkflow && result.document_id) {
+        // The new document starts with a fresh board; seed it with the carried-over workflow.
+        const columnIds = {};
+        Object.entries(nextColumns).forEach(([col, arr]) => {
+          columnIds[col] = arr.map((r) => r.control_id);
+        });
+        await replaceDocumentTasks(result.document_id, { columns: columnIds, steps: nextSteps })
+          .catch((err) => console.error('Task sync failed', err));
+      }
+
+      Object.values(commentTimers.current).forEach(clearTimeout);
+      commentTimers.current = {};
+      setDocumentId(result.document_id || null);
       setColumns(nextColumns);
       setActionStepsByRule(nextSteps);
       setSelectedRule(null);
@@ -144,7 +175,7 @@ function App() {
   };
 
   const handleExportReport = async () => {
-    if (!lastFile) return;
+    if (!documentId) return;
     setExporting(true);
     try {
       const parsePositiveInt = (value) => {
@@ -159,10 +190,6 @@ function App() {
         return rules.filter((r) => (Number(r.score) || 0) >= cutoffVal);
       };
 
-      const tasksPayload = {
-        columns,
-        steps: actionStepsByRule,
-      };
       // Visible rules depend on the active tab/filter
       let visibleRules = [];
       if (activeTab === 'detected') {
@@ -233,7 +260,8 @@ function App() {
           severityMap[rid] = r.severity;
         }
       });
-      const blob = await exportReport(lastFile, detectionRules, tasksPayload, {
+      // Tasks come from the server-side board, so only the document id and filters are sent.
+      const blob = await exportDocumentReport(documentId, {
         ruleIds: ruleIdsForExport,
         topN: topNVal,
         severityMap,
@@ -256,21 +284,22 @@ function App() {
     const trimmed = stepText.trim();
     if (!trimmed) return;
     const rule = selectedRule;
-    setActionStepsByRule((prev) => {
-      const existing = prev[ruleId] || [];
-      const nextStep = {
-        id: `${ruleId}-${existing.length + 1}`,
-        text: trimmed,
-        status: 'todo',
-        priority: priority || 'low',
-        dueDate: dueDate || null,
-        description: description?.trim() || '',
-        assignee: assignee?.trim() || '',
-        comment: comment?.trim() || '',
-        createdAt: new Date().toISOString(),
-      };
-      return { ...prev, [ruleId]: [...existing, nextStep] };
-    });
+    const nextStep = {
+      id: `${ruleId}-${(actionStepsByRule[ruleId] || []).length + 1}`,
+      text: trimmed,
+      status: 'todo',
+      priority: priority || 'low',
+      dueDate: dueDate || null,
+      description: description?.trim() || '',
+      assignee: assignee?.trim() || '',
+      comment: comment?.trim() || '',
+      createdAt: new Date().toISOString(),
+    };
+    setActionStepsByRule((prev) => ({ ...prev, [ruleId]: [...(prev[ruleId] || []), nextStep] }));
+    syncTasks([
+      { op: 'add_step', control_id: ruleId, step: nextStep },
+      { op: 'move', control_id: ruleId, column: 'in-progress' },
+    ]);
     setColumns((prev) => {
       let foundRule = rule || null;
       if (!foundRule) {
@@ -286,11 +315,7 @@ function App() {
   };
 
   const updateColumnsForRule = (ruleId, updatedSteps) => {
-    const allDone = updatedSteps.length > 0 && updatedSteps.every((s) => s.status === 'done');
-    const allLater = updatedSteps.length > 0 && updatedSteps.every((s) => s.status === 'later');
-    const allCancelled = updatedSteps.length > 0 && updatedSteps.every((s) => s.status === 'cancelled');
-    const allSet = updatedSteps.length > 0 && updatedSteps.every((s) => s.status !== 'todo');
-
+    const target = columnForSteps(updatedSteps);
     setColumns((prevCols) => {
       let foundRule = null;
       const nextCols = { ...prevCols };
@@ -303,13 +328,18 @@ function App() {
         });
       });
       if (!foundRule) return nextCols;
-      if (allLater) return moveRuleToColumn(nextCols, foundRule, 'completed-later');
-      if (allDone || allCancelled || allSet) return moveRuleToColumn(nextCols, foundRule, 'implemented');
-      return moveRuleToColumn(nextCols, foundRule, 'in-progress');
+      return moveRuleToColumn(nextCols, foundRule, target);
     });
   };
 
   const handleUpdateStepStatus = (ruleId, stepId, newStatus) => {
+    const updatedSteps = (actionStepsByRule[ruleId] || []).map((step) =>
+      step.id === stepId ? { ...step, status: newStatus } : step
+    );
+    syncTasks([
+      { op: 'update_step', control_id: ruleId, step_id: stepId, step: { status: newStatus } },
+      { op: 'move', control_id: ruleId, column: columnForSteps(updatedSteps) },
+    ]);
     setActionStepsByRule((prevSteps) => {
       const existing = prevSteps[ruleId] || [];
       const updatedForRule = existing.map((step) =>
@@ -321,6 +351,13 @@ function App() {
   };
 
   const handleUpdateStepComment = (ruleId, stepId, comment) => {
+    // Typed a character at a time, so only the settled comment is sent.
+    const key = `${ruleId}/${stepId}`;
+    clearTimeout(commentTimers.current[key]);
+    commentTimers.current[key] = setTimeout(() => {
+      delete commentTimers.current[key];
+      syncTasks([{ op: 'update_step', control_id: ruleId, step_id: stepId, step: { comment } }]);
+    }, COMMENT_SYNC_DELAY_MS);
     setActionStepsByRule((prevSteps) => {
       const existing = prevSteps[ruleId] || [];
       const updatedForRule = existing.map((step) =>
@@ -332,12 +369,15 @@ function App() {
 
   const handleReorderSteps = (ruleId, sourceIndex, destIndex) => {
     if (sourceIndex === destIndex) return;
-    setActionStepsByRule((prev) => {
-      const existing = [...(prev[ruleId] || [])];
-      const [moved] = existing.splice(sourceIndex, 1);
-      existing.splice(destIndex, 0, moved);
-      return { ...prev, [ruleId]: existing };
-    });
+    const reordered = [...(actionStepsByRule[ruleId] || [])];
+    const [moved] = reordered.splice(sourceIndex, 1);
+    reordered.splice(destIndex, 0, moved);
+    setActionStepsByRule((prev) => ({ ...prev, [ruleId]: reordered }));
+    syncTasks([{ op: 'set_steps', control_id: ruleId, steps: reordered }]);
+  };
+
+  const handleMoveRule = (ruleId, column, index) => {
+    syncTasks([{ op: 'move', control_id: ruleId, column, index }]);
   };
 
   const selectedRuleSteps = useMemo(
@@ -554,8 +594,8 @@ function App() {
           <button
             className="btn"
             onClick={handleExportReport}
-            disabled={!lastFile || exporting}
-            style={{ opacity: (!lastFile || exporting) ? 0.6 : 1 }}
+            disabled={!documentId || exporting}
+            style={{ opacity: (!documentId || exporting) ? 0.6 : 1 }}
           >
             {exporting ? 'Generating PDF...' : 'Export PDF Report'}
           </button>
@@ -712,6 +752,7 @@ function App() {
                 }))
               }
               onSelectRule={handleSelectRule}
+              onMoveRule={handleMoveRule}
               selectedRuleId={selectedRule?.control_id}
               actionStepsByRule={actionStepsByRule}
               visibleColumns={['in-progress', 'implemented', 'completed-later']}
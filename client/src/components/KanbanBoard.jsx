@@ -20,6 +20,7 @@ export default function KanbanBoard({
   columns,
   setColumns,
   onSelectRule,
+  onMoveRule,
   selectedRuleId,
   actionStepsByRule = {},
   visibleColumns,
@@ -32,6 +33,7 @@ export default function KanbanBoard({
   const onDragEnd = (result) => {
     if (!result.destination) return;
     const { source, destination } = result;
+    onMoveRule?.(result.draggableId, destination.droppableId, destination.index);
 
     if (source.droppableId === destination.droppableId) {
       const column = [...columns[source.droppableId]];
@@ -4,11 +4,23 @@ const api = axios.create({
     baseURL: '/api/v1', // Proxy handled by Vite
 });
 
-export const uploadRegulation = async (file, detectionRules = []) => {
-    const formData = new FormData();
-    formData.append('file', file);
+const appendRules = (formData, detectionRules, options = {}) => {
+    // A stored rule pack (options.rulePack, optionally pinned with options.rulePackVersion) replaces inline rules.
+    if (options.rulePack) {
+        formData.append('rule_pack', options.rulePack);
+        if (options.rulePackVersion !== undefined && options.rulePackVersion !== null) {
+            formData.append('rule_pack_version', String(options.rulePackVersion));
+        }
+        return;
+    }
     // Pass detection rules as JSON string so backend can customize parsing
     formData.append('detection_rules', JSON.stringify(detectionRules || []));
+};
+
+export const uploadRegulation = async (file, detectionRules = [], options = {}) => {
+    const formData = new FormData();
+    formData.append('file', file);
+    appendRules(formData, detectionRules, options);
     const response = await api.post('/upload', formData);
     return response.data;
 };
@@ -16,7 +28,7 @@ export const uploadRegulation = async (file, detectionRules = []) => {
 export const exportReport = async (file, detectionRules = [], tasks = null, options = {}) => {
     const formData = new FormData();
     formData.append('file', file);
-    formData.append('detection_rules', JSON.stringify(detectionRules || []));
+    appendRules(formData, detectionRules, options);
     if (tasks) {
         formData.append('tasks', JSON.stringify(tasks));
     }
@@ -32,6 +44,174 @@ export const exportReport = async (file, detectionRules = [], tasks = null, opti
     if (options.severityMap) {
         formData.append('severity_map', JSON.stringify(options.severityMap));
     }
+    if (options.section !== undefined && options.section !== null) {
+        // Section-scoped export: a node id from fetchDocumentSections, optionally through sectionTo.
+        formData.append('section', String(options.section));
+        if (options.sectionTo !== undefined && options.sectionTo !== null) {
+            formData.append('section_to', String(options.sectionTo));
+        }
+    }
+    const response = await api.post('/report', formData, { responseType: 'blob' });
+    return response.data;
+};
+
+export const exportDocumentItems = async (documentId, format = 'csv', options = {}) => {
+    // Every obligation as CSV, NDJSON or Parquet; same filters as exportDocumentReport.
+    const params = { format };
+    if (options.ruleIds) {
+        params.rule_ids = JSON.stringify(options.ruleIds);
+    }
+    if (options.topN !== undefined && options.topN !== null && options.topN !== '') {
+        params.top_n = options.topN;
+    }
+    if (options.scoreCutoff !== undefined && options.scoreCutoff !== null && options.scoreCutoff !== '') {
+        params.score_cutoff = options.scoreCutoff;
+    }
+    if (options.severityMap) {
+        params.severity_map = JSON.stringify(options.severityMap);
+    }
+    if (options.section !== undefined && options.section !== null) {
+        params.section = options.section;
+        if (options.sectionTo !== undefined && options.sectionTo !== null) {
+            params.section_to = options.sectionTo;
+        }
+    }
+    const response = await api.get(`/documents/${documentId}/export`, { params, responseType: 'blob' });
+    return response.data;
+};
+
+export const replaceDocumentTasks = async (documentId, tasks) => {
+    // Whole board at once ({ columns: { column: [control_id, ...] }, steps }), e.g. carried over after a re-parse.
+    const response = await api.put(`/documents/${documentId}/tasks`, tasks);
+    return response.data;
+};
+
+export const patchDocumentTasks = async (documentId, ops, version = null) => {
+    // Small board edits: [{ op: 'move', control_id, column, index }, { op: 'add_step', control_id, step }, ...]
+    const response = await api.patch(`/documents/${documentId}/tasks`, { ops, version });
+    return response.data;
+};
+
+export const exportDocumentReport = async (documentId, options = {}) => {
+    // Report for a stored document; tasks come from the server-side board.
+    const formData = new FormData();
+    formData.append('document_id', documentId);
+    if (options.ruleIds) {
+        formData.append('rule_ids', JSON.stringify(options.ruleIds));
+    }
+    if (options.topN !== undefined && options.topN !== null && options.topN !== '') {
+        formData.append('top_n', String(options.topN));
+    }
+    if (options.scoreCutoff !== undefined && options.scoreCutoff !== null && options.scoreCutoff !== '') {
+        formData.append('score_cutoff', String(options.scoreCutoff));
+    }
+    if (options.severityMap) {
+        formData.append('severity_map', JSON.stringify(options.severityMap));
+    }
+    if (options.section !== undefined && options.section !== null) {
+        // Section-scoped export: a node id from fetchDocumentSections, optionally through sectionTo.
+        formData.append('section', String(options.section));
+        if (options.sectionTo !== undefined && options.sectionTo !== null) {
+            formData.append('section_to', String(options.sectionTo));
+        }
+    }
     const response = await api.post('/report', formData, { responseType: 'blob' });
     return response.data;
 };
+
+export const fetchItemSource = async (documentId, controlId, context = 200) => {
+    // Offsets, page and surrounding text of one obligation, for highlighting it in the source.
+    const response = await api.get(`/documents/${documentId}/items/${controlId}/source`, { params: { context } });
+    return response.data;
+};
+
+export const fetchDocumentSummary = async (documentId, topK = 3) => {
+    // Report KPIs (counts, time saved, top obligations, rule hits) for MetricsDashboard, no PDF needed.
+    const response = await api.get(`/documents/${documentId}/summary`, { params: { top_k: topK } });
+    return response.data;
+};
+
+export const fetchDocumentSections = async (documentId) => {
+    // PART / Division / section tree with obligation counts; pass a node id as `section` to the export helpers.
+    const response = await api.get(`/documents/${documentId}/sections`);
+    return response.data;
+};
+
+export const fetchRulePacks = async () => {
+    // Latest version of every built-in and saved rule pack.
+    const response = await api.get('/rule-packs');
+    return response.data;
+};
+
+export const saveRulePack = async (packId, pack) => {
+    // pack: { name, description, heuristics, rules }; saving changed content adds a new version.
+    const response = await api.put(`/rule-packs/${packId}`, pack);
+    return response.data;
+};
+
+export const fetchControlCatalogues = async () => {
+    const response = await api.get('/control-catalogues');
+    return response.data;
+};
+
+export const saveControlCatalogue = async (catalogueId, catalogue) => {
+    // catalogue: { name, description, controls: [{ id, title, description, framework }] }
+    const response = await api.put(`/control-catalogues/${catalogueId}`, catalogue);
+    return response.data;
+};
+
+export const fetchControlMappings = async (documentId, catalogueId, params = {}) => {
+    // Top matching catalogue controls per obligation; params: { top_k, min_score }.
+    const response = await api.get(`/documents/${documentId}/control-mappings`, {
+        params: { catalogue: catalogueId, ...params },
+    });
+    return response.data;
+};
+
+export const startUploadJob = async (file, detectionRules = [], options = {}) => {
+    // Background upload; follow it with followJob and fetch the ParsingResult with fetchJobResult.
+    const formData = new FormData();
+    formData.append('file', file);
+    appendRules(formData, detectionRules, options);
+    const response = await api.post('/jobs/upload', formData);
+    return response.data;
+};
+
+export const startDocumentReportJob = async (documentId, options = {}) => {
+    const formData = new FormData();
+    formData.append('document_id', documentId);
+    if (options.ruleIds) {
+        formData.append('rule_ids', JSON.stringify(options.ruleIds));
+    }
+    if (options.topN !== undefined && options.topN !== null && options.topN !== '') {
+        formData.append('top_n', String(options.topN));
+    }
+    const response = await api.post('/jobs/report', formData);
+    return response.data;
+};
+
+export const followJob = (jobId, onEvent) => {
+    // Server-Sent Events with the job status on every progress step; closing the stream (or
+    // navigating away) lets the server cancel the job. Returns a function that stops following.
+    const source = new EventSource(`${api.defaults.baseURL}/jobs/${jobId}/events`);
+    ['running', 'progress', 'done', 'failed', 'cancelled'].forEach((type) => {
+        source.addEventListener(type, (event) => {
+            const status = JSON.parse(event.data);
+            onEvent(type, status);
+            if (type === 'done' || type === 'failed' || type === 'cancelled') {
+                source.close();
+            }
+        });
+    });
+    return () => source.close();
+};
+
+export const cancelJob = async (jobId) => {
+    const response = await api.delete(`/jobs/${jobId}`);
+    return response.data;
+};
+
+export const fetchJobResult = async (jobId, kind = 'upload') => {
+    const response = await api.get(`/jobs/${jobId}/result`, kind === 'report' ? { responseType: 'blob' } : {});
+    return response.data;
+};
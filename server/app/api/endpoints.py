@@ -1,107 +1,160 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Form
-from pypdf import PdfReader
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Form, Query, Request
+from typing import List, Optional
+import asyncio
 import io
-from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
 from app.services.parser import parser
+from app.services.extraction import ExtractedText, decode_text, extract_pdf
+from app.services.pdf_backends import backend_selector
+from app.services.export import FORMATS as EXPORT_FORMATS, check_format as check_export_format, stream_export
+from app.services.parallel import parse_document
+from app.services.serialization import COMPACT_MEDIA_TYPE, compact_payload, compress, dumps, wants_compact
 from app.services.report import build_pdf_report
-from app.schemas import ParsingResult
+from app.services.memory import memory_tracker
+from app.services.report_model import BUCKETS, DEFAULT_TOP_K, ReportModel
+from app.services.diff import DEFAULT_MODIFIED_THRESHOLD, carry_over, diff_items, summarize_changes
+from app.services.dedup import dedupe_documents, dedupe_items
+from app.services.whatif import evaluate_rule_sets
+from app.services.documents import document_store
+from app.services.rule_packs import rule_pack_store
+from app.services.control_mapping import DEFAULT_MIN_SCORE, DEFAULT_TOP_K as DEFAULT_MAPPING_TOP_K, MAX_TOP_K as MAX_MAPPING_TOP_K, catalogue_store
+from app.services.jobs import ABANDON_AFTER, Job, JobCancelled, checkpoint, job_store
+from app.services.tasks import TaskBoardNotFoundError, TaskConflictError, task_store
+from app.services.applicability import TokenMatrix, applicability_service, label_for
+from app.services.profiles import ProfileIndex, evaluate as evaluate_profile, normalize_profile, profile_store
+from app.services.query import ReportFilter, query_items
+from app.schemas import (
+    ParsingResult, DiffResult, DedupeResult, WhatIfResult, ItemPage,
+    TaskBoardPayload, TaskBoardState, TaskPatch, TaskBoardVersion,
+    ApplicabilityFeedback, ApplicabilityModelStats, ApplicabilityPrediction, ApplicabilityPredictions,
+    CompanyProfile, ApplicabilityDecision, ProfileApplicability, SourceSpan,
+    DocumentSummary, RuleHitCount, StakeholderScore, SummaryKpis, SectionEntry, SectionTree,
+    JobStatus, RulePackSummary, RulePackDetail, RulePackPayload,
+    ControlCatalogueSummary, ControlCatalogueDetail, ControlCataloguePayload, ControlMappingResult, ObligationControls,
+)
 import json
 from fastapi import status
 
 router = APIRouter()
 
-@router.post("/upload", response_model=ParsingResult)
-async def upload_regulation(
-    file: UploadFile = File(...),
-    detection_rules: str = Form(default=None),
-):
-    content = ""
-    parsed_detection_rules = None
-    effective_detection_rules = None
+MAX_WHATIF_RULE_SETS = 25
+MAX_PAGE_SIZE = 500
+MAX_SOURCE_CONTEXT = 2000
+MAX_SUMMARY_TOP_K = 50
+MAX_ALLOCATION_SITES = 200
+DISCONNECT_POLL = 0.5  # seconds between client-disconnect checks while a request's work runs
+SSE_KEEPALIVE = 15  # seconds of silence before an event stream sends a comment line
+CLIENT_CLOSED_REQUEST = 499  # nginx's status for requests the client abandoned
+
+
+def _parse_detection_rules(detection_rules: str):
+    """
+    Returns (parsed_rules, effective_rules). effective_rules is None when the payload matches the
+    defaults so the parser keeps its heuristic fallbacks.
+    """
+    if not detection_rules:
+        return None, None
+    try:
+        parsed_detection_rules = json.loads(detection_rules)
+        if not isinstance(parsed_detection_rules, list):
+            raise ValueError("detection_rules must be a list")
+        effective_detection_rules = None if parser.is_default_rules(parsed_detection_rules) else parsed_detection_rules
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid detection_rules: {str(e)}")
+    return parsed_detection_rules, effective_detection_rules
+
 
+def _resolve_rules(detection_rules: str, rule_pack: Optional[str], rule_pack_version: Optional[int]):
+    """
+    Returns (parsed_rules, effective_rules, rules_only) from an inline detection_rules payload or a
+    stored rule pack. rules_only is None for inline rules (the parser decides from effective_rules)
+    and the pack's own setting for packs.
+    """
+    if not rule_pack:
+        if rule_pack_version is not None:
+            raise HTTPException(status_code=400, detail="Invalid rule_pack: rule_pack_version needs rule_pack")
+        parsed_detection_rules, effective_detection_rules = _parse_detection_rules(detection_rules)
+        return parsed_detection_rules, effective_detection_rules, None
     if detection_rules:
+        raise HTTPException(status_code=400, detail="Invalid rule_pack: send either detection_rules or rule_pack, not both")
+    pack = rule_pack_store.get(rule_pack, rule_pack_version)
+    if pack is None:
+        version = f" version {rule_pack_version}" if rule_pack_version is not None else ""
+        raise HTTPException(status_code=400, detail=f"Invalid rule_pack: no rule pack '{rule_pack}'{version}")
+    return pack.rules, pack.rules, pack.rules_only
+
+
+def _items_response(request: Request, result) -> Response:
+    """
+    Serialises an item-bearing result straight to JSON bytes, in the compact form when the client
+    asks for it, brotli-compressed when accepted (gzip is applied by the app middleware).
+    """
+    with memory_tracker.stage("serialise"):
+        if wants_compact(request.headers.get("accept")):
+            body, media_type = dumps(compact_payload(result)), COMPACT_MEDIA_TYPE
+        else:
+            body, media_type = dumps(result), "application/json"
+        body, encoding = compress(body, request.headers.get("accept-encoding"))
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+async def _read_upload_bytes(file: UploadFile) -> bytes:
+    if not file.filename.lower().endswith((".pdf", ".txt")):
+        raise HTTPException(status_code=400, detail="Unsupported file format. Please upload .pdf or .txt")
+    with memory_tracker.stage("read"):
+        return await file.read()
+
+
+def _extract_upload(filename: str, content_bytes: bytes) -> ExtractedText:
+    if filename.lower().endswith(".pdf"):
+        if not backend_selector.order():
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="No PDF extraction backend is installed")
         try:
-            parsed_detection_rules = json.loads(detection_rules)
-            if not isinstance(parsed_detection_rules, list):
-                raise ValueError("detection_rules must be a list")
-            effective_detection_rules = None if parser.is_default_rules(parsed_detection_rules) else parsed_detection_rules
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"Invalid detection_rules: {str(e)}")
-    
-    if file.filename.lower().endswith(".pdf"):
-        try:
-            # Read PDF content
-            pdf_bytes = await file.read()
-            pdf_file = io.BytesIO(pdf_bytes)
-            reader = PdfReader(pdf_file)
-            for page in reader.pages:
-                text = page.extract_text()
-                if text:
-                    content += text + "\n"
+            # Read PDF content; page starts are kept so items can report their page.
+            with memory_tracker.stage("extract"):
+                extracted = extract_pdf(content_bytes)
+        except JobCancelled:
+            raise
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Invalid PDF file: {str(e)}")
-            
-    elif file.filename.lower().endswith(".txt"):
-        content_bytes = await file.read()
-        try:
-            content = content_bytes.decode("utf-8")
-        except UnicodeDecodeError:
-            # Fallback to older encodings or ignore errors
-            try:
-                content = content_bytes.decode("latin-1")
-            except Exception:
-                 raise HTTPException(status_code=400, detail="Could not decode text file. Please ensure it is UTF-8 or ASCII.")
-        
     else:
-        raise HTTPException(status_code=400, detail="Unsupported file format. Please upload .pdf or .txt")
+        try:
+            with memory_tracker.stage("extract"):
+                extracted = decode_text(content_bytes)
+        except Exception:
+            raise HTTPException(status_code=400, detail="Could not decode text file. Please ensure it is UTF-8 or ASCII.")
 
-    if not content.strip():
+    if not extracted.text.strip():
         raise HTTPException(status_code=400, detail="Empty file or no text extracted.")
+    return extracted
 
-    # Parse content
-    items = parser.parse(content, detection_rules=effective_detection_rules)
 
-    return ParsingResult(
-        filename=file.filename,
-        total_items=len(items),
-        items=items
-    )
+def _parse_tasks(tasks: str):
+    if not tasks:
+        return None
+    try:
+        return json.loads(tasks)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid tasks payload: {str(e)}")
 
 
-@router.post("/report")
-async def generate_report(
-    file: UploadFile = File(...),
-    detection_rules: str = Form(default=None),
-    tasks: str = Form(default=None),
-    rule_ids: str = Form(default=None),
-    top_n: int = Form(default=None),
-    severity_map: str = Form(default=None),
-    score_cutoff: int = Form(default=None),
-    severity_top_counts: str = Form(default=None),
-):
-    content = ""
-    parsed_detection_rules = None
-    parsed_tasks = None
+def _parse_severity_map(severity_map: str) -> dict:
+    if not severity_map:
+        return {}
+    try:
+        return json.loads(severity_map) or {}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid severity_map payload: {str(e)}")
+
+
+def _report_filter(rule_ids: str, severity_map: str, score_cutoff, severity_top_counts: str, top_n) -> ReportFilter:
     parsed_rule_ids = None
-    parsed_severity_map = {}
     parsed_score_cutoff = None
     parsed_severity_top_counts = None
-    effective_detection_rules = None
-
-    if detection_rules:
-        try:
-            parsed_detection_rules = json.loads(detection_rules)
-            if not isinstance(parsed_detection_rules, list):
-                raise ValueError("detection_rules must be a list")
-            effective_detection_rules = None if parser.is_default_rules(parsed_detection_rules) else parsed_detection_rules
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"Invalid detection_rules: {str(e)}")
-    
-    if tasks:
-        try:
-            parsed_tasks = json.loads(tasks)
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"Invalid tasks payload: {str(e)}")
 
     if rule_ids:
         try:
@@ -111,12 +164,8 @@ async def generate_report(
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Invalid rule_ids payload: {str(e)}")
 
-    if severity_map:
-        try:
-            parsed_severity_map = json.loads(severity_map) or {}
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"Invalid severity_map payload: {str(e)}")
-    
+    parsed_severity_map = _parse_severity_map(severity_map)
+
     if score_cutoff is not None:
         try:
             parsed_score_cutoff = int(score_cutoff)
@@ -139,87 +188,142 @@ async def generate_report(
             parsed_severity_top_counts = normalized
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Invalid severity_top_counts payload: {str(e)}")
-    
-    if file.filename.lower().endswith(".pdf"):
-        try:
-            pdf_bytes = await file.read()
-            pdf_file = io.BytesIO(pdf_bytes)
-            reader = PdfReader(pdf_file)
-            for page in reader.pages:
-                text = page.extract_text()
-                if text:
-                    content += text + "\n"
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"Invalid PDF file: {str(e)}")
-            
-    elif file.filename.lower().endswith(".txt"):
-        content_bytes = await file.read()
-        try:
-            content = content_bytes.decode("utf-8")
-        except UnicodeDecodeError:
-            try:
-                content = content_bytes.decode("latin-1")
-            except Exception:
-                 raise HTTPException(status_code=400, detail="Could not decode text file. Please ensure it is UTF-8 or ASCII.")
-        
-    else:
-        raise HTTPException(status_code=400, detail="Unsupported file format. Please upload .pdf or .txt")
 
-    if not content.strip():
-        raise HTTPException(status_code=400, detail="Empty file or no text extracted.")
+    return ReportFilter(parsed_rule_ids, parsed_severity_map, parsed_score_cutoff, parsed_severity_top_counts, top_n)
 
-    items = parser.parse(content, detection_rules=effective_detection_rules)
-    # Filter items by provided rule ids and/or top-N
-    if parsed_rule_ids is not None:
-        items = [i for i in items if getattr(i, "control_id", None) in parsed_rule_ids]
-
-    # Override severities with client-visible values when provided
-    if parsed_severity_map:
-        for item in items:
-            cid = getattr(item, "control_id", None)
-            if cid and cid in parsed_severity_map:
-                item.severity = parsed_severity_map[cid]
-
-    if parsed_score_cutoff is not None:
-        items = [i for i in items if getattr(i, "score", 0) >= parsed_score_cutoff]
-
-    if parsed_severity_top_counts:
-        grouped = {}
-        for item in items:
-            key = (getattr(item, "severity", None) or "unknown").lower()
-            grouped.setdefault(key, []).append(item)
-        limited = []
-        ordered_keys = ["high", "critical", "medium", "low", "unknown"]
-        seen_keys = set()
-        for key in ordered_keys:
-            bucket = grouped.get(key, [])
-            seen_keys.add(key)
-            sorted_bucket = sorted(bucket, key=lambda x: getattr(x, "score", 0), reverse=True)
-            limit = parsed_severity_top_counts.get(key)
-            if limit is None:
-                limited.extend(sorted_bucket)
-            elif limit > 0:
-                limited.extend(sorted_bucket[:limit])
-            # limit == 0 skips the bucket
-        # any remaining severities not explicitly ordered
-        for key, bucket in grouped.items():
-            if key in seen_keys:
-                continue
-            sorted_bucket = sorted(bucket, key=lambda x: getattr(x, "score", 0), reverse=True)
-            limit = parsed_severity_top_counts.get(key)
-            if limit is None:
-                limited.extend(sorted_bucket)
-            elif limit > 0:
-                limited.extend(sorted_bucket[:limit])
-        items = limited
-
-    if top_n:
-        try:
-            n = int(top_n)
-            if n > 0:
-                items = sorted(items, key=lambda x: getattr(x, "score", 0), reverse=True)[:n]
-        except Exception:
-            pass
+
+def _get_document(document_id: str):
+    record = document_store.get(document_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Document not found. Upload it again.")
+    return record
+
+
+def _section_range(record, section: Optional[int], section_to: Optional[int]):
+    # Inclusive node-id range for a section (or section_to through its end), None for no filter.
+    if section is None:
+        if section_to is not None:
+            raise HTTPException(status_code=400, detail="Invalid section range: section_to needs section")
+        return None
+    if record.source is None:
+        raise HTTPException(status_code=400, detail="Invalid section range: no section index for this document")
+    try:
+        return record.source.sections.id_range(section, section_to)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid section range: {str(e)}")
+
+
+def _get_task_board(record) -> dict:
+    board = task_store.get(record.id)
+    if board is None:
+        raise HTTPException(status_code=404, detail="Task board not found for this document.")
+    return board
+
+
+def _stored_tasks(record) -> dict:
+    # Resolve the stored board's control ids to the document's items for rendering.
+    board = _get_task_board(record)
+    columns = {
+        col: [record.items_by_id[rid] for rid in ids if rid in record.items_by_id]
+        for col, ids in board["columns"].items()
+    }
+    return {"columns": columns, "steps": board["steps"]}
+
+
+def _check_threshold(threshold: float) -> None:
+    if threshold is not None and not 0 < threshold <= 1:
+        raise HTTPException(status_code=400, detail="Invalid threshold: must be between 0 and 1")
+
+
+async def _prepare_upload(
+    file: UploadFile = File(...),
+    detection_rules: str = Form(default=None),
+    rule_pack: str = Form(default=None),
+    rule_pack_version: int = Form(default=None),
+    dedupe: bool = Form(default=False),
+    dedupe_threshold: float = Form(default=None),
+):
+    """
+    Validates an upload form and reads the file. Returns (filename, work): work() extracts, parses
+    and stores the document and returns its ParsingResult, checking for cancellation as it goes.
+    """
+    parsed_detection_rules, effective_detection_rules, rules_only = _resolve_rules(detection_rules, rule_pack, rule_pack_version)
+    _check_threshold(dedupe_threshold)
+    filename = file.filename
+    content_bytes = await _read_upload_bytes(file)
+
+    def work() -> ParsingResult:
+        extracted = _extract_upload(filename, content_bytes)
+        # Parse content (sharded across processes for large documents); the normalised source is
+        # kept so items stay offset spans.
+        with memory_tracker.stage("parse"):
+            items, source = parse_document(extracted.text, effective_detection_rules, page_starts=extracted.page_starts, rules_only=rules_only)
+        collapsed = 0
+        if dedupe:
+            deduped = dedupe_items(items, threshold=dedupe_threshold)
+            collapsed = len(items) - len(deduped)
+            items = deduped
+
+        record = document_store.add(filename, items, detection_rules=parsed_detection_rules, source=source)
+        task_store.create(record.id, record.items_by_id)
+        return ParsingResult(
+            filename=filename,
+            total_items=len(items),
+            items=items,
+            collapsed_items=collapsed,
+            document_id=record.id,
+        )
+
+    return filename, work
+
+
+async def _prepare_report(
+    file: UploadFile = File(default=None),
+    document_id: str = Form(default=None),
+    detection_rules: str = Form(default=None),
+    rule_pack: str = Form(default=None),
+    rule_pack_version: int = Form(default=None),
+    tasks: str = Form(default=None),
+    rule_ids: str = Form(default=None),
+    top_n: int = Form(default=None),
+    severity_map: str = Form(default=None),
+    score_cutoff: int = Form(default=None),
+    severity_top_counts: str = Form(default=None),
+    section: int = Form(default=None),
+    section_to: int = Form(default=None),
+):
+    """
+    Validates a report form. Returns (filename, work): work() selects the items (parsing the
+    uploaded file if one was sent), renders the PDF and returns its bytes.
+    """
+    parsed_detection_rules, effective_detection_rules, rules_only = _resolve_rules(detection_rules, rule_pack, rule_pack_version)
+    parsed_tasks = _parse_tasks(tasks)
+    item_filter = _report_filter(rule_ids, severity_map, score_cutoff, severity_top_counts, top_n)
+    parsed_rule_ids = item_filter.rule_ids
+
+    stored_items = None
+    content_bytes = None
+    if document_id:
+        # Stored document: reuse its items and, unless a board is sent, its server-side tasks.
+        record = _get_document(document_id)
+        filename = record.filename
+        section_range = _section_range(record, section, section_to)
+        if section_range is not None:
+            # Section-scoped export: a slice of the stored items, no rescan.
+            stored_items = [record.items[pos] for pos in record.index.section_positions(*section_range)]
+        else:
+            stored_items = list(record.items)
+        if parsed_detection_rules is None:
+            parsed_detection_rules = record.detection_rules
+        if parsed_tasks is None:
+            parsed_tasks = _stored_tasks(record)
+    elif file is not None:
+        if section is not None or section_to is not None:
+            raise HTTPException(status_code=400, detail="Invalid section range: sections need a document_id")
+        filename = file.filename
+        content_bytes = await _read_upload_bytes(file)
+    else:
+        raise HTTPException(status_code=400, detail="Provide a file or a document_id.")
 
     # Filter tasks to only include selected rules
     if parsed_rule_ids is not None and parsed_tasks and isinstance(parsed_tasks, dict):
@@ -229,18 +333,722 @@ async def generate_report(
         filtered_steps = {rid: steps for rid, steps in (parsed_tasks.get("steps") or {}).items() if rid in parsed_rule_ids}
         parsed_tasks = {**parsed_tasks, "columns": filtered_columns, "steps": filtered_steps}
 
+    def work() -> bytes:
+        if stored_items is not None:
+            items = stored_items
+        else:
+            extracted = _extract_upload(filename, content_bytes)
+            with memory_tracker.stage("parse"):
+                items, _ = parse_document(extracted.text, effective_detection_rules, page_starts=extracted.page_starts, rules_only=rules_only)
+
+        items = item_filter.apply(items)
+
+        try:
+            return build_pdf_report(
+                filename,
+                items,
+                detection_rules=parsed_detection_rules,
+                tasks_data=parsed_tasks,
+            )
+        except RuntimeError as e:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+
+    return filename, work
+
+
+def _pdf_response(filename: str, pdf_bytes: bytes) -> StreamingResponse:
+    return StreamingResponse(
+        io.BytesIO(pdf_bytes),
+        media_type="application/pdf",
+        headers={"Content-Disposition": f'attachment; filename="{filename}-report.pdf"'}
+    )
+
+
+async def _cancel_on_disconnect(request: Request, job: Job) -> None:
+    while not job.finished:
+        if await request.is_disconnected():
+            job.cancel("client disconnected")
+            return
+        await asyncio.sleep(DISCONNECT_POLL)
+
+
+async def _run_cancellable(request: Request, work):
+    """
+    Runs work() in the threadpool as an unlisted job, cancelled as soon as the client disconnects
+    so an abandoned upload or export stops extracting, parsing or rendering.
+    """
+    job = Job("request")
+    watcher = asyncio.create_task(_cancel_on_disconnect(request, job))
     try:
-        pdf_bytes = build_pdf_report(
-            file.filename,
-            items,
-            detection_rules=parsed_detection_rules,
-            tasks_data=parsed_tasks,
+        return await run_in_threadpool(job.run, work)
+    except JobCancelled:
+        raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Request cancelled: client disconnected")
+    finally:
+        watcher.cancel()
+
+
+@router.post("/upload", response_model=ParsingResult)
+async def upload_regulation(request: Request, upload=Depends(_prepare_upload)):
+    _, work = upload
+    return _items_response(request, await _run_cancellable(request, work))
+
+
+@router.post("/report")
+async def generate_report(request: Request, report=Depends(_prepare_report)):
+    filename, work = report
+    # Extraction, parsing and rendering run in the threadpool; keep the event loop free meanwhile.
+    return _pdf_response(filename, await _run_cancellable(request, work))
+
+
+def _start_job(job: Job, work) -> JobStatus:
+    job_store.add(job)
+
+    async def run():
+        try:
+            await run_in_threadpool(job.run, work)
+        except Exception:
+            pass  # recorded on the job
+
+    job_store.start(job, run())
+    return JobStatus(**job.snapshot())
+
+
+def _get_job(job_id: str) -> Job:
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job
+
+
+@router.post("/jobs/upload", response_model=JobStatus, status_code=status.HTTP_202_ACCEPTED)
+async def start_upload_job(upload=Depends(_prepare_upload), detach: bool = Form(default=False)):
+    """
+    Starts an upload as a background job. Follow it at /jobs/{id}/events; unless detach is set it
+    is cancelled when nobody follows or polls it for a while (e.g. the user navigated away).
+    """
+    filename, work = upload
+    job = Job("upload", filename, abandon_after=None if detach else ABANDON_AFTER)
+
+    def upload_work() -> ParsingResult:
+        result = work()
+        job.document_id = result.document_id
+        return result
+
+    return _start_job(job, upload_work)
+
+
+@router.post("/jobs/report", response_model=JobStatus, status_code=status.HTTP_202_ACCEPTED)
+async def start_report_job(report=Depends(_prepare_report), detach: bool = Form(default=False)):
+    filename, work = report
+    return _start_job(Job("report", filename, abandon_after=None if detach else ABANDON_AFTER), work)
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+def get_job(job_id: str):
+    job = _get_job(job_id)
+    job.touch()
+    return JobStatus(**job.snapshot())
+
+
+@router.delete("/jobs/{job_id}", response_model=JobStatus)
+def cancel_job(job_id: str):
+    job = _get_job(job_id)
+    job.cancel()
+    return JobStatus(**job.snapshot())
+
+
+async def _job_events(job: Job, after: int):
+    listener = job.subscribe()
+    _, wakeup = listener
+    try:
+        while True:
+            for sequence, event, snapshot in job.events_since(after):
+                after = sequence
+                payload = JobStatus(**snapshot).model_dump_json()
+                yield f"id: {sequence}\nevent: {event}\ndata: {payload}\n\n"
+            if job.finished and after >= job.last_sequence:
+                return
+            try:
+                await asyncio.wait_for(wakeup.wait(), SSE_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+            wakeup.clear()
+    finally:
+        job.unsubscribe(listener)
+
+
+@router.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, request: Request):
+    """
+    Server-Sent Events: "running", "progress" (phase plus counters) and a final "done", "failed"
+    or "cancelled", each carrying the job status. Reconnecting clients resume via Last-Event-ID.
+    """
+    job = _get_job(job_id)
+    try:
+        after = int(request.headers.get("last-event-id") or 0)
+    except ValueError:
+        after = 0
+    return StreamingResponse(
+        _job_events(job, after),
+        media_type="text/event-stream",
+        # Events must reach the client as they happen: no proxy buffering, no compression.
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "Content-Encoding": "identity"},
+    )
+
+
+@router.get("/jobs/{job_id}/result")
+def get_job_result(job_id: str, request: Request):
+    job = _get_job(job_id)
+    if job.status == "failed":
+        raise HTTPException(status_code=job.error_status or 500, detail=job.error)
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}.")
+    if job.kind == "upload":
+        return _items_response(request, job.result)
+    return _pdf_response(job.filename, job.result)
+
+
+@router.get("/documents/{document_id}/items", response_model=ItemPage)
+def list_document_items(
+    request: Request,
+    document_id: str,
+    severity: Optional[List[str]] = Query(default=None),
+    category: Optional[List[str]] = Query(default=None),
+    flag: Optional[List[str]] = Query(default=None),
+    rule_id: Optional[List[str]] = Query(default=None),
+    min_score: Optional[int] = None,
+    max_score: Optional[int] = None,
+    section: Optional[int] = None,
+    section_to: Optional[int] = None,
+    sort: str = "score",
+    order: str = "desc",
+    cursor: Optional[str] = None,
+    limit: int = 50,
+):
+    record = _get_document(document_id)
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="Invalid order: must be 'asc' or 'desc'")
+    if not 0 < limit <= MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"Invalid limit: must be between 1 and {MAX_PAGE_SIZE}")
+    section_range = _section_range(record, section, section_to)
+
+    try:
+        items, next_cursor = query_items(
+            record.index,
+            severities=severity,
+            categories=category,
+            flags=flag,
+            min_score=min_score,
+            max_score=max_score,
+            rule_ids=rule_id,
+            section_range=section_range,
+            sort=sort,
+            descending=order == "desc",
+            cursor=cursor,
+            limit=limit,
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid query: {str(e)}")
+    return _items_response(request, ItemPage(document_id=record.id, items=items, next_cursor=next_cursor))
+
+
+@router.get("/documents/{document_id}/sections", response_model=SectionTree)
+def get_document_sections(document_id: str):
+    """
+    The PART / Division / section / subsection tree found while parsing, with obligation counts.
+    Pass a node id as `section` (and optionally `section_to`) to the items and report endpoints.
+    """
+    record = _get_document(document_id)
+    if record.source is None:
+        return SectionTree(document_id=record.id, sections=[])
+    index = record.source.sections
+    sections = []
+    for node in index.nodes:
+        sections.append(SectionEntry(
+            id=node.id,
+            kind=node.kind,
+            number=node.number,
+            label=node.label,
+            citation=node.citation,
+            parent_id=node.parent.id if node.parent is not None else None,
+            last_id=node.last,
+            start=node.start,
+            end=index.end_of(node),
+            page=record.source.page_of(node.start),
+            item_count=len(record.index.section_positions(node.id, node.last)),
+        ))
+    return SectionTree(document_id=record.id, sections=sections)
+
+
+def _export_response(export_format: str, filename: str, documents) -> StreamingResponse:
+    try:
+        export_format = check_export_format(export_format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid format: {str(e)}")
     except RuntimeError as e:
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
-
     return StreamingResponse(
-        io.BytesIO(pdf_bytes),
-        media_type="application/pdf",
-        headers={"Content-Disposition": f'attachment; filename="{file.filename}-report.pdf"'}
+        stream_export(export_format, documents),
+        media_type=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'},
+    )
+
+
+@router.get("/documents/export")
+def export_documents(
+    document_id: List[str] = Query(...),
+    format: str = "csv",
+    rule_ids: Optional[str] = None,
+    severity_map: Optional[str] = None,
+    score_cutoff: Optional[int] = None,
+    severity_top_counts: Optional[str] = None,
+    top_n: Optional[int] = None,
+):
+    """
+    Every obligation of several stored documents, one after another, streamed as CSV, NDJSON or
+    Parquet. Takes the report filters; they apply to each document separately.
+    """
+    records = [_get_document(doc_id) for doc_id in document_id]
+    item_filter = _report_filter(rule_ids, severity_map, score_cutoff, severity_top_counts, top_n)
+    documents = ((record, item_filter.apply(record.items)) for record in records)
+    return _export_response(format, "obligations", documents)
+
+
+@router.get("/documents/{document_id}/export")
+def export_document(
+    document_id: str,
+    format: str = "csv",
+    rule_ids: Optional[str] = None,
+    severity_map: Optional[str] = None,
+    score_cutoff: Optional[int] = None,
+    severity_top_counts: Optional[str] = None,
+    top_n: Optional[int] = None,
+    section: Optional[int] = None,
+    section_to: Optional[int] = None,
+):
+    """
+    Every obligation of a stored document with scores, flags, reasons, matching rules and task
+    status, streamed as CSV, NDJSON or Parquet (pyarrow). Filters are the report's, with the
+    same JSON-encoded values.
+    """
+    record = _get_document(document_id)
+    section_range = _section_range(record, section, section_to)
+    item_filter = _report_filter(rule_ids, severity_map, score_cutoff, severity_top_counts, top_n)
+    items = record.items
+    if section_range is not None:
+        items = [record.items[pos] for pos in record.index.section_positions(*section_range)]
+    return _export_response(format, f"{record.filename}-obligations", [(record, item_filter.apply(items))])
+
+
+@router.get("/documents/{document_id}/control-mappings", response_model=ControlMappingResult)
+def get_document_control_mappings(
+    document_id: str,
+    catalogue: str,
+    top_k: int = Query(default=DEFAULT_MAPPING_TOP_K, ge=1, le=MAX_MAPPING_TOP_K),
+    min_score: float = Query(default=DEFAULT_MIN_SCORE, ge=0.0, le=1.0),
+):
+    """
+    The top_k best-matching controls of a control catalogue for every obligation of the document,
+    by TF-IDF cosine similarity.
+    """
+    record = _get_document(document_id)
+    control_catalogue = catalogue_store.get(catalogue)
+    if control_catalogue is None:
+        raise HTTPException(status_code=404, detail="Control catalogue not found.")
+    # Raw top-MAX_TOP_K scores, one entry per catalogue holding its current version only, so
+    # saving the catalogue again never serves stale mappings and any top_k/min_score reads them.
+    mappings = record.cache.setdefault("control_mappings", {})
+    cached = mappings.get(control_catalogue.id)
+    if cached is None or cached[0] != control_catalogue.version:
+        with memory_tracker.stage("map"):
+            scored = control_catalogue.index.top_k([item.text for item in record.items], MAX_MAPPING_TOP_K)
+        cached = mappings[control_catalogue.id] = (control_catalogue.version, scored)
+    matches = control_catalogue.select(cached[1], top_k=top_k, min_score=min_score)
+    return ControlMappingResult(
+        document_id=record.id,
+        catalogue_id=control_catalogue.id,
+        catalogue_version=control_catalogue.version,
+        top_k=top_k,
+        min_score=min_score,
+        mapped_items=sum(1 for found in matches if found),
+        items=[
+            ObligationControls(control_id=item.control_id, section=item.section, matches=found)
+            for item, found in zip(record.items, matches)
+        ],
+    )
+
+
+@router.get("/documents/{document_id}/items/{control_id}/source", response_model=SourceSpan)
+def get_item_source(document_id: str, control_id: str, context: int = Query(default=200, ge=0, le=MAX_SOURCE_CONTEXT)):
+    """
+    Locates an obligation in the uploaded text for highlighting: raw offsets, page and
+    surrounding normalised text.
+    """
+    record = _get_document(document_id)
+    item = record.items_by_id.get(control_id)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Obligation not found.")
+    source = record.source
+    if source is None or item.start is None:
+        raise HTTPException(status_code=404, detail="No source offsets recorded for this obligation.")
+    raw_start, raw_end = source.raw_span(item.start, item.end)
+    return SourceSpan(
+        control_id=item.control_id,
+        start=item.start,
+        end=item.end,
+        raw_start=raw_start,
+        raw_end=raw_end,
+        page=item.page,
+        before=source.slice(max(0, item.start - context), item.start),
+        text=item.text,
+        after=source.slice(item.end, min(source.length, item.end + context)),
+    )
+
+
+@router.get("/documents/{document_id}/summary", response_model=DocumentSummary)
+def get_document_summary(document_id: str, top_k: int = Query(default=DEFAULT_TOP_K, ge=0, le=MAX_SUMMARY_TOP_K)):
+    """
+    Report KPIs, severity counts, top obligations, rule hits and stakeholder scores without
+    rendering a PDF.
+    """
+    record = _get_document(document_id)
+    # Stored items do not change after upload, so the aggregation is computed once per top_k.
+    models = record.cache.setdefault("report_models", {})
+    model = models.get(top_k)
+    if model is None:
+        model = models[top_k] = ReportModel.build(record.items, record.detection_rules, top_k=top_k)
+    return DocumentSummary(
+        document_id=record.id,
+        filename=record.filename,
+        total_items=model.total,
+        counts=dict(model.counts),
+        percentages={name: model.percent(name) for name in model.counts},
+        kpis=SummaryKpis(
+            manual_hours=round(model.manual_hours, 2),
+            automated_minutes=model.auto_minutes,
+            time_saved_hours=round(model.time_saved_hours, 2),
+            hourly_rate=model.hourly_rate,
+            value_saved=model.value_saved,
+        ),
+        top_items={name: model.top[name] for name in BUCKETS},
+        rule_hits=[RuleHitCount(keyword=kw, severity=sev, matches=hits) for kw, sev, hits in model.rule_hits],
+        stakeholders=[StakeholderScore(name=name, score=score) for name, score in model.stakeholders],
+    )
+
+
+@router.get("/metrics/extraction")
+def extraction_metrics():
+    """
+    PDF extraction backends in preference order, how the order was chosen (benchmark or
+    REGGUARD_PDF_BACKENDS) and per-backend documents, pages, time and fallbacks so far.
+    """
+    return backend_selector.report()
+
+
+@router.get("/metrics/memory")
+def memory_metrics(recent: int = Query(default=20, ge=0, le=200)):
+    """
+    Per-route and recent per-request memory accounting (see services/memory.py).
+    """
+    return memory_tracker.metrics(recent=recent)
+
+
+@router.get("/metrics/memory/top")
+def memory_top_allocations(
+    limit: int = Query(default=25, ge=1, le=MAX_ALLOCATION_SITES),
+    group_by: str = "lineno",
+):
+    """
+    Largest live allocation sites in this worker, from a tracemalloc snapshot taken now.
+    """
+    try:
+        sites = memory_tracker.top_allocations(limit=limit, group_by=group_by)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid group_by: {str(e)}")
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    return {"group_by": group_by, "sites": sites}
+
+
+@router.get("/documents/{document_id}/tasks", response_model=TaskBoardState)
+def get_document_tasks(document_id: str):
+    record = _get_document(document_id)
+    return TaskBoardState(document_id=record.id, **_get_task_board(record))
+
+
+@router.put("/documents/{document_id}/tasks", response_model=TaskBoardVersion)
+def replace_document_tasks(document_id: str, payload: TaskBoardPayload):
+    record = _get_document(document_id)
+    version = task_store.replace(record.id, record.items_by_id, payload.model_dump())
+    return TaskBoardVersion(document_id=record.id, version=version)
+
+
+@router.patch("/documents/{document_id}/tasks", response_model=TaskBoardVersion)
+def patch_document_tasks(document_id: str, patch: TaskPatch):
+    record = _get_document(document_id)
+    try:
+        version = task_store.apply(
+            record.id,
+            record.items_by_id,
+            [op.model_dump() for op in patch.ops],
+            expected_version=patch.version,
+        )
+    except TaskBoardNotFoundError:
+        raise HTTPException(status_code=404, detail="Task board not found for this document.")
+    except TaskConflictError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid task update: {str(e)}")
+    return TaskBoardVersion(document_id=record.id, version=version)
+
+
+@router.post("/companies/{company_id}/feedback", response_model=ApplicabilityModelStats)
+def record_applicability_feedback(company_id: str, feedback: ApplicabilityFeedback):
+    text = feedback.text
+    if feedback.document_id and feedback.control_id:
+        item = _get_document(feedback.document_id).items_by_id.get(feedback.control_id)
+        if item is None:
+            raise HTTPException(status_code=404, detail=f"Unknown control_id: {feedback.control_id}")
+        text = item.text
+    if not text:
+        raise HTTPException(status_code=400, detail="Provide the obligation text or a document_id and control_id.")
+
+    model = applicability_service.record_feedback(company_id, text, feedback.applicable, control_id=feedback.control_id)
+    return ApplicabilityModelStats(
+        company_id=company_id,
+        applicable_feedback=model.class_docs[0],
+        not_applicable_feedback=model.class_docs[1],
+        trained=model.trained,
+    )
+
+
+@router.get("/documents/{document_id}/predictions", response_model=ApplicabilityPredictions)
+def predict_applicability(document_id: str, company_id: str):
+    record = _get_document(document_id)
+    matrix = record.cache.get("applicability_tokens")
+    if matrix is None:
+        matrix = record.cache["applicability_tokens"] = TokenMatrix([item.text for item in record.items])
+    probabilities = applicability_service.predict(company_id, matrix)
+    return ApplicabilityPredictions(
+        document_id=record.id,
+        company_id=company_id,
+        predictions=[
+            ApplicabilityPrediction(
+                control_id=item.control_id,
+                probability=None if prob is None else round(prob, 4),
+                label=label_for(prob),
+            )
+            for item, prob in zip(record.items, probabilities)
+        ],
+    )
+
+
+@router.get("/companies/{company_id}/profile", response_model=CompanyProfile)
+def get_company_profile(company_id: str):
+    profile = profile_store.get(company_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Company profile not found.")
+    return CompanyProfile(**profile)
+
+
+@router.put("/companies/{company_id}/profile", response_model=CompanyProfile)
+def save_company_profile(company_id: str, profile: CompanyProfile):
+    profile_store.save(company_id, profile.model_dump())
+    return profile
+
+
+@router.get("/documents/{document_id}/applicability", response_model=ProfileApplicability)
+def profile_applicability(document_id: str, company_id: str):
+    record = _get_document(document_id)
+    profile = profile_store.get(company_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Company profile not found.")
+
+    index = record.cache.get("profile_index")
+    if index is None:
+        index = record.cache["profile_index"] = ProfileIndex(item.text for item in record.items)
+    evaluations = record.cache.setdefault("profile_evaluations", {})
+    # Re-evaluate incrementally against the last result computed for this company.
+    evaluation, evaluated = evaluate_profile(index, normalize_profile(profile), evaluations.get(company_id))
+    evaluations[company_id] = evaluation
+
+    counts = {}
+    decisions = []
+    for item, (decision, reasons) in zip(record.items, evaluation.decisions):
+        counts[decision] = counts.get(decision, 0) + 1
+        decisions.append(ApplicabilityDecision(control_id=item.control_id, status=decision, reasons=reasons))
+    return ProfileApplicability(
+        document_id=record.id,
+        company_id=company_id,
+        evaluated=evaluated,
+        counts=counts,
+        decisions=decisions,
     )
+
+
+def _rule_pack_detail(pack) -> RulePackDetail:
+    return RulePackDetail(
+        **pack.summary(),
+        rules=pack.rules,
+        versions=[version.version for version in rule_pack_store.versions(pack.id)],
+    )
+
+
+@router.get("/rule-packs", response_model=List[RulePackSummary])
+def list_rule_packs():
+    return [RulePackSummary(**pack.summary()) for pack in rule_pack_store.list()]
+
+
+@router.get("/rule-packs/{pack_id}", response_model=RulePackDetail)
+def get_rule_pack(pack_id: str, version: Optional[int] = Query(default=None, ge=1)):
+    pack = rule_pack_store.get(pack_id, version)
+    if pack is None:
+        raise HTTPException(status_code=404, detail="Rule pack not found.")
+    return _rule_pack_detail(pack)
+
+
+@router.put("/rule-packs/{pack_id}", response_model=RulePackDetail)
+def save_rule_pack(pack_id: str, payload: RulePackPayload):
+    # Saves a new version of a user pack; requests pinned to older versions keep working.
+    try:
+        pack = rule_pack_store.save(pack_id, payload.name, payload.rules, heuristics=payload.heuristics, description=payload.description)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid rule pack: {str(e)}")
+    return _rule_pack_detail(pack)
+
+
+def _catalogue_detail(control_catalogue) -> ControlCatalogueDetail:
+    return ControlCatalogueDetail(**control_catalogue.summary(), controls=control_catalogue.controls)
+
+
+@router.get("/control-catalogues", response_model=List[ControlCatalogueSummary])
+def list_control_catalogues():
+    return [ControlCatalogueSummary(**c.summary()) for c in catalogue_store.list()]
+
+
+@router.get("/control-catalogues/{catalogue_id}", response_model=ControlCatalogueDetail)
+def get_control_catalogue(catalogue_id: str):
+    control_catalogue = catalogue_store.get(catalogue_id)
+    if control_catalogue is None:
+        raise HTTPException(status_code=404, detail="Control catalogue not found.")
+    return _catalogue_detail(control_catalogue)
+
+
+@router.put("/control-catalogues/{catalogue_id}", response_model=ControlCatalogueDetail)
+def save_control_catalogue(catalogue_id: str, payload: ControlCataloguePayload):
+    try:
+        control_catalogue = catalogue_store.save(catalogue_id, payload.name, payload.controls, description=payload.description)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid control catalogue: {str(e)}")
+    return _catalogue_detail(control_catalogue)
+
+
+@router.post("/diff", response_model=DiffResult)
+async def diff_regulations(
+    request: Request,
+    old_file: UploadFile = File(...),
+    new_file: UploadFile = File(...),
+    detection_rules: str = Form(default=None),
+    rule_pack: str = Form(default=None),
+    rule_pack_version: int = Form(default=None),
+    severity_map: str = Form(default=None),
+    tasks: str = Form(default=None),
+    threshold: float = Form(default=None),
+):
+    _, effective_detection_rules, rules_only = _resolve_rules(detection_rules, rule_pack, rule_pack_version)
+    parsed_severity_map = _parse_severity_map(severity_map)
+    parsed_tasks = _parse_tasks(tasks)
+    _check_threshold(threshold)
+
+    old_name, new_name = old_file.filename, new_file.filename
+    old_bytes = await _read_upload_bytes(old_file)
+    new_bytes = await _read_upload_bytes(new_file)
+
+    def work() -> DiffResult:
+        old_text = _extract_upload(old_name, old_bytes).text
+        new_text = _extract_upload(new_name, new_bytes).text
+        old_items = parser.parse(old_text, detection_rules=effective_detection_rules, rules_only=rules_only)
+        new_items = parser.parse(new_text, detection_rules=effective_detection_rules, rules_only=rules_only)
+        checkpoint("diff", old_items=len(old_items), new_items=len(new_items))
+        changes = diff_items(old_items, new_items, threshold=threshold or DEFAULT_MODIFIED_THRESHOLD)
+        carried_severity_map, carried_tasks = carry_over(changes, new_items, parsed_severity_map, parsed_tasks)
+        return DiffResult(
+            old_filename=old_name,
+            new_filename=new_name,
+            summary=summarize_changes(changes),
+            changes=changes,
+            severity_map=carried_severity_map,
+            tasks=carried_tasks,
+        )
+
+    return await _run_cancellable(request, work)
+
+
+@router.post("/dedupe", response_model=DedupeResult)
+async def dedupe_regulations(
+    request: Request,
+    files: List[UploadFile] = File(...),
+    detection_rules: str = Form(default=None),
+    rule_pack: str = Form(default=None),
+    rule_pack_version: int = Form(default=None),
+    threshold: float = Form(default=None),
+):
+    _, effective_detection_rules, rules_only = _resolve_rules(detection_rules, rule_pack, rule_pack_version)
+    _check_threshold(threshold)
+
+    uploads = [(upload.filename, await _read_upload_bytes(upload)) for upload in files]
+
+    def work() -> DedupeResult:
+        documents = []
+        for filename, content_bytes in uploads:
+            content = _extract_upload(filename, content_bytes).text
+            documents.append((filename, parser.parse(content, detection_rules=effective_detection_rules, rules_only=rules_only)))
+        total_before = sum(len(doc_items) for _, doc_items in documents)
+        checkpoint("dedupe", items_found=total_before)
+        items = dedupe_documents(documents, threshold=threshold)
+        return DedupeResult(
+            filenames=[name for name, _ in documents],
+            total_items=len(items),
+            collapsed_items=total_before - len(items),
+            items=items,
+        )
+
+    return await _run_cancellable(request, work)
+
+
+@router.post("/whatif", response_model=WhatIfResult)
+async def whatif_rule_sets(
+    request: Request,
+    file: UploadFile = File(...),
+    rule_sets: str = Form(...),
+):
+    try:
+        parsed_rule_sets = json.loads(rule_sets)
+        if not isinstance(parsed_rule_sets, list) or not parsed_rule_sets:
+            raise ValueError("rule_sets must be a non-empty list")
+        if len(parsed_rule_sets) > MAX_WHATIF_RULE_SETS:
+            raise ValueError(f"at most {MAX_WHATIF_RULE_SETS} rule sets can be compared")
+        normalized = []
+        for idx, entry in enumerate(parsed_rule_sets):
+            # Accept bare rule lists or {"name": ..., "rules": [...]}.
+            if isinstance(entry, list):
+                entry = {"name": f"Rule set {idx + 1}", "rules": entry}
+            if not isinstance(entry, dict) or not isinstance(entry.get("rules", []), list):
+                raise ValueError("each rule set must be a list of rules or an object with a 'rules' list")
+            normalized.append(entry)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid rule_sets payload: {str(e)}")
+
+    filename = file.filename
+    content_bytes = await _read_upload_bytes(file)
+
+    def work() -> WhatIfResult:
+        content = _extract_upload(filename, content_bytes).text
+        sentences_evaluated, outcomes = evaluate_rule_sets(content, normalized)
+        return WhatIfResult(
+            filename=filename,
+            sentences_evaluated=sentences_evaluated,
+            outcomes=outcomes,
+        )
+
+    return await _run_cancellable(request, work)
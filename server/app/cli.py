@@ -0,0 +1,371 @@
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.services.extraction import decode_text, extract_pdf
+from app.services.parallel import EXECUTOR_KINDS, executor_kind, parse_document
+from app.services.parser import parser
+from app.services.report import build_pdf_report
+from app.services.rule_packs import rule_pack_store
+
+# Offline batch parsing of a regulation library:
+#   python -m app.cli regulations/ --jobs 8 --output results.sqlite --reports reports/
+# Files are parsed in a process pool (a thread pool on free-threaded builds, see --executor),
+# results go to NDJSON or SQLite, and a file is skipped when its content hash, the detection rules
+# and its report path are all unchanged since the last run.
+
+SUPPORTED_EXTENSIONS = (".pdf", ".txt")
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def find_documents(paths: Iterable[str]) -> List[Tuple[str, str]]:
+    """
+    Returns (path, name relative to the searched directory) for every supported file.
+    """
+    found = []
+    for path in paths:
+        if os.path.isfile(path):
+            found.append((path, os.path.basename(path)))
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                    full_path = os.path.join(root, name)
+                    found.append((full_path, os.path.relpath(full_path, path)))
+    return found
+
+
+def content_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _effective_rules(detection_rules: Optional[list], rules_only: Optional[bool]) -> Optional[list]:
+    # Plain rule files that equal the defaults keep the heuristic fallbacks, as in the API.
+    if rules_only is None and detection_rules is not None and parser.is_default_rules(detection_rules):
+        return None
+    return detection_rules
+
+
+def run_key(sha256: str, rules_fingerprint: str, report_path: Optional[str]) -> str:
+    # What a stored result depends on: the file content, the rules and whether/where a report goes.
+    return f"{sha256}:{rules_fingerprint}:{report_path or ''}"
+
+
+def process_document(path: str, detection_rules: Optional[list], report_path: Optional[str], workers: int = 1,
+                     rules_only: Optional[bool] = None, executor: Optional[str] = None) -> dict:
+    """
+    Worker entry point: extracts, parses and optionally renders one file. Returns plain data.
+    workers > 1 shards the file itself (used when there is a single file to process), in a pool
+    of the given executor kind. rules_only is set for rule packs, which state whether the
+    heuristic fallbacks apply.
+    """
+    started = time.perf_counter()
+    with open(path, "rb") as fh:
+        data = fh.read()
+    extracted = extract_pdf(data) if path.lower().endswith(".pdf") else decode_text(data)
+    items, _ = parse_document(extracted.text, _effective_rules(detection_rules, rules_only), page_starts=extracted.page_starts, workers=workers, rules_only=rules_only,
+                              executor=executor, keep_source=False)
+
+    if report_path:
+        os.makedirs(os.path.dirname(report_path) or ".", exist_ok=True)
+        with open(report_path, "wb") as fh:
+            # This process is already a batch worker, so render here rather than via the renderer pool.
+            fh.write(build_pdf_report(os.path.basename(path), items, detection_rules=detection_rules, in_process=True))
+
+    return {
+        "bytes": len(data),
+        "items": [item.model_dump(mode="json") for item in items],
+        "report": report_path,
+        "seconds": time.perf_counter() - started,
+    }
+
+
+class NdjsonSink:
+    """
+    Appends one line per document and one per obligation. The run key of each processed file is
+    kept next to the output (<output>.hashes.json) so later runs only emit changed files. Lines of
+    a file written again are removed from the earlier part of the output when the sink closes, so
+    readers see each file once.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.state_path = f"{path}.hashes.json"
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as fh:
+                self.hashes: Dict[str, str] = json.load(fh)
+        except (OSError, ValueError):
+            self.hashes = {}
+        self.replaced: set = set()  # files with lines from an earlier run
+        if path == "-":
+            self.fh = sys.stdout
+            self.base_size = 0
+        else:
+            self.fh = open(path, "a", encoding="utf-8")
+            self.base_size = self.fh.tell()  # end of the earlier runs' lines
+
+    def known_key(self, path: str) -> Optional[str]:
+        return self.hashes.get(path)
+
+    def write(self, path: str, sha256: str, key: str, result: dict) -> None:
+        if path in self.hashes:
+            self.replaced.add(path)
+        parsed_at = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        self.fh.write(json.dumps({
+            "type": "document",
+            "path": path,
+            "sha256": sha256,
+            "parsed_at": parsed_at,
+            "total_items": len(result["items"]),
+            "report": result["report"],
+        }) + "\n")
+        for item in result["items"]:
+            self.fh.write(json.dumps({"type": "item", "path": path, **item}) + "\n")
+        self.hashes[path] = key
+
+    def _drop_replaced(self) -> None:
+        # Copies the output line by line without the earlier runs' lines of re-written files.
+        tmp_path = f"{self.path}.tmp"
+        with open(self.path, "r", encoding="utf-8") as src, open(tmp_path, "w", encoding="utf-8") as dst:
+            while src.tell() < self.base_size:
+                line = src.readline()
+                if not line:
+                    break
+                try:
+                    stale = json.loads(line).get("path") in self.replaced
+                except ValueError:
+                    stale = False
+                if not stale:
+                    dst.write(line)
+            for line in src:
+                dst.write(line)
+        os.replace(tmp_path, self.path)
+
+    def close(self) -> None:
+        if self.fh is not sys.stdout:
+            self.fh.close()
+        if self.path != "-":
+            if self.replaced:
+                self._drop_replaced()
+            with open(self.state_path, "w", encoding="utf-8") as fh:
+                json.dump(self.hashes, fh, indent=2)
+
+
+class SqliteSink:
+    """
+    documents(path, sha256, run_key, ...) and items(path, control_id, ...); a changed file replaces
+    its rows.
+    """
+
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS documents (
+                path TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                parsed_at TEXT NOT NULL,
+                total_items INTEGER NOT NULL,
+                report TEXT,
+                run_key TEXT
+            );
+            CREATE TABLE IF NOT EXISTS items (
+                path TEXT NOT NULL,
+                control_id TEXT NOT NULL,
+                text TEXT NOT NULL,
+                modal_verb TEXT,
+                severity TEXT,
+                score INTEGER,
+                category TEXT,
+                action TEXT,
+                page INTEGER,
+                start_offset INTEGER,
+                end_offset INTEGER,
+                score_flags TEXT,
+                score_reasons TEXT,
+                PRIMARY KEY (path, control_id)
+            );
+        """)
+        # Databases written before run keys existed: add the column (their files re-parse once).
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(documents)")}
+        if "run_key" not in columns:
+            self.conn.execute("ALTER TABLE documents ADD COLUMN run_key TEXT")
+
+    def known_key(self, path: str) -> Optional[str]:
+        row = self.conn.execute("SELECT run_key FROM documents WHERE path = ?", (path,)).fetchone()
+        return row[0] if row else None
+
+    def write(self, path: str, sha256: str, key: str, result: dict) -> None:
+        parsed_at = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        with self.conn:
+            self.conn.execute("DELETE FROM items WHERE path = ?", (path,))
+            self.conn.execute(
+                "INSERT OR REPLACE INTO documents (path, sha256, parsed_at, total_items, report, run_key) VALUES (?, ?, ?, ?, ?, ?)",
+                (path, sha256, parsed_at, len(result["items"]), result["report"], key),
+            )
+            self.conn.executemany(
+                "INSERT INTO items VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        path, item["control_id"], item["text"], item["modal_verb"], item["severity"],
+                        item["score"], item["category"], item["action"], item["page"], item["start"],
+                        item["end"], json.dumps(item["score_flags"]), json.dumps(item["score_reasons"]),
+                    )
+                    for item in result["items"]
+                ],
+            )
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def open_sink(output: str, output_format: Optional[str]):
+    output_format = output_format or ("sqlite" if output.endswith((".sqlite", ".db")) else "ndjson")
+    if output_format == "sqlite":
+        return SqliteSink(output)
+    return NdjsonSink(output)
+
+
+def _load_rules(path: Optional[str]) -> Optional[list]:
+    if not path:
+        return None
+    with open(path, "r", encoding="utf-8") as fh:
+        rules = json.load(fh)
+    if not isinstance(rules, list):
+        raise ValueError("detection rules file must contain a JSON list")
+    return rules
+
+
+def run(
+    paths: List[str],
+    output: str,
+    output_format: Optional[str] = None,
+    jobs: int = 1,
+    reports_dir: Optional[str] = None,
+    detection_rules: Optional[list] = None,
+    force: bool = False,
+    log=sys.stderr,
+    rules_only: Optional[bool] = None,
+    executor: Optional[str] = None,
+) -> dict:
+    started = time.perf_counter()
+    kind = executor_kind(executor)
+    sink = open_sink(output, output_format)
+    stats = {"files": 0, "parsed": 0, "skipped": 0, "failed": 0, "items": 0, "bytes": 0}
+
+    fingerprint = parser.session(_effective_rules(detection_rules, rules_only), rules_only=rules_only).rules_fingerprint
+    pending: List[Tuple[str, str, Optional[str]]] = []
+    keys: Dict[str, str] = {}
+    for path, relative in find_documents(paths):
+        stats["files"] += 1
+        sha256 = content_hash(path)
+        report_path = os.path.join(reports_dir, f"{relative}-report.pdf") if reports_dir else None
+        key = keys[path] = run_key(sha256, fingerprint, report_path)
+        if not force and sink.known_key(path) == key:
+            stats["skipped"] += 1
+            continue
+        pending.append((path, sha256, report_path))
+
+    def record(path: str, sha256: str, result: Optional[dict], error: Optional[Exception]) -> None:
+        if error is not None:
+            stats["failed"] += 1
+            print(f"failed: {path}: {error}", file=log)
+            return
+        sink.write(path, sha256, keys[path], result)
+        stats["parsed"] += 1
+        stats["items"] += len(result["items"])
+        stats["bytes"] += result["bytes"]
+
+    try:
+        if jobs <= 1 or len(pending) <= 1:
+            for path, sha256, report_path in pending:
+                try:
+                    record(path, sha256, process_document(path, detection_rules, report_path, workers=jobs, rules_only=rules_only, executor=kind), None)
+                except Exception as e:
+                    record(path, sha256, None, e)
+        else:
+            pool = ThreadPoolExecutor if kind == "thread" else ProcessPoolExecutor
+            with pool(max_workers=jobs) as executor:
+                futures = {
+                    executor.submit(process_document, path, detection_rules, report_path, 1, rules_only, kind): (path, sha256)
+                    for path, sha256, report_path in pending
+                }
+                for future in as_completed(futures):
+                    path, sha256 = futures[future]
+                    try:
+                        record(path, sha256, future.result(), None)
+                    except Exception as e:
+                        record(path, sha256, None, e)
+    finally:
+        sink.close()
+
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+
+def format_summary(stats: dict) -> str:
+    seconds = max(stats["seconds"], 1e-9)
+    megabytes = stats["bytes"] / (1 << 20)
+    return (
+        f"{stats['files']} files: {stats['parsed']} parsed, {stats['skipped']} unchanged, "
+        f"{stats['failed']} failed; {stats['items']} obligations in {stats['seconds']:.2f}s "
+        f"({stats['parsed'] / seconds:.1f} files/s, {megabytes / seconds:.2f} MB/s, "
+        f"{stats['items'] / seconds:.0f} obligations/s)"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    arg_parser = argparse.ArgumentParser(prog="python -m app.cli", description="Bulk-parse a directory of regulations.")
+    arg_parser.add_argument("paths", nargs="+", help="files or directories (.pdf/.txt, searched recursively)")
+    arg_parser.add_argument("-o", "--output", default="results.ndjson", help="NDJSON file ('-' for stdout) or .sqlite/.db database")
+    arg_parser.add_argument("--format", choices=("ndjson", "sqlite"), help="output format (default: from the output extension)")
+    arg_parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="parallel workers (default: CPU count)")
+    arg_parser.add_argument("--executor", choices=("auto",) + EXECUTOR_KINDS, default="auto",
+                            help="worker threads or processes (default: threads when the GIL is disabled)")
+    arg_parser.add_argument("--reports", metavar="DIR", help="also render a PDF report per document into DIR")
+    rules_group = arg_parser.add_mutually_exclusive_group()
+    rules_group.add_argument("--rules", metavar="FILE", help="JSON file with custom detection rules")
+    rules_group.add_argument("--rule-pack", metavar="ID[@VERSION]", help="stored rule pack, e.g. gdpr or my-pack@2 (latest version by default)")
+    arg_parser.add_argument("--force", action="store_true", help="re-parse files even if their content hash is unchanged")
+    args = arg_parser.parse_args(argv)
+
+    try:
+        detection_rules = _load_rules(args.rules)
+    except (OSError, ValueError) as e:
+        arg_parser.error(f"invalid --rules: {e}")
+    rules_only = None
+    if args.rule_pack:
+        pack_id, _, version = args.rule_pack.partition("@")
+        pack = rule_pack_store.get(pack_id, int(version) if version.isdigit() else None)
+        if pack is None or (version and not version.isdigit()):
+            arg_parser.error(f"unknown --rule-pack: {args.rule_pack}")
+        detection_rules, rules_only = pack.rules, pack.rules_only
+
+    stats = run(
+        args.paths,
+        args.output,
+        output_format=args.format,
+        jobs=max(1, args.jobs),
+        reports_dir=args.reports,
+        detection_rules=detection_rules,
+        force=args.force,
+        rules_only=rules_only,
+        executor=args.executor,
+    )
+    print(format_summary(stats), file=sys.stderr)
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,442 @@
+import argparse
+import asyncio
+import glob
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import textwrap
+import time
+from typing import IO, Dict, List, Optional, Tuple
+
+import httpx
+
+from app.services.pdf_writer import build_text_pdf
+
+# End-to-end load test: starts the API under uvicorn (or targets --url), then replays a weighted
+# mix of uploads and report exports at a fixed concurrency and reports throughput, latency
+# percentiles, errors and the peak RSS of every server process:
+#   python -m app.loadtest --workers 4 --concurrency 50 --duration 60
+# Each client keeps one request in flight (closed loop), like an analyst waiting for a result.
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API_PREFIX = "/api/v1"
+DEFAULT_MIX = "upload=4,upload_rules=2,report=1,report_filtered=1"
+STARTUP_TIMEOUT = 60  # seconds
+RSS_SAMPLE_INTERVAL = 0.5  # seconds
+PERCENTILES = (50, 95, 99)
+PDF_LINES_PER_PAGE = 45
+
+# Stand-in for a framework-specific rule set when --rules is not given.
+SAMPLE_RULES = [
+    {"keyword": "personal data", "severity": "High", "match_type": "contains"},
+    {"keyword": "shall", "severity": "High", "match_type": "contains"},
+    {"keyword": "notify", "severity": "Medium", "match_type": "contains"},
+    {"keyword": r"\bwithin \d+ (days|hours)\b", "severity": "High", "match_type": "regex"},
+    {"keyword": "may", "severity": "Low", "match_type": "contains"},
+]
+
+
+class Fixture:
+    def __init__(self, name: str, data: bytes, content_type: str):
+        self.name = name
+        self.data = data
+        self.content_type = content_type
+
+
+def text_to_pdf(text: str) -> bytes:
+    lines = [line for paragraph in text.splitlines() for line in (textwrap.wrap(paragraph, 90) or [""])]
+    pages = [lines[i:i + PDF_LINES_PER_PAGE] for i in range(0, len(lines), PDF_LINES_PER_PAGE)]
+    return build_text_pdf(pages)
+
+
+def load_fixtures(paths: List[str]) -> List[Fixture]:
+    """
+    The given .pdf/.txt files; by default the sample regulations in server/ plus a PDF of each.
+    """
+    fixtures = []
+    if paths:
+        for path in paths:
+            with open(path, "rb") as fh:
+                data = fh.read()
+            content_type = "application/pdf" if path.lower().endswith(".pdf") else "text/plain"
+            fixtures.append(Fixture(os.path.basename(path), data, content_type))
+        return fixtures
+    for path in sorted(glob.glob(os.path.join(SERVER_DIR, "*.txt"))):
+        with open(path, "rb") as fh:
+            data = fh.read()
+        name = os.path.basename(path)
+        fixtures.append(Fixture(name, data, "text/plain"))
+        fixtures.append(Fixture(name[:-4] + ".pdf", text_to_pdf(data.decode("utf-8", "replace")), "application/pdf"))
+    return fixtures
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"unknown scenario {name!r} (choose from {', '.join(SCENARIOS)})")
+        mix[name] = float(weight or 1)
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("the mix needs at least one scenario with a positive weight")
+    return mix
+
+
+def _upload(fixture: Fixture, rules: list) -> Tuple[str, dict]:
+    return "/upload", {"files": {"file": (fixture.name, fixture.data, fixture.content_type)}}
+
+
+def _upload_rules(fixture: Fixture, rules: list) -> Tuple[str, dict]:
+    path, kwargs = _upload(fixture, rules)
+    kwargs["data"] = {"detection_rules": json.dumps(rules)}
+    return path, kwargs
+
+
+def _report(fixture: Fixture, rules: list) -> Tuple[str, dict]:
+    return "/report", {"files": {"file": (fixture.name, fixture.data, fixture.content_type)}}
+
+
+def _report_filtered(fixture: Fixture, rules: list) -> Tuple[str, dict]:
+    # The client's "export selection": custom rules, a score cutoff and the top obligations only.
+    path, kwargs = _report(fixture, rules)
+    kwargs["data"] = {"detection_rules": json.dumps(rules), "score_cutoff": "40", "top_n": "25"}
+    return path, kwargs
+
+
+SCENARIOS = {
+    "upload": _upload,
+    "upload_rules": _upload_rules,
+    "report": _report,
+    "report_filtered": _report_filtered,
+}
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    # Nearest-rank percentile.
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(-(-pct * len(sorted_values) // 100)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers: int, port: int) -> Tuple[subprocess.Popen, IO[bytes]]:
+    """
+    Starts uvicorn; returns the process and the temporary file its stderr goes to.
+    """
+    command = [
+        sys.executable, "-m", "uvicorn", "app.main:app",
+        "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(workers), "--log-level", "warning",
+    ]
+    # stderr goes to a file: a pipe nobody reads would block the server once it fills up. Popen
+    # only exposes pipes as process.stderr, so the file is returned for reading start-up errors.
+    log = tempfile.TemporaryFile()
+    return subprocess.Popen(command, cwd=SERVER_DIR, stdout=subprocess.DEVNULL, stderr=log), log
+
+
+def stop_server(process: subprocess.Popen) -> None:
+    if process.poll() is None:
+        process.send_signal(signal.SIGINT)
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+async def wait_until_ready(client: httpx.AsyncClient, process: Optional[subprocess.Popen], log: Optional[IO[bytes]] = None) -> None:
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            error = ""
+            if log is not None:
+                log.seek(0)
+                error = log.read().decode("utf-8", "replace")
+            raise RuntimeError(f"server exited during start-up:\n{error}")
+        try:
+            if (await client.get("/")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"server not ready after {STARTUP_TIMEOUT}s")
+
+
+class RssMonitor:
+    """
+    Samples VmHWM (peak resident set) of a process and all its descendants from /proc, so
+    renderer and parse pool children and recycled workers are included. Linux only.
+    """
+
+    def __init__(self, root_pid: int):
+        self.root_pid = root_pid
+        self.peaks: Dict[int, Tuple[str, int]] = {}  # pid -> (role, peak bytes)
+        self.available = os.path.isdir(f"/proc/{root_pid}")
+
+    def _tree(self) -> Dict[int, int]:
+        # pid -> depth below the root, for the root and its descendants.
+        children: Dict[int, List[int]] = {}
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat", "rb") as fh:
+                    stat = fh.read()
+            except OSError:
+                continue
+            # The command name may contain spaces; fields resume after its closing parenthesis.
+            ppid = int(stat[stat.rindex(b")") + 2:].split()[1])
+            children.setdefault(ppid, []).append(int(entry))
+        depths, stack = {}, [(self.root_pid, 0)]
+        while stack:
+            pid, depth = stack.pop()
+            depths[pid] = depth
+            stack.extend((child, depth + 1) for child in children.get(pid, ()))
+        return depths
+
+    @staticmethod
+    def _role(pid: int, depth: int) -> str:
+        try:
+            with open(f"/proc/{pid}/cmdline", "rb") as fh:
+                cmdline = fh.read()
+        except OSError:
+            cmdline = b""
+        if depth == 0:
+            return "server"
+        if b"resource_tracker" in cmdline or b"forkserver" in cmdline:
+            return "helper"
+        return "worker" if depth == 1 else "pool"
+
+    def sample(self) -> None:
+        if not self.available:
+            return
+        for pid, depth in self._tree().items():
+            try:
+                with open(f"/proc/{pid}/status", "r") as fh:
+                    line = next((line for line in fh if line.startswith("VmHWM:")), None)
+            except OSError:
+                continue
+            if line is None:
+                continue
+            peak = int(line.split()[1]) * 1024
+            role, previous = self.peaks.get(pid) or (self._role(pid, depth), 0)
+            self.peaks[pid] = (role, max(previous, peak))
+
+    async def run(self, stop: asyncio.Event) -> None:
+        while not stop.is_set():
+            self.sample()
+            try:
+                await asyncio.wait_for(stop.wait(), RSS_SAMPLE_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+        self.sample()
+
+
+async def run_load(
+    base_url: str,
+    fixtures: List[Fixture],
+    mix: Dict[str, float],
+    rules: list,
+    concurrency: int,
+    requests: Optional[int],
+    duration: Optional[float],
+    timeout: float,
+    seed: int,
+    process: Optional[subprocess.Popen] = None,
+    monitor: Optional[RssMonitor] = None,
+    server_log: Optional[IO[bytes]] = None,
+) -> dict:
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    samples: Dict[str, List[float]] = {name: [] for name in names}
+    errors: Dict[str, Dict[str, int]] = {name: {} for name in names}
+    issued = 0
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        await wait_until_ready(client, process, server_log)
+        stop = asyncio.Event()
+        monitor_task = asyncio.create_task(monitor.run(stop)) if monitor else None
+        started = time.perf_counter()
+        deadline = started + duration if duration else None
+
+        async def client_loop() -> None:
+            nonlocal issued
+            while True:
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return
+                if deadline is None and issued >= requests:
+                    return
+                issued += 1
+                name = rng.choices(names, weights)[0]
+                path, kwargs = SCENARIOS[name](rng.choice(fixtures), rules)
+                sent = time.perf_counter()
+                try:
+                    response = await client.post(API_PREFIX + path, **kwargs)
+                    await response.aread()
+                    error = None if response.status_code < 400 else str(response.status_code)
+                except httpx.HTTPError as e:
+                    error = type(e).__name__
+                samples[name].append(time.perf_counter() - sent)
+                if error is not None:
+                    errors[name][error] = errors[name].get(error, 0) + 1
+
+        await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        if monitor_task is not None:
+            await monitor_task
+
+    return summarize(samples, errors, elapsed, concurrency, monitor)
+
+
+def _latency_stats(latencies: List[float], elapsed: float) -> dict:
+    ordered = sorted(latencies)
+    stats = {
+        "requests": len(ordered),
+        "throughput": len(ordered) / elapsed if elapsed else 0.0,
+        "mean_ms": 1000 * sum(ordered) / len(ordered) if ordered else 0.0,
+        "max_ms": 1000 * ordered[-1] if ordered else 0.0,
+    }
+    for pct in PERCENTILES:
+        stats[f"p{pct}_ms"] = 1000 * percentile(ordered, pct)
+    return stats
+
+
+def summarize(samples: Dict[str, List[float]], errors: Dict[str, Dict[str, int]], elapsed: float, concurrency: int, monitor: Optional[RssMonitor]) -> dict:
+    scenarios = {}
+    for name, latencies in samples.items():
+        stats = _latency_stats(latencies, elapsed)
+        stats["errors"] = sum(errors[name].values())
+        stats["error_rate"] = stats["errors"] / len(latencies) if latencies else 0.0
+        stats["error_kinds"] = errors[name]
+        scenarios[name] = stats
+    overall = _latency_stats([latency for latencies in samples.values() for latency in latencies], elapsed)
+    overall["errors"] = sum(stats["errors"] for stats in scenarios.values())
+    overall["error_rate"] = overall["errors"] / overall["requests"] if overall["requests"] else 0.0
+    processes = []
+    if monitor is not None:
+        processes = [
+            {"pid": pid, "role": role, "peak_rss_mb": peak / (1 << 20)}
+            for pid, (role, peak) in sorted(monitor.peaks.items())
+        ]
+    return {
+        "elapsed": elapsed,
+        "concurrency": concurrency,
+        "overall": overall,
+        "scenarios": scenarios,
+        "processes": processes,
+    }
+
+
+def format_results(results: dict) -> str:
+    header = f"{'scenario':<16}{'requests':>9}{'errors':>8}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+    lines = [
+        f"{results['overall']['requests']} requests in {results['elapsed']:.1f}s at concurrency {results['concurrency']}",
+        "",
+        header,
+        "-" * len(header),
+    ]
+    rows = list(results["scenarios"].items()) + [("all", results["overall"])]
+    for name, stats in rows:
+        lines.append(
+            f"{name:<16}{stats['requests']:>9}{stats['errors']:>8}{stats['throughput']:>9.2f}"
+            f"{stats['p50_ms']:>10.0f}{stats['p95_ms']:>10.0f}{stats['p99_ms']:>10.0f}{stats['max_ms']:>10.0f}"
+        )
+    kinds = {name: stats["error_kinds"] for name, stats in results["scenarios"].items() if stats["error_kinds"]}
+    if kinds:
+        lines.append("")
+        lines.append("errors: " + "; ".join(f"{name}: {kind}" for name, kind in kinds.items()))
+    if results["processes"]:
+        lines.append("")
+        lines.append("peak RSS per server process:")
+        for process in results["processes"]:
+            lines.append(f"  {process['role']:<7} pid {process['pid']:<8} {process['peak_rss_mb']:8.1f} MB")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    arg_parser = argparse.ArgumentParser(prog="python -m app.loadtest", description="Load-test the API with a mix of uploads and report exports.")
+    arg_parser.add_argument("fixtures", nargs="*", help=".pdf/.txt files to upload (default: the sample regulations in server/, as TXT and PDF)")
+    arg_parser.add_argument("--url", help="test a running server instead of starting one (no RSS figures)")
+    arg_parser.add_argument("-w", "--workers", type=int, default=1, help="uvicorn worker processes to start (default: 1)")
+    arg_parser.add_argument("-c", "--concurrency", type=int, default=10, help="concurrent clients (default: 10)")
+    arg_parser.add_argument("-n", "--requests", type=int, default=200, help="total requests (default: 200)")
+    arg_parser.add_argument("-d", "--duration", type=float, help="run for this many seconds instead of a request count")
+    arg_parser.add_argument("--mix", default=DEFAULT_MIX, help=f"scenario weights (default: {DEFAULT_MIX})")
+    arg_parser.add_argument("--rules", metavar="FILE", help="JSON detection rules for the *_rules/_filtered scenarios")
+    arg_parser.add_argument("--timeout", type=float, default=120, help="per-request timeout in seconds (default: 120)")
+    arg_parser.add_argument("--seed", type=int, default=0, help="random seed for the request sequence")
+    arg_parser.add_argument("--json", metavar="FILE", help="also write the results as JSON")
+    args = arg_parser.parse_args(argv)
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        arg_parser.error(f"invalid --mix: {e}")
+    rules = SAMPLE_RULES
+    if args.rules:
+        try:
+            with open(args.rules, "r", encoding="utf-8") as fh:
+                rules = json.load(fh)
+        except (OSError, ValueError) as e:
+            arg_parser.error(f"invalid --rules: {e}")
+    try:
+        fixtures = load_fixtures(args.fixtures)
+    except OSError as e:
+        arg_parser.error(f"invalid fixture: {e}")
+    if not fixtures:
+        arg_parser.error("no fixtures to upload")
+
+    process = monitor = server_log = None
+    base_url = args.url
+    if base_url is None:
+        port = _free_port()
+        process, server_log = start_server(max(1, args.workers), port)
+        monitor = RssMonitor(process.pid)
+        base_url = f"http://127.0.0.1:{port}"
+    try:
+        results = asyncio.run(run_load(
+            base_url.rstrip("/"),
+            fixtures,
+            mix,
+            rules,
+            concurrency=max(1, args.concurrency),
+            requests=max(1, args.requests),
+            duration=args.duration,
+            timeout=args.timeout,
+            seed=args.seed,
+            process=process,
+            monitor=monitor,
+            server_log=server_log,
+        ))
+    except RuntimeError as e:
+        print(f"load test failed: {e}", file=sys.stderr)
+        return 2
+    finally:
+        if process is not None:
+            stop_server(process)
+            server_log.close()
+
+    print(format_results(results))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+    return 1 if results["overall"]["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,30 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+
+from app.services.memory import MemoryMiddleware, memory_tracker, tracking_requested
+from app.services.pdf_backends import backend_selector
+from app.services.report import renderer_pool
+from app.services.rule_packs import rule_pack_store
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if tracking_requested():
+        memory_tracker.start()
+    # Validate and compile the stored rule packs now rather than on the first request using one.
+    rule_pack_store.load()
+    # Benchmark the installed PDF backends once, before the first upload waits on it.
+    backend_selector.order()
+    # Pre-warm the PDF renderer workers so the first report does not pay for font discovery.
+    renderer_pool.start()
+    yield
+    renderer_pool.close()
+
 
-app = FastAPI(title="ReguGuard API")
+app = FastAPI(title="ReguGuard API", lifespan=lifespan)
 
 origins = [
     "http://localhost:5173",  # Client dev server
@@ -15,6 +38,10 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Item lists and reports compress well; responses already brotli-encoded are passed through.
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+# Outermost, so per-request memory accounting covers compression and response streaming too.
+app.add_middleware(MemoryMiddleware)
 
 from app.api import endpoints
 
@@ -0,0 +1,141 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional
+
+from app.services.extraction import decode_text, extract_pdf
+from app.services.parallel import EXECUTOR_KINDS, gil_enabled, parse_document
+from app.services.parser import parser
+
+# Parse throughput at 1..N workers with thread and process pools, to check how parsing scales on
+# this interpreter (notably free-threaded 3.13t/3.14t builds, where threads run in parallel):
+#   python -m app.parsebench --copies 20 --workers 1,2,4,8 --executor thread,process
+# "shard" splits one large document across the pool (parse_document); "documents" parses
+# --documents copies side by side, one per worker, as the batch CLI does. The chunk cache is
+# disabled throughout so every run does the full work.
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_GLOBS = (os.path.join(os.path.dirname(SERVER_DIR), "*.pdf"), os.path.join(SERVER_DIR, "test_*.txt"))
+MODES = ("shard", "documents")
+
+
+def load_text(paths: List[str], copies: int) -> str:
+    texts = []
+    for path in paths:
+        with open(path, "rb") as fh:
+            data = fh.read()
+        texts.append((extract_pdf(data) if path.lower().endswith(".pdf") else decode_text(data)).text)
+    return "\n\n".join(texts * max(1, copies))
+
+
+def _parse_uncached(text: str, workers: int = 1, executor: Optional[str] = None) -> int:
+    # Also the document-mode worker entry point, so process workers disable their own cache.
+    parser.chunk_cache.max_bytes = 0
+    items, _ = parse_document(text, workers=workers, executor=executor)
+    return len(items)
+
+
+def run_once(mode: str, text: str, kind: str, workers: int, documents: int) -> dict:
+    started = time.perf_counter()
+    if mode == "shard":
+        counts = [_parse_uncached(text, workers, kind)]
+    elif workers == 1:
+        counts = [_parse_uncached(text) for _ in range(documents)]
+    else:
+        pool = ThreadPoolExecutor if kind == "thread" else ProcessPoolExecutor
+        with pool(max_workers=workers) as executor:
+            counts = list(executor.map(_parse_uncached, [text] * documents))
+    seconds = time.perf_counter() - started
+    megabytes = len(text.encode("utf-8")) * (1 if mode == "shard" else documents) / (1 << 20)
+    return {
+        "mode": mode,
+        "executor": kind,
+        "workers": workers,
+        "seconds": seconds,
+        "mb_per_second": megabytes / max(seconds, 1e-9),
+        "items": sum(counts),
+    }
+
+
+def run(text: str, modes: List[str], kinds: List[str], worker_counts: List[int], documents: int, repeat: int) -> List[dict]:
+    parser.chunk_cache.clear()
+    _parse_uncached(text)  # warm-up: compiles the rules and imports everything first
+    results = []
+    for mode in modes:
+        baseline = None
+        for kind in kinds:
+            for workers in worker_counts:
+                if workers == 1 and baseline is not None:
+                    continue  # one worker is the serial parse, whatever the pool kind
+                result = min((run_once(mode, text, kind, workers, documents) for _ in range(repeat)), key=lambda r: r["seconds"])
+                if workers == 1:
+                    result["executor"] = "serial"
+                    baseline = result
+                result["speedup"] = baseline["seconds"] / result["seconds"] if baseline else None
+                result["items_match"] = baseline is None or result["items"] == baseline["items"]
+                results.append(result)
+                print(format_row(result), flush=True)
+    return results
+
+
+def format_row(result: dict) -> str:
+    speedup = f"{result['speedup']:.2f}x" if result["speedup"] else "-"
+    mismatch = "" if result["items_match"] else "  ITEM COUNT DIFFERS"
+    return (
+        f"{result['mode']:<10}{result['executor']:<9}{result['workers']:>8}{result['seconds']:>10.2f}"
+        f"{result['mb_per_second']:>9.2f}{speedup:>9}{result['items']:>9}{mismatch}"
+    )
+
+
+def _int_list(spec: str) -> List[int]:
+    return sorted({max(1, int(part)) for part in spec.split(",") if part.strip()})
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    arg_parser = argparse.ArgumentParser(prog="python -m app.parsebench", description="Measure parse throughput with thread and process pools.")
+    arg_parser.add_argument("files", nargs="*", help=".pdf/.txt files to parse (default: the sample regulations)")
+    arg_parser.add_argument("--copies", type=int, default=10, help="repeat the input this many times to make the document (default: 10)")
+    arg_parser.add_argument("--workers", default="1,2,4", help="comma-separated worker counts (default: 1,2,4)")
+    arg_parser.add_argument("--executor", default=",".join(EXECUTOR_KINDS), help="comma-separated pool kinds: thread, process (default: both)")
+    arg_parser.add_argument("--mode", default=",".join(MODES), help="comma-separated modes: shard, documents (default: both)")
+    arg_parser.add_argument("--documents", type=int, help="documents parsed side by side in documents mode (default: the largest worker count)")
+    arg_parser.add_argument("--repeat", type=int, default=1, help="runs per configuration; the fastest is reported (default: 1)")
+    arg_parser.add_argument("--json", metavar="FILE", help="also write the results as JSON")
+    args = arg_parser.parse_args(argv)
+
+    kinds = [kind.strip() for kind in args.executor.split(",") if kind.strip()]
+    modes = [mode.strip() for mode in args.mode.split(",") if mode.strip()]
+    if not kinds or any(kind not in EXECUTOR_KINDS for kind in kinds):
+        arg_parser.error(f"--executor must list {' and/or '.join(EXECUTOR_KINDS)}")
+    if not modes or any(mode not in MODES for mode in modes):
+        arg_parser.error(f"--mode must list {' and/or '.join(MODES)}")
+    try:
+        worker_counts = _int_list(args.workers)
+    except ValueError:
+        arg_parser.error("--workers must be comma-separated integers")
+    paths = args.files or [path for pattern in SAMPLE_GLOBS for path in sorted(glob.glob(pattern))]
+    if not paths:
+        arg_parser.error("no input files")
+
+    text = load_text(paths, args.copies)
+    documents = args.documents or max(worker_counts)
+    print(f"Python {platform.python_version()} ({sys.implementation.name}), GIL {'enabled' if gil_enabled() else 'disabled'}, {os.cpu_count()} CPUs")
+    print(f"{len(text.encode('utf-8')) / (1 << 20):.1f} MB document; documents mode parses {documents} copies")
+    header = f"{'mode':<10}{'executor':<9}{'workers':>8}{'seconds':>10}{'MB/s':>9}{'speedup':>9}{'items':>9}"
+    print(header)
+    print("-" * len(header))
+    results = run(text, modes, kinds, worker_counts, documents, max(1, args.repeat))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump({"python": platform.python_version(), "gil_enabled": gil_enabled(), "cpus": os.cpu_count(), "results": results}, fh, indent=2)
+    return 0 if all(result["items_match"] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
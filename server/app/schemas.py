@@ -1,9 +1,9 @@
-from pydantic import BaseModel
-from typing import List, Optional
+import datetime
+from pydantic import BaseModel, PrivateAttr, computed_field
+from typing import Any, Dict, List, Optional
 
 class RegulationItem(BaseModel):
     control_id: str
-    text: str
     modal_verb: Optional[str] = None
     severity: str  # High, Medium, Low, Unknown
     score: int = 0  # 0-100 risk score
@@ -11,8 +11,276 @@ class RegulationItem(BaseModel):
     score_reasons: List[str] = []  # human-readable reasons for scoring
     score_flags: dict = {}  # {penalty: bool, mandatory: bool, breach: bool, enforcement: bool}
     action: str = "Review"
+    duplicates: List[str] = []  # control ids collapsed into this canonical obligation
+    stable_id: Optional[str] = None  # content-derived id that survives renumbering across amendments
+    start: Optional[int] = None  # span in the document's normalised text
+    end: Optional[int] = None
+    page: Optional[int] = None  # 1-based PDF page the obligation starts on
+    section_id: Optional[int] = None  # node in the document's section tree (see /documents/{id}/sections)
+    section: Optional[str] = None  # citation of that node, e.g. "Section 12(3)"
+
+    # Parsed items keep only their span; the text is sliced from the shared document buffer
+    # when it is read (e.g. while serialising a response).
+    _text: Optional[str] = PrivateAttr(default=None)
+    _source: Any = PrivateAttr(default=None)
+
+    def __init__(self, text: Optional[str] = None, source: Any = None, **data):
+        super().__init__(**data)
+        self._text = text
+        self._source = source
+
+    @computed_field
+    @property
+    def text(self) -> str:
+        if self._text is not None:
+            return self._text
+        if self._source is not None and self.start is not None:
+            return self._source.slice(self.start, self.end)
+        return ""
 
 class ParsingResult(BaseModel):
     filename: str
     total_items: int
     items: List[RegulationItem]
+    collapsed_items: int = 0  # near-duplicates folded into canonical items
+    document_id: Optional[str] = None  # server-side handle for follow-up queries
+
+class SourceSpan(BaseModel):
+    control_id: str
+    start: int  # offsets into the normalised text
+    end: int
+    raw_start: int  # offsets into the extracted text
+    raw_end: int
+    page: Optional[int] = None
+    before: str = ""  # normalised context preceding the obligation
+    text: str
+    after: str = ""
+
+class ItemPage(BaseModel):
+    document_id: str
+    items: List[RegulationItem]
+    next_cursor: Optional[str] = None  # pass back as `cursor` for the next page
+
+class DedupeResult(BaseModel):
+    filenames: List[str]
+    total_items: int
+    collapsed_items: int = 0
+    items: List[RegulationItem]
+
+class ObligationChange(BaseModel):
+    status: str  # unchanged, modified, added, removed
+    old_control_id: Optional[str] = None
+    new_control_id: Optional[str] = None
+    similarity: float = 0.0  # shingle Jaccard similarity, 1.0 for exact matches
+    text: str = ""  # new text (old text for removed obligations)
+    previous_text: Optional[str] = None  # set for modified obligations
+    severity: Optional[str] = None  # carried-over severity for matched obligations
+
+class DiffResult(BaseModel):
+    old_filename: str
+    new_filename: str
+    summary: dict = {}  # {unchanged: int, modified: int, added: int, removed: int}
+    changes: List[ObligationChange]
+    severity_map: dict = {}  # new control_id -> carried-over severity
+    tasks: Optional[dict] = None  # board re-keyed to the new control ids
+
+class ItemDifference(BaseModel):
+    change: str  # added, removed, severity_changed (relative to the baseline rule set)
+    text: str
+    control_id: Optional[str] = None
+    baseline_control_id: Optional[str] = None
+    severity: Optional[str] = None
+    baseline_severity: Optional[str] = None
+
+class RuleSetOutcome(BaseModel):
+    name: str
+    total_items: int
+    severity_counts: dict = {}
+    category_counts: dict = {}
+    rule_hits: dict = {}  # detection rule id -> matched items
+    differences: List[ItemDifference] = []
+
+class WhatIfResult(BaseModel):
+    filename: str
+    sentences_evaluated: int
+    outcomes: List[RuleSetOutcome]
+
+class TaskBoardPayload(BaseModel):
+    columns: dict = {}  # column -> [control_id, ...] (rule dicts are accepted too)
+    steps: dict = {}  # control_id -> [step, ...]
+
+class TaskBoardState(BaseModel):
+    document_id: str
+    version: int
+    columns: dict = {}
+    steps: dict = {}
+
+class TaskOperation(BaseModel):
+    op: str  # move, add_step, update_step, remove_step, set_steps
+    control_id: str
+    column: Optional[str] = None  # move target; null removes the rule from the board
+    index: Optional[int] = None
+    step_id: Optional[str] = None
+    step: Optional[dict] = None
+    steps: Optional[List[dict]] = None
+
+class TaskPatch(BaseModel):
+    ops: List[TaskOperation]
+    version: Optional[int] = None  # optimistic concurrency check
+
+class TaskBoardVersion(BaseModel):
+    document_id: str
+    version: int
+
+class ApplicabilityFeedback(BaseModel):
+    applicable: bool
+    document_id: Optional[str] = None  # with control_id, the obligation text is taken from the stored document
+    control_id: Optional[str] = None
+    text: Optional[str] = None
+
+class ApplicabilityModelStats(BaseModel):
+    company_id: str
+    applicable_feedback: int
+    not_applicable_feedback: int
+    trained: bool
+
+class ApplicabilityPrediction(BaseModel):
+    control_id: str
+    probability: Optional[float] = None  # P(applicable); None until both labels have feedback
+    label: str  # applicable, not_applicable, needs_review
+
+class ApplicabilityPredictions(BaseModel):
+    document_id: str
+    company_id: str
+    predictions: List[ApplicabilityPrediction]
+
+class CompanyProfile(BaseModel):
+    roles: List[str] = []  # e.g. controller, processor, data_intermediary
+    industries: List[str] = []  # e.g. healthcare, finance
+    jurisdictions: List[str] = []  # e.g. singapore, eu
+    size: Optional[str] = None  # small, medium, large
+
+class ApplicabilityDecision(BaseModel):
+    control_id: str
+    status: str  # applicable, not_applicable, needs_review
+    reasons: List[str] = []
+
+class ProfileApplicability(BaseModel):
+    document_id: str
+    company_id: str
+    evaluated: int  # obligations (re)evaluated for this request
+    counts: dict = {}
+    decisions: List[ApplicabilityDecision]
+
+class RuleHitCount(BaseModel):
+    keyword: str
+    severity: str
+    matches: int
+
+class StakeholderScore(BaseModel):
+    name: str
+    score: int  # keyword occurrences across the document's obligations
+
+class SummaryKpis(BaseModel):
+    manual_hours: float  # estimated manual review effort
+    automated_minutes: int
+    time_saved_hours: float
+    hourly_rate: int
+    value_saved: int  # time saved at the hourly rate
+
+class DocumentSummary(BaseModel):
+    document_id: str
+    filename: str
+    total_items: int
+    counts: dict = {}  # high, medium, low, unknown
+    percentages: dict = {}
+    kpis: SummaryKpis
+    top_items: Dict[str, List[RegulationItem]] = {}  # bucket -> highest-scoring items, best first
+    rule_hits: List[RuleHitCount] = []
+    stakeholders: List[StakeholderScore] = []
+
+class SectionEntry(BaseModel):
+    id: int
+    kind: str  # part, division, section, subsection
+    number: str
+    label: str  # e.g. "Part II", "Section 12", "(3)"
+    citation: str  # e.g. "Section 12(3)"
+    parent_id: Optional[int] = None
+    last_id: int  # last node of this subtree; ids id+1..last_id are its descendants
+    start: int  # span in the document's normalised text
+    end: int
+    page: Optional[int] = None
+    item_count: int = 0  # obligations in this node and its descendants
+
+class SectionTree(BaseModel):
+    document_id: str
+    sections: List[SectionEntry]  # document order, parents before children
+
+class JobStatus(BaseModel):
+    id: str
+    kind: str  # upload, report
+    filename: Optional[str] = None
+    status: str  # queued, running, done, failed, cancelled
+    phase: Optional[str] = None  # extract, split, parse, aggregate, html, render
+    progress: dict = {}  # pages_extracted/total_pages, characters_parsed/normalised_characters, items_found, ...
+    error: Optional[str] = None
+    document_id: Optional[str] = None  # upload jobs, once the document is stored
+    created_at: datetime.datetime
+    finished_at: Optional[datetime.datetime] = None
+
+class RulePackSummary(BaseModel):
+    id: str
+    version: int
+    name: str
+    description: str = ""
+    heuristics: bool = False  # parser fallbacks (actor + modal, generic signals) on top of the rules
+    builtin: bool = False
+    rule_count: int = 0
+    fingerprint: str  # equal fingerprints parse identically and share cached results
+    created_at: Optional[str] = None
+
+class RulePackDetail(RulePackSummary):
+    rules: List[dict]
+    versions: List[int] = []
+
+class RulePackPayload(BaseModel):
+    name: str
+    description: str = ""
+    heuristics: bool = False
+    rules: List[dict]
+
+class ControlCatalogueSummary(BaseModel):
+    id: str
+    name: str
+    description: str = ""
+    version: int
+    control_count: int = 0
+    updated_at: Optional[str] = None
+
+class ControlCatalogueDetail(ControlCatalogueSummary):
+    controls: List[dict]  # [{id, title, description, framework}]
+
+class ControlCataloguePayload(BaseModel):
+    name: str
+    description: str = ""
+    controls: List[dict]
+
+class ControlMatch(BaseModel):
+    id: str  # control id in the catalogue, e.g. "A.5.34"
+    title: str
+    framework: str = ""
+    score: float  # TF-IDF cosine similarity, 0-1
+
+class ObligationControls(BaseModel):
+    control_id: str  # the obligation
+    section: Optional[str] = None
+    matches: List[ControlMatch] = []
+
+class ControlMappingResult(BaseModel):
+    document_id: str
+    catalogue_id: str
+    catalogue_version: int
+    top_k: int
+    min_score: float
+    mapped_items: int = 0  # obligations with at least one match
+    items: List[ObligationControls]
@@ -0,0 +1,202 @@
+import datetime
+import math
+import os
+import re
+import threading
+import urllib.parse
+import zlib
+from typing import Dict, List, Optional, Sequence
+
+from app.services.storage import DATA_DIR, append_jsonl, load_json, write_json
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except Exception:
+    NUMPY_AVAILABLE = False
+
+# Per-company multinomial Naive Bayes applicability model trained from "Mark applicable /
+# not applicable" feedback. Tokens are feature-hashed so counts stay sparse dicts that update
+# online with each event, and token ids of a document never depend on a company's vocabulary.
+# Each feedback event is appended to a JSONL log and only the changed company's model file is
+# rewritten, so recording feedback costs the same however much history there is.
+
+MODELS_DIR = os.path.join(DATA_DIR, "applicability_models")  # one <company id>.json per company
+LEGACY_MODELS_PATH = os.path.join(DATA_DIR, "applicability_models.json")  # read for companies not yet migrated
+FEEDBACK_PATH = os.path.join(DATA_DIR, "applicability_feedback.jsonl")
+
+HASH_BUCKETS = 1 << 18
+ALPHA = 1.0  # Laplace smoothing
+REVIEW_BAND = (0.35, 0.65)  # probabilities in this band are left for a human
+APPLICABLE, NOT_APPLICABLE = 0, 1
+
+_TOKEN_PATTERN = re.compile(r"[a-z][a-z0-9]+")
+_STOPWORDS = {
+    "the", "and", "of", "to", "in", "or", "any", "an", "by", "for", "be", "is", "as", "on",
+    "that", "this", "with", "which", "its", "it", "such", "under", "at", "from", "are",
+}
+
+
+def token_ids(text: str) -> List[int]:
+    return [
+        zlib.crc32(tok.encode("utf-8")) % HASH_BUCKETS
+        for tok in _TOKEN_PATTERN.findall((text or "").lower())
+        if tok not in _STOPWORDS
+    ]
+
+
+class TokenMatrix:
+    """
+    Hashed token ids of a batch of texts in CSR layout (indptr/indices), built once per document.
+    """
+
+    def __init__(self, texts: Sequence[str]):
+        indptr = [0]
+        indices: List[int] = []
+        for text in texts:
+            indices.extend(token_ids(text))
+            indptr.append(len(indices))
+        self.rows = len(texts)
+        if NUMPY_AVAILABLE:
+            self.indptr = np.asarray(indptr, dtype=np.int64)
+            self.indices = np.asarray(indices, dtype=np.int64)
+            self.row_of = np.repeat(np.arange(self.rows), np.diff(self.indptr))
+        else:
+            self.indptr = indptr
+            self.indices = indices
+
+
+class NaiveBayesModel:
+    def __init__(self, data: Optional[dict] = None):
+        data = data or {}
+        self.class_docs = list(data.get("class_docs", [0, 0]))
+        self.token_totals = list(data.get("token_totals", [0, 0]))
+        self.counts: List[Dict[int, int]] = [
+            {int(k): v for k, v in (data.get("counts") or [{}, {}])[c].items()}
+            for c in (APPLICABLE, NOT_APPLICABLE)
+        ]
+        self.version = 0
+        self.lock = threading.Lock()
+        self._snapshot = None  # (version, prior_delta, default_delta, weights)
+
+    def to_dict(self) -> dict:
+        with self.lock:
+            return {
+                "class_docs": list(self.class_docs),
+                "token_totals": list(self.token_totals),
+                "counts": [{str(k): v for k, v in c.items()} for c in self.counts],
+            }
+
+    @property
+    def trained(self) -> bool:
+        return all(self.class_docs)
+
+    def update(self, text: str, label: int) -> None:
+        ids = token_ids(text)
+        with self.lock:
+            counts = self.counts[label]
+            for tid in ids:
+                counts[tid] = counts.get(tid, 0) + 1
+            self.class_docs[label] += 1
+            self.token_totals[label] += len(ids)
+            self.version += 1
+
+    def _weights(self):
+        """
+        Returns (prior_delta, default_delta, sparse_or_dense_deltas) of log P(applicable) - log P(not),
+        recomputed only when feedback has arrived since the last call.
+        """
+        with self.lock:
+            if self._snapshot and self._snapshot[0] == self.version:
+                return self._snapshot[1:]
+            docs = self.class_docs
+            prior_delta = math.log((docs[0] + ALPHA) / (docs[1] + ALPHA))
+            denom = [self.token_totals[c] + ALPHA * HASH_BUCKETS for c in (APPLICABLE, NOT_APPLICABLE)]
+            default_delta = math.log(ALPHA / denom[0]) - math.log(ALPHA / denom[1])
+            seen = set(self.counts[0]) | set(self.counts[1])
+            deltas = {
+                tid: math.log((self.counts[0].get(tid, 0) + ALPHA) / denom[0])
+                - math.log((self.counts[1].get(tid, 0) + ALPHA) / denom[1])
+                for tid in seen
+            }
+            if NUMPY_AVAILABLE:
+                dense = np.full(HASH_BUCKETS, default_delta, dtype=np.float64)
+                if deltas:
+                    dense[np.fromiter(deltas.keys(), dtype=np.int64, count=len(deltas))] = np.fromiter(
+                        deltas.values(), dtype=np.float64, count=len(deltas)
+                    )
+                deltas = dense
+            self._snapshot = (self.version, prior_delta, default_delta, deltas)
+            return self._snapshot[1:]
+
+    def predict(self, matrix: TokenMatrix) -> List[float]:
+        """
+        Returns P(applicable) for every row of the matrix, scored in one vectorized pass.
+        """
+        prior_delta, default_delta, deltas = self._weights()
+        if NUMPY_AVAILABLE:
+            logits = np.bincount(matrix.row_of, weights=deltas[matrix.indices], minlength=matrix.rows) + prior_delta
+            return (1.0 / (1.0 + np.exp(-np.clip(logits, -50, 50)))).tolist()
+        probs = []
+        for row in range(matrix.rows):
+            logit = prior_delta
+            for tid in matrix.indices[matrix.indptr[row]:matrix.indptr[row + 1]]:
+                logit += deltas.get(tid, default_delta)
+            probs.append(1.0 / (1.0 + math.exp(-max(-50.0, min(50.0, logit)))))
+        return probs
+
+
+def label_for(probability: Optional[float]) -> str:
+    if probability is None or REVIEW_BAND[0] < probability < REVIEW_BAND[1]:
+        return "needs_review"
+    return "applicable" if probability >= REVIEW_BAND[1] else "not_applicable"
+
+
+class ApplicabilityService:
+    def __init__(self, models_dir: str = MODELS_DIR, feedback_path: str = FEEDBACK_PATH, legacy_models_path: str = LEGACY_MODELS_PATH):
+        self.models_dir = models_dir
+        self.feedback_path = feedback_path
+        self.legacy_models_path = legacy_models_path
+        self._models: Dict[str, NaiveBayesModel] = {}
+        self._legacy: Optional[dict] = None
+        self._lock = threading.Lock()  # guards the model cache and the files
+
+    def _model_path(self, company_id: str) -> str:
+        return os.path.join(self.models_dir, f"{urllib.parse.quote(company_id, safe='')}.json")
+
+    def model(self, company_id: str) -> NaiveBayesModel:
+        with self._lock:
+            model = self._models.get(company_id)
+            if model is None:
+                data = load_json(self._model_path(company_id), None)
+                if data is None:
+                    if self._legacy is None:
+                        self._legacy = load_json(self.legacy_models_path, {})
+                    data = self._legacy.get(company_id)
+                model = self._models[company_id] = NaiveBayesModel(data)
+            return model
+
+    def record_feedback(self, company_id: str, text: str, applicable: bool, control_id: Optional[str] = None) -> NaiveBayesModel:
+        model = self.model(company_id)
+        model.update(text, APPLICABLE if applicable else NOT_APPLICABLE)
+        event = {
+            "company_id": company_id,
+            "control_id": control_id,
+            "text": text,
+            "applicable": bool(applicable),
+            "recorded_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        }
+        with self._lock:
+            append_jsonl(self.feedback_path, event)
+            # Snapshot under the lock, so the last write always holds the latest counts.
+            write_json(self._model_path(company_id), model.to_dict(), indent=None)
+        return model
+
+    def predict(self, company_id: str, matrix: TokenMatrix) -> List[Optional[float]]:
+        model = self.model(company_id)
+        if not model.trained:
+            return [None] * matrix.rows
+        return model.predict(matrix)
+
+
+applicability_service = ApplicabilityService()
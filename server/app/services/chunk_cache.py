@@ -0,0 +1,60 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Hashable, List, Optional
+
+# Memoized parse results per merged chunk. Keys combine a digest of the normalised chunk text with
+# the rule-set fingerprint; values are the parser's chunk rows (chunk-relative offsets), so a chunk
+# that reappears anywhere in a re-uploaded document is not matched and scored again.
+MAX_CACHE_BYTES = 64 << 20
+# Approximate retained size of an entry, measured with tracemalloc on the sample regulations: the
+# key, row list and LRU link, plus one row tuple with its flags dict, reasons and digest per row.
+# The chunk text itself is not kept (only its digest), so an entry grows with its row count.
+ENTRY_BYTES = 300
+ROW_BYTES = 600
+
+
+def chunk_digest(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def rows_size(rows: List[tuple]) -> int:
+    return ENTRY_BYTES + ROW_BYTES * len(rows)
+
+
+class ChunkCache:
+    def __init__(self, max_bytes: int = MAX_CACHE_BYTES):
+        self.max_bytes = max_bytes  # 0 disables the cache
+        self.size = 0  # approximate bytes held, see rows_size()
+        self._rows: "OrderedDict[Hashable, List[tuple]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[List[tuple]]:
+        with self._lock:
+            rows = self._rows.get(key)
+            if rows is not None:
+                self._rows.move_to_end(key)
+            return rows
+
+    def put(self, key: Hashable, rows: List[tuple]) -> None:
+        size = rows_size(rows)
+        with self._lock:
+            if size > self.max_bytes:
+                return
+            previous = self._rows.pop(key, None)
+            if previous is not None:
+                self.size -= rows_size(previous)
+            self._rows[key] = rows
+            self.size += size
+            while self.size > self.max_bytes:
+                _, evicted = self._rows.popitem(last=False)
+                self.size -= rows_size(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._rows.clear()
+            self.size = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._rows)
@@ -0,0 +1,292 @@
+import datetime
+import heapq
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.services.storage import DATA_DIR, load_json, write_json
+
+try:
+    import numpy as np
+    from scipy import sparse
+    SCIPY_AVAILABLE = True
+except Exception:
+    SCIPY_AVAILABLE = False
+
+# Maps obligations to the controls of a catalogue (ISO 27001 Annex A, NIST CSF, an in-house
+# control list) by TF-IDF cosine similarity. The catalogue side is built once per catalogue
+# version: a vocabulary, idf weights and L2-normalised control vectors held as a sparse
+# term x control matrix. Mapping a document vectorises its obligations into a sparse
+# obligation x term matrix and scores every pair in one sparse product, then keeps the top-k
+# controls per obligation. Without SciPy the same scores come from an inverted index in pure
+# Python, which is fine for small catalogues but much slower on large ones.
+
+CATALOGUES_PATH = os.path.join(DATA_DIR, "control_catalogues.json")
+DEFAULT_TOP_K = 3
+MAX_TOP_K = 20
+DEFAULT_MIN_SCORE = 0.05
+BLOCK_ROWS = 2048  # obligations per dense block when selecting the top-k of the score matrix
+
+_CATALOGUE_ID = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
+_TOKEN_PATTERN = re.compile(r"[a-z][a-z0-9]+")
+# Modal verbs and connectives occur in nearly every obligation and carry no control meaning.
+_STOPWORDS = {
+    "the", "and", "of", "to", "in", "or", "any", "an", "by", "for", "be", "is", "as", "on",
+    "that", "this", "with", "which", "its", "it", "such", "under", "at", "from", "are", "all",
+    "shall", "must", "may", "should", "will", "not", "no", "been", "has", "have", "where",
+    "other", "their", "each", "who", "if", "section", "subsection", "part", "person",
+}
+_SUFFIXES = ("ing", "ed", "es", "s")
+MIN_STEM = 4
+
+
+def _stem(token: str) -> str:
+    # Folds "processing" / "processed" / "processes" onto "process"; deliberately crude.
+    for suffix in _SUFFIXES:
+        if token.endswith(suffix) and not token.endswith("ss") and len(token) - len(suffix) >= MIN_STEM:
+            return token[:-len(suffix)]
+    return token
+
+
+def terms(text: str) -> List[str]:
+    return [_stem(tok) for tok in _TOKEN_PATTERN.findall((text or "").lower()) if tok not in _STOPWORDS]
+
+
+def validate_controls(controls) -> List[dict]:
+    """
+    Normalised copy of a control list; raises ValueError naming the first invalid control.
+    """
+    if not isinstance(controls, list) or not controls:
+        raise ValueError("controls must be a non-empty list")
+    normalized, seen = [], set()
+    for index, control in enumerate(controls):
+        if not isinstance(control, dict):
+            raise ValueError(f"control {index} must be an object")
+        control_id = str(control.get("id") or "").strip()
+        if not control_id:
+            raise ValueError(f"control {index} needs an id")
+        if control_id in seen:
+            raise ValueError(f"duplicate control id '{control_id}'")
+        seen.add(control_id)
+        title = control.get("title")
+        if not isinstance(title, str) or not title.strip():
+            raise ValueError(f"control '{control_id}' needs a title")
+        description = control.get("description") or ""
+        if not isinstance(description, str):
+            raise ValueError(f"control '{control_id}': description must be a string")
+        normalized.append({
+            "id": control_id,
+            "title": title.strip(),
+            "description": description,
+            "framework": str(control.get("framework") or ""),
+        })
+    return normalized
+
+
+class TfidfIndex:
+    """
+    Vocabulary, idf weights and normalised vectors of a fixed set of documents (the controls).
+    """
+
+    def __init__(self, documents: Sequence[str]):
+        counts = [Counter(terms(document)) for document in documents]
+        df: Counter = Counter()
+        for counter in counts:
+            df.update(counter.keys())
+        vocabulary = sorted(df)
+        self.size = len(documents)
+        self.vocabulary: Dict[str, int] = {term: i for i, term in enumerate(vocabulary)}
+        # Smoothed idf, as if one extra document contained every term.
+        self.idf = [math.log((1 + self.size) / (1 + df[term])) + 1.0 for term in vocabulary]
+        rows = [self._vector(counter) for counter in counts]
+        if SCIPY_AVAILABLE:
+            # term x control, so obligations (obligation x term) @ matrix scores every pair.
+            self.matrix = self._csr(rows).T.tocsr()
+        else:
+            self.postings: Dict[int, List[Tuple[int, float]]] = {}
+            for column, (indices, values) in enumerate(rows):
+                for term_id, weight in zip(indices, values):
+                    self.postings.setdefault(term_id, []).append((column, weight))
+
+    def _vector(self, counter: Counter) -> Tuple[List[int], List[float]]:
+        # Sublinear tf * idf over the catalogue vocabulary, L2-normalised; unknown terms drop out.
+        indices, values = [], []
+        for term, count in counter.items():
+            term_id = self.vocabulary.get(term)
+            if term_id is not None:
+                indices.append(term_id)
+                values.append((1.0 + math.log(count)) * self.idf[term_id])
+        norm = math.sqrt(sum(value * value for value in values))
+        return indices, [value / norm for value in values] if norm else values
+
+    def _csr(self, rows: List[Tuple[List[int], List[float]]]):
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(indices) for indices, _ in rows], out=indptr[1:])
+        indices = np.fromiter((i for row, _ in rows for i in row), dtype=np.int32, count=int(indptr[-1]))
+        values = np.fromiter((v for _, row in rows for v in row), dtype=np.float64, count=int(indptr[-1]))
+        return sparse.csr_matrix((values, indices, indptr), shape=(len(rows), len(self.vocabulary)))
+
+    def top_k(self, texts: Sequence[str], k: int, min_score: float = 0.0) -> List[List[Tuple[int, float]]]:
+        """
+        (document index, cosine score) of the k best documents for every text, best first;
+        scores below min_score (and zero scores) are dropped.
+        """
+        rows = [self._vector(Counter(terms(text))) for text in texts]
+        k = min(k, self.size)
+        if k <= 0 or not rows:
+            return [[] for _ in rows]
+        if SCIPY_AVAILABLE:
+            return self._top_k_sparse(rows, k, min_score)
+        results = []
+        for indices, values in rows:
+            scores: Dict[int, float] = {}
+            for term_id, weight in zip(indices, values):
+                for column, control_weight in self.postings.get(term_id, ()):
+                    scores[column] = scores.get(column, 0.0) + weight * control_weight
+            best = heapq.nsmallest(k, scores.items(), key=lambda pair: (-pair[1], pair[0]))
+            results.append([(column, score) for column, score in best if score > 0 and score >= min_score])
+        return results
+
+    def _top_k_sparse(self, rows, k: int, min_score: float) -> List[List[Tuple[int, float]]]:
+        scores = self._csr(rows) @ self.matrix  # obligation x control, sparse
+        results = []
+        for start in range(0, scores.shape[0], BLOCK_ROWS):
+            block = scores[start:start + BLOCK_ROWS].toarray()
+            if k < block.shape[1]:
+                top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+            else:
+                top = np.broadcast_to(np.arange(block.shape[1]), block.shape)
+            top_scores = np.take_along_axis(block, top, axis=1)
+            # Best first; equal scores in catalogue order.
+            order = np.lexsort((top, -top_scores))
+            top = np.take_along_axis(top, order, axis=1).tolist()
+            top_scores = np.take_along_axis(top_scores, order, axis=1).tolist()
+            for columns, values in zip(top, top_scores):
+                results.append([(column, score) for column, score in zip(columns, values) if score > 0 and score >= min_score])
+        return results
+
+
+class ControlCatalogue:
+    def __init__(self, catalogue_id: str, name: str, controls: List[dict], description: str = "",
+                 version: int = 1, updated_at: Optional[str] = None):
+        self.id = catalogue_id
+        self.name = name
+        self.description = description
+        self.controls = controls
+        self.version = version
+        self.updated_at = updated_at
+        self._index: Optional[TfidfIndex] = None
+        self._lock = threading.Lock()
+
+    @property
+    def index(self) -> TfidfIndex:
+        # Built on first use and kept for the life of this version.
+        with self._lock:
+            if self._index is None:
+                self._index = TfidfIndex([f"{c['title']} {c['description']}" for c in self.controls])
+            return self._index
+
+    def map(self, texts: Sequence[str], top_k: int = DEFAULT_TOP_K, min_score: float = DEFAULT_MIN_SCORE) -> List[List[dict]]:
+        """
+        The top_k matching controls for every text, best first, as {id, title, framework, score}.
+        """
+        return self.select(self.index.top_k(texts, top_k, min_score), top_k, min_score)
+
+    def select(self, scored: Sequence[List[Tuple[int, float]]], top_k: int = DEFAULT_TOP_K, min_score: float = DEFAULT_MIN_SCORE) -> List[List[dict]]:
+        """
+        map() from raw index.top_k() results for a top_k at least as large, so one scoring at
+        MAX_TOP_K serves every top_k/min_score.
+        """
+        return [
+            [
+                {
+                    "id": self.controls[column]["id"],
+                    "title": self.controls[column]["title"],
+                    "framework": self.controls[column]["framework"],
+                    "score": round(score, 4),
+                }
+                for column, score in matches[:top_k]
+                if score >= min_score
+            ]
+            for matches in scored
+        ]
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "description": self.description,
+            "version": self.version,
+            "control_count": len(self.controls),
+            "updated_at": self.updated_at,
+        }
+
+    def to_json(self) -> dict:
+        return {
+            "name": self.name,
+            "description": self.description,
+            "version": self.version,
+            "controls": self.controls,
+            "updated_at": self.updated_at,
+        }
+
+
+class ControlCatalogueStore:
+    def __init__(self, path: str = CATALOGUES_PATH):
+        self.path = path
+        self._catalogues: Optional[Dict[str, ControlCatalogue]] = None
+        self._lock = threading.Lock()
+
+    def _all(self) -> Dict[str, ControlCatalogue]:
+        if self._catalogues is None:
+            self._catalogues = {
+                catalogue_id: ControlCatalogue(
+                    catalogue_id,
+                    data["name"],
+                    validate_controls(data["controls"]),
+                    data.get("description", ""),
+                    data.get("version", 1),
+                    data.get("updated_at"),
+                )
+                for catalogue_id, data in load_json(self.path, {}).items()
+            }
+        return self._catalogues
+
+    def list(self) -> List[ControlCatalogue]:
+        with self._lock:
+            return list(self._all().values())
+
+    def get(self, catalogue_id: str) -> Optional[ControlCatalogue]:
+        with self._lock:
+            return self._all().get(catalogue_id)
+
+    def save(self, catalogue_id: str, name: str, controls: list, description: str = "") -> ControlCatalogue:
+        """
+        Creates or replaces a catalogue; replacing bumps its version, which drops cached vectors
+        and mappings. Raises ValueError for invalid ids or controls.
+        """
+        if not _CATALOGUE_ID.match(catalogue_id or ""):
+            raise ValueError("catalogue id must be 1-64 lowercase letters, digits, '-' or '_'")
+        controls = validate_controls(controls)
+        with self._lock:
+            catalogues = self._all()
+            current = catalogues.get(catalogue_id)
+            if current is not None and (current.name, current.description, current.controls) == (name, description, controls):
+                return current
+            catalogue = ControlCatalogue(
+                catalogue_id,
+                name,
+                controls,
+                description,
+                current.version + 1 if current else 1,
+                datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            )
+            catalogues[catalogue_id] = catalogue
+            write_json(self.path, {cid: c.to_json() for cid, c in catalogues.items()})
+            return catalogue
+
+
+catalogue_store = ControlCatalogueStore()
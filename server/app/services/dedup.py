@@ -0,0 +1,93 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.schemas import RegulationItem
+from app.services.similarity import LSHIndex, fingerprint, jaccard, minhasher, shingles
+
+DEFAULT_DEDUPE_THRESHOLD = 0.85
+
+
+def _cluster(texts: Sequence[str], threshold: float) -> List[List[int]]:
+    """
+    Groups near-identical texts. Each text probes the LSH index before being added, so only
+    bucket collisions are verified with Jaccard similarity (near-linear in the number of texts).
+    """
+    parent = list(range(len(texts)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(a: int, b: int) -> None:
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            # Keep the earliest index as root so clusters stay in document order.
+            parent[max(ra, rb)] = min(ra, rb)
+
+    first_by_fp: Dict[str, int] = {}
+    index = LSHIndex(num_perm=minhasher.num_perm)
+    shingle_sets: Dict[int, set] = {}
+    for idx, text in enumerate(texts):
+        fp = fingerprint(text)
+        if fp in first_by_fp:
+            union(first_by_fp[fp], idx)
+            continue
+        first_by_fp[fp] = idx
+
+        shingle_sets[idx] = shingles(text)
+        signature = minhasher.signature(shingle_sets[idx])
+        for other in index.candidates(signature):
+            if find(other) == find(idx):
+                continue
+            if jaccard(shingle_sets[idx], shingle_sets[other]) >= threshold:
+                union(other, idx)
+        index.add(idx, signature)
+
+    clusters: Dict[int, List[int]] = {}
+    for idx in range(len(texts)):
+        clusters.setdefault(find(idx), []).append(idx)
+    return list(clusters.values())
+
+
+def _collapse(items: List[RegulationItem], refs: List[str], threshold: float) -> List[RegulationItem]:
+    collapsed = []
+    for members in _cluster([item.text for item in items], threshold):
+        # Highest score wins so the canonical obligation never understates the risk.
+        canonical = min(members, key=lambda i: (-items[i].score, i))
+        duplicates = list(items[canonical].duplicates)
+        for i in members:
+            if i != canonical:
+                duplicates.append(refs[i])
+                duplicates.extend(items[i].duplicates)
+        collapsed.append((canonical, items[canonical].model_copy(update={
+            "control_id": refs[canonical],
+            "duplicates": duplicates,
+        })))
+    collapsed.sort(key=lambda pair: pair[0])
+    return [item for _, item in collapsed]
+
+
+def dedupe_items(items: List[RegulationItem], threshold: Optional[float] = None) -> List[RegulationItem]:
+    """
+    Collapses near-duplicate obligations of one parsed document into canonical items.
+    Collapsed control ids are kept on the canonical item in `duplicates`.
+    """
+    return _collapse(items, [item.control_id for item in items], threshold or DEFAULT_DEDUPE_THRESHOLD)
+
+
+def dedupe_documents(
+    documents: List[Tuple[str, List[RegulationItem]]],
+    threshold: Optional[float] = None,
+) -> List[RegulationItem]:
+    """
+    Collapses obligations repeated across several documents (e.g. an Act and its subsidiary
+    regulations). Control ids are qualified as "<filename>#<control_id>" since numbering restarts per document.
+    """
+    items = []
+    refs = []
+    for name, doc_items in documents:
+        for item in doc_items:
+            items.append(item)
+            refs.append(f"{name}#{item.control_id}")
+    return _collapse(items, refs, threshold or DEFAULT_DEDUPE_THRESHOLD)
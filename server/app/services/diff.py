@@ -0,0 +1,155 @@
+from collections import defaultdict, deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.schemas import ObligationChange, RegulationItem
+from app.services.similarity import LSHIndex, fingerprint, jaccard, minhasher, shingles
+
+DEFAULT_MODIFIED_THRESHOLD = 0.5
+
+
+def diff_items(
+    old_items: List[RegulationItem],
+    new_items: List[RegulationItem],
+    threshold: float = DEFAULT_MODIFIED_THRESHOLD,
+) -> List[ObligationChange]:
+    """
+    Classifies obligations of an amended document against the previous version.
+    Exact matches are found by fingerprint; the rest are paired through MinHash/LSH candidates
+    and verified with the shingle Jaccard similarity, so no all-pairs comparison is needed.
+    """
+    old_by_fp: Dict[str, deque] = defaultdict(deque)
+    for idx, item in enumerate(old_items):
+        old_by_fp[fingerprint(item.text)].append(idx)
+
+    new_to_old: Dict[int, Tuple[int, float, bool]] = {}  # new idx -> (old idx, similarity, same fingerprint)
+    matched_old = set()
+    unmatched_new = []
+    for idx, item in enumerate(new_items):
+        bucket = old_by_fp.get(fingerprint(item.text))
+        if bucket:
+            old_idx = bucket.popleft()
+            new_to_old[idx] = (old_idx, 1.0, True)
+            matched_old.add(old_idx)
+        else:
+            unmatched_new.append(idx)
+
+    # Near-duplicate pass over what is left on both sides.
+    index = LSHIndex(num_perm=minhasher.num_perm)
+    old_shingles = {}
+    for idx, item in enumerate(old_items):
+        if idx in matched_old:
+            continue
+        old_shingles[idx] = shingles(item.text)
+        index.add(idx, minhasher.signature(old_shingles[idx]))
+
+    pairs = []
+    for idx in unmatched_new:
+        new_set = shingles(new_items[idx].text)
+        for old_idx in index.candidates(minhasher.signature(new_set)):
+            sim = jaccard(new_set, old_shingles[old_idx])
+            if sim >= threshold:
+                pairs.append((sim, idx, old_idx))
+
+    # Greedy one-to-one assignment, best similarity first (ties keep document order).
+    pairs.sort(key=lambda p: (-p[0], p[1], p[2]))
+    for sim, idx, old_idx in pairs:
+        if idx in new_to_old or old_idx in matched_old:
+            continue
+        # Different fingerprints, so modified even when the shingle sets (and sim) are identical,
+        # e.g. when a phrase is repeated.
+        new_to_old[idx] = (old_idx, sim, False)
+        matched_old.add(old_idx)
+
+    changes = []
+    for idx, item in enumerate(new_items):
+        match = new_to_old.get(idx)
+        if match is None:
+            changes.append(ObligationChange(
+                status="added",
+                new_control_id=item.control_id,
+                text=item.text,
+                severity=item.severity,
+            ))
+            continue
+        old_idx, sim, same_fingerprint = match
+        old_item = old_items[old_idx]
+        modified = not same_fingerprint
+        changes.append(ObligationChange(
+            status="modified" if modified else "unchanged",
+            old_control_id=old_item.control_id,
+            new_control_id=item.control_id,
+            similarity=round(sim, 4),
+            text=item.text,
+            previous_text=old_item.text if modified else None,
+            severity=item.severity,
+        ))
+
+    for idx, old_item in enumerate(old_items):
+        if idx in matched_old:
+            continue
+        changes.append(ObligationChange(
+            status="removed",
+            old_control_id=old_item.control_id,
+            text=old_item.text,
+            severity=old_item.severity,
+        ))
+    return changes
+
+
+def summarize_changes(changes: List[ObligationChange]) -> Dict[str, int]:
+    summary = {"unchanged": 0, "modified": 0, "added": 0, "removed": 0}
+    for change in changes:
+        summary[change.status] = summary.get(change.status, 0) + 1
+    return summary
+
+
+def carry_over(
+    changes: List[ObligationChange],
+    new_items: List[RegulationItem],
+    severity_map: Optional[Dict[str, str]] = None,
+    tasks_data: Optional[Dict[str, Any]] = None,
+) -> Tuple[Dict[str, str], Optional[Dict[str, Any]]]:
+    """
+    Re-keys analyst triage (severity overrides and the Kanban board) from old control ids to
+    the matched new ones. Obligations that were removed drop out of the board.
+    """
+    old_to_new = {
+        c.old_control_id: c.new_control_id
+        for c in changes
+        if c.old_control_id and c.new_control_id
+    }
+
+    new_severity_map = {}
+    for old_id, sev in (severity_map or {}).items():
+        new_id = old_to_new.get(old_id)
+        if new_id:
+            new_severity_map[new_id] = sev
+    for change in changes:
+        if change.new_control_id and change.new_control_id in new_severity_map:
+            change.severity = new_severity_map[change.new_control_id]
+
+    if not isinstance(tasks_data, dict):
+        return new_severity_map, None
+
+    items_by_id = {item.control_id: item for item in new_items}
+    columns = {}
+    for col, arr in (tasks_data.get("columns") or {}).items():
+        remapped = []
+        for rule in (arr or []):
+            old_id = rule.get("control_id") if isinstance(rule, dict) else getattr(rule, "control_id", None)
+            new_id = old_to_new.get(old_id)
+            if not new_id:
+                continue
+            rdict = items_by_id[new_id].model_dump()
+            if new_id in new_severity_map:
+                rdict["severity"] = new_severity_map[new_id]
+            remapped.append(rdict)
+        columns[col] = remapped
+
+    steps = {}
+    for old_id, step_list in (tasks_data.get("steps") or {}).items():
+        new_id = old_to_new.get(old_id)
+        if new_id:
+            steps[new_id] = step_list
+
+    return new_severity_map, {**tasks_data, "columns": columns, "steps": steps}
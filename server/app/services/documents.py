@@ -0,0 +1,50 @@
+import datetime
+import threading
+import uuid
+from collections import OrderedDict
+from typing import List, Optional
+
+from app.schemas import RegulationItem
+from app.services.query import ItemIndex
+
+# In-memory store of parsed documents so follow-up calls (queries, tasks, exports) reference a
+# document id instead of re-uploading the file. Oldest documents are evicted past the limit.
+MAX_DOCUMENTS = 50
+
+
+class DocumentRecord:
+    def __init__(self, filename: str, items: List[RegulationItem], detection_rules: list = None, source=None):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.items = items
+        self.items_by_id = {item.control_id: item for item in items}
+        self.detection_rules = detection_rules
+        self.source = source  # SourceText the items' spans point into
+        self.created_at = datetime.datetime.now(datetime.timezone.utc)
+        self.index = ItemIndex(items)
+        self.cache = {}  # derived per-document artefacts (token matrices, ...)
+
+
+class DocumentStore:
+    def __init__(self, max_documents: int = MAX_DOCUMENTS):
+        self.max_documents = max_documents
+        self._documents: "OrderedDict[str, DocumentRecord]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, filename: str, items: List[RegulationItem], detection_rules: list = None, source=None) -> DocumentRecord:
+        record = DocumentRecord(filename, items, detection_rules, source)
+        with self._lock:
+            self._documents[record.id] = record
+            while len(self._documents) > self.max_documents:
+                self._documents.popitem(last=False)
+        return record
+
+    def get(self, document_id: str) -> Optional[DocumentRecord]:
+        with self._lock:
+            record = self._documents.get(document_id)
+            if record is not None:
+                self._documents.move_to_end(document_id)
+            return record
+
+
+document_store = DocumentStore()
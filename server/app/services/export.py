@@ -0,0 +1,201 @@
+import csv
+import io
+from typing import Callable, Dict, Iterable, Iterator, List
+
+from app.services.parser import RegulatoryParser, parser
+from app.services.serialization import dumps
+from app.services.tasks import task_store
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except Exception:
+    PYARROW_AVAILABLE = False
+
+# Bulk export of obligations as CSV, NDJSON or Parquet. Rows are produced by a generator over the
+# stored items and encoded in small batches, so a response never holds more than one batch of
+# encoded output (one row group for Parquet) however many obligations are exported. Each row
+# carries the obligation's scores, flags, reasons, the detection rules it matches and its task
+# board status.
+
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+FLAG_NAMES = ("penalty", "mandatory", "breach", "enforcement")
+BATCH_ROWS = 1000  # rows per encoded chunk (CSV/NDJSON)
+ROW_GROUP_ROWS = 20000  # rows per Parquet row group (one batch of rows in memory)
+
+# (name, parquet type); the column order of every format.
+COLUMNS = [
+    ("document_id", "string"),
+    ("filename", "string"),
+    ("control_id", "string"),
+    ("stable_id", "string"),
+    ("section", "string"),
+    ("page", "int32"),
+    ("severity", "string"),
+    ("category", "string"),
+    ("score", "int32"),
+    ("modal_verb", "string"),
+    ("action", "string"),
+    *[(f"flag_{name}", "bool") for name in FLAG_NAMES],
+    ("score_reasons", "list"),
+    ("rule_hits", "list"),
+    ("duplicates", "list"),
+    ("task_status", "string"),
+    ("task_steps", "int32"),
+    ("text", "string"),
+]
+_LIST_COLUMNS = [name for name, kind in COLUMNS if kind == "list"]
+
+
+def export_rows(record, items: Iterable) -> Iterator[dict]:
+    """
+    One row per item of a stored document, lazily.
+    """
+    matcher = parser.compiled_rules(record.detection_rules or RegulatoryParser.DEFAULT_DETECTION_RULES)
+    column_of = task_store.column_of(record.id)
+    step_counts = task_store.step_counts(record.id)
+    for item in items:
+        text = item.text
+        flags = item.score_flags or {}
+        row = {
+            "document_id": record.id,
+            "filename": record.filename,
+            "control_id": item.control_id,
+            "stable_id": item.stable_id,
+            "section": item.section,
+            "page": item.page,
+            "severity": item.severity,
+            "category": item.category,
+            "score": item.score,
+            "modal_verb": item.modal_verb,
+            "action": item.action,
+        }
+        for name in FLAG_NAMES:
+            row[f"flag_{name}"] = bool(flags.get(name))
+        row["score_reasons"] = list(item.score_reasons)
+        row["rule_hits"] = [rule.get("id") or rule.get("keyword") for rule in matcher.match(text)]
+        row["duplicates"] = list(item.duplicates)
+        row["task_status"] = column_of.get(item.control_id)
+        row["task_steps"] = step_counts.get(item.control_id, 0)
+        row["text"] = text
+        yield row
+
+
+def _batches(rows: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def stream_csv(rows: Iterable[dict]) -> Iterator[bytes]:
+    # List columns are joined with "; " so each obligation stays one spreadsheet row.
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in COLUMNS])
+    for batch in _batches(rows, BATCH_ROWS):
+        for row in batch:
+            writer.writerow([
+                "; ".join(map(str, row[name])) if name in _LIST_COLUMNS else ("" if row[name] is None else row[name])
+                for name, _ in COLUMNS
+            ])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    tail = buffer.getvalue()
+    if tail:
+        yield tail.encode("utf-8")
+
+
+def stream_ndjson(rows: Iterable[dict]) -> Iterator[bytes]:
+    for batch in _batches(rows, BATCH_ROWS):
+        yield b"".join(dumps(row) + b"\n" for row in batch)
+
+
+class _ChunkSink(io.RawIOBase):
+    # Write-only file for ParquetWriter; whatever it has written so far is taken with drain().
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _arrow_schema():
+    types = {"string": pa.string(), "int32": pa.int32(), "bool": pa.bool_(), "list": pa.list_(pa.string())}
+    return pa.schema([(name, types[kind]) for name, kind in COLUMNS])
+
+
+def stream_parquet(rows: Iterable[dict], row_group_rows: int = ROW_GROUP_ROWS) -> Iterator[bytes]:
+    """
+    Parquet bytes, one row group per batch of rows; needs pyarrow.
+    """
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+    schema = _arrow_schema()
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for batch in _batches(rows, row_group_rows):
+            columns = {name: [row[name] for row in batch] for name, _ in COLUMNS}
+            writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+STREAMERS: Dict[str, Callable[[Iterable[dict]], Iterator[bytes]]] = {
+    "csv": stream_csv,
+    "ndjson": stream_ndjson,
+    "parquet": stream_parquet,
+}
+
+
+def check_format(export_format: str) -> str:
+    """
+    The normalised format name; raises ValueError for unknown formats and RuntimeError when the
+    format's optional dependency is missing.
+    """
+    name = (export_format or "").lower()
+    if name not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+    if name == "parquet" and not PYARROW_AVAILABLE:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+    return name
+
+
+def stream_export(export_format: str, documents: Iterable[tuple]) -> Iterator[bytes]:
+    """
+    Encoded export of (record, items) pairs, one document after another.
+    """
+    rows = (row for record, items in documents for row in export_rows(record, items))
+    return STREAMERS[export_format](rows)
@@ -0,0 +1,191 @@
+import re
+import time
+from array import array
+from bisect import bisect_right
+from typing import List, Optional, Tuple
+
+from app.services.jobs import JobCancelled, checkpoint
+from app.services.pdf_backends import BACKENDS, backend_selector
+from app.services.sections import SectionIndex
+
+# Text extraction and offset bookkeeping. Extraction records where each PDF page starts in the
+# raw text; SourceText holds the parser's single whitespace-normalised buffer and maps offsets in
+# it back to the raw text and page, so obligations can be stored as spans instead of strings.
+
+_WHITESPACE_RUN = re.compile(r'\s{2,}')
+FORGET_MIN = 1024  # offset marks dropped at once by forget_before(), so trimming stays amortised
+
+
+class ExtractedText:
+    def __init__(self, text: str, page_starts: Optional[List[int]] = None, backend: Optional[str] = None,
+                 page_seconds: Optional[List[float]] = None):
+        self.text = text
+        self.page_starts = page_starts  # raw offset of each page, None for plain text
+        self.backend = backend  # PDF backend that produced the text
+        self.page_seconds = page_seconds  # extraction time of each page
+
+
+def _extract_with(backend_name: str, data: bytes) -> ExtractedText:
+    total_pages, pages = BACKENDS[backend_name].open(data)
+    parts = []
+    page_starts = []
+    page_seconds = []
+    length = 0
+    try:
+        for number in range(total_pages):
+            checkpoint("extract", pages_extracted=number, total_pages=total_pages)
+            page_starts.append(length)
+            started = time.perf_counter()
+            text = next(pages, "")
+            page_seconds.append(time.perf_counter() - started)
+            if text:
+                parts.append(text + "\n")
+                length += len(text) + 1
+    finally:
+        # Release the backend's document now (also when cancelled), not whenever it is collected.
+        close = getattr(pages, "close", None)
+        if close is not None:
+            close()
+    checkpoint("extract", pages_extracted=total_pages, total_pages=total_pages)
+    return ExtractedText("".join(parts), page_starts, backend_name, page_seconds)
+
+
+def extract_pdf(data: bytes, backends: Optional[List[str]] = None) -> ExtractedText:
+    """
+    Extracts with the preferred backend, falling back to the next one when a backend fails or
+    finds no text. Raises the first backend's error only if every backend failed.
+    """
+    first_error = None
+    empty = None
+    for name in backends or backend_selector.order():
+        try:
+            extracted = _extract_with(name, data)
+        except JobCancelled:
+            raise
+        except Exception as e:
+            backend_selector.record(name, [], failed=True)
+            first_error = first_error or e
+            continue
+        if extracted.text.strip():
+            backend_selector.record(name, extracted.page_seconds)
+            return extracted
+        # Scanned or image-only PDFs have no text for any backend; keep trying, then return empty.
+        backend_selector.record(name, extracted.page_seconds, empty=True)
+        empty = empty or extracted
+    if empty is not None:
+        return empty
+    if first_error is not None:
+        raise first_error
+    raise RuntimeError("No PDF extraction backend is installed")
+
+
+def decode_text(data: bytes) -> ExtractedText:
+    try:
+        return ExtractedText(data.decode("utf-8"))
+    except UnicodeDecodeError:
+        # Fallback to older encodings
+        return ExtractedText(data.decode("latin-1"))
+
+
+class SourceText:
+    """
+    The normalised text of one parsed document plus what is needed to map it back:
+    - marks: (normalised offset, raw offset) pairs wherever whitespace collapsing shifted offsets
+    - joints: normalised offsets where list merging put a space between two abutting pieces
+    - page_starts: raw offset of each extracted page
+    - sections: the PART/Division/section tree found while splitting
+    Streaming parses set keep_text=False: the text itself is not kept and forget_before() drops
+    the bookkeeping behind the parse, so memory stays flat however much text is fed.
+    """
+
+    def __init__(self, page_starts: Optional[List[int]] = None, keep_text: bool = True):
+        self.page_starts = page_starts
+        self.keep_text = keep_text
+        self._parts: List[str] = []
+        self._text: Optional[str] = None
+        self.length = 0
+        # Packed arrays: a long document has one mark per collapsed whitespace run.
+        self._norm_marks = array("q", [0])
+        self._raw_marks = array("q", [0])
+        self.joints = array("q")
+        self.sections = SectionIndex()
+
+    @property
+    def text(self) -> str:
+        # Joined on first read; concurrent first reads each join and store the same string.
+        if not self.keep_text:
+            raise RuntimeError("The source text of this parse was not kept")
+        text = self._text
+        if text is None:
+            text = "".join(self._parts)
+            self._parts = [text]
+            self._text = text
+        return text
+
+    def append(self, raw_text: str, raw_offset: int) -> str:
+        """
+        Collapses whitespace in raw_text (which starts at raw_offset in the raw document), appends
+        the result to the buffer and returns it.
+        """
+        base = self.length
+        self._mark(base, raw_offset)
+        removed = 0
+        for match in _WHITESPACE_RUN.finditer(raw_text):
+            removed += len(match.group(0)) - 1
+            self._mark(base + match.end() - removed, raw_offset + match.end())
+        normalised = re.sub(r'\s+', ' ', raw_text)
+        # Pre-clean: replace non-breaking spaces and dashes (length preserving)
+        normalised = normalised.replace('\xa0', ' ')
+        normalised = normalised.replace('\u2014', '-').replace('\u2013', '-')
+        if self.keep_text:
+            self._parts.append(normalised)
+            self._text = None
+        self.length += len(normalised)
+        return normalised
+
+    def forget_before(self, offset: int) -> None:
+        """
+        Drops offset marks and section nodes that only offsets before the given one can need;
+        to_raw(), page_of() and sections.node_at() stay correct for offsets from there on.
+        """
+        i = bisect_right(self._norm_marks, offset) - 1
+        if i >= FORGET_MIN and 2 * i >= len(self._norm_marks):
+            del self._norm_marks[:i]
+            del self._raw_marks[:i]
+        self.sections.forget_before(offset)
+
+    def _mark(self, norm_offset: int, raw_offset: int) -> None:
+        if raw_offset - norm_offset == self._raw_marks[-1] - self._norm_marks[-1]:
+            return
+        if self._norm_marks[-1] == norm_offset:
+            self._raw_marks[-1] = raw_offset
+        else:
+            self._norm_marks.append(norm_offset)
+            self._raw_marks.append(raw_offset)
+
+    def slice(self, start: int, end: int) -> str:
+        text = self.text[start:end]
+        lo = bisect_right(self.joints, start)
+        hi = bisect_right(self.joints, end - 1)
+        if lo == hi:
+            return text
+        pieces = []
+        last = start
+        for joint in self.joints[lo:hi]:
+            pieces.append(self.text[last:joint])
+            last = joint
+        pieces.append(self.text[last:end])
+        return " ".join(pieces)
+
+    def to_raw(self, offset: int) -> int:
+        i = bisect_right(self._norm_marks, offset) - 1
+        return self._raw_marks[i] + offset - self._norm_marks[i]
+
+    def raw_span(self, start: int, end: int) -> Tuple[int, int]:
+        return self.to_raw(start), self.to_raw(end - 1) + 1
+
+    def page_of(self, offset: int) -> Optional[int]:
+        # 1-based page number of a normalised offset; None for documents without pages.
+        if not self.page_starts:
+            return None
+        return max(1, bisect_right(self.page_starts, self.to_raw(offset)))
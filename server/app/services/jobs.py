@@ -0,0 +1,232 @@
+import asyncio
+import contextvars
+import datetime
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Any, Callable, List, Optional
+
+# Long-running work (extracting a 500-page PDF, parsing it, rendering its report) runs as a Job.
+# The work calls checkpoint(phase, **progress) from inside its loops: that raises JobCancelled
+# once the job has been cancelled, and otherwise records progress that is published, throttled,
+# as events to any Server-Sent Events subscribers. The current job travels in a context variable
+# (copied into threadpool calls), so the services only call checkpoint() and need no job argument;
+# outside a job it is a no-op. Cancellation is cooperative: a phase that cannot be interrupted
+# (one page of PDF extraction, a layout already running in a renderer worker) finishes its current
+# step, but the job stops waiting on it and releases its thread at the next checkpoint.
+
+MAX_JOBS = 100
+MAX_EVENTS = 1000  # per job; subscribers further behind than this skip ahead
+PROGRESS_INTERVAL = 0.25  # seconds between progress events within one phase
+ABANDON_AFTER = 15  # seconds an attached job may run with nobody watching before it is cancelled
+FINISHED = ("done", "failed", "cancelled")
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, kind: str, filename: Optional[str] = None, abandon_after: Optional[float] = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind  # "upload", "report" or "request" for a plain request's own work
+        self.filename = filename
+        self.status = "queued"
+        self.phase: Optional[str] = None
+        self.progress: dict = {}  # counters reported so far (pages_extracted, items_found, ...)
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.error_status: Optional[int] = None  # HTTP status matching the error
+        self.document_id: Optional[str] = None
+        self.created_at = datetime.datetime.now(datetime.timezone.utc)
+        self.finished_at: Optional[datetime.datetime] = None
+        self.abandon_after = abandon_after  # None: keep running with nobody watching
+        self._cancel_reason: Optional[str] = None
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._events: deque = deque(maxlen=MAX_EVENTS)
+        self._sequence = 0
+        self._last_progress = 0.0
+        self._listeners: set = set()  # (loop, asyncio.Event) per connected subscriber
+        self._last_seen = time.monotonic()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self, reason: str = "cancelled by client") -> bool:
+        """
+        Asks the work to stop at its next checkpoint. Returns False if the job already finished.
+        """
+        with self._lock:
+            if self.finished:
+                return False
+            if self._cancel_reason is None:
+                self._cancel_reason = reason
+        self._cancelled.set()
+        if self.status == "queued":
+            self._finish("cancelled", error=reason)
+        return True
+
+    def checkpoint(self, phase: str, **progress) -> None:
+        if self._cancelled.is_set():
+            raise JobCancelled(self._cancel_reason)
+        if self.abandon_after is not None and not self._listeners and time.monotonic() - self._last_seen > self.abandon_after:
+            self.cancel("no client is following this job")
+            raise JobCancelled(self._cancel_reason)
+        now = time.monotonic()
+        with self._lock:
+            self.progress.update(progress)
+            if phase == self.phase and now - self._last_progress < PROGRESS_INTERVAL:
+                return
+            self.phase = phase
+            self._last_progress = now
+            self._emit_locked("progress")
+
+    def touch(self) -> None:
+        # Someone looked at the job (status poll); keeps an attached job from being abandoned.
+        self._last_seen = time.monotonic()
+
+    def run(self, work: Callable, *args):
+        """
+        Runs work(*args) as this job in the calling thread and returns its result. Exceptions
+        are recorded on the job (status, error, error_status) and re-raised.
+        """
+        token = _current_job.set(self)
+        try:
+            with self._lock:
+                if self._cancelled.is_set():
+                    raise JobCancelled(self._cancel_reason)
+                self.status = "running"
+                self._emit_locked("running")
+            result = work(*args)
+        except JobCancelled as e:
+            self._finish("cancelled", error=str(e) or "cancelled")
+            raise
+        except Exception as e:
+            detail = getattr(e, "detail", None) or str(e) or type(e).__name__
+            self._finish("failed", error=str(detail), error_status=getattr(e, "status_code", 500))
+            raise
+        finally:
+            _current_job.reset(token)
+        self.result = result
+        self._finish("done")
+        return result
+
+    def _finish(self, status: str, error: Optional[str] = None, error_status: Optional[int] = None) -> None:
+        with self._lock:
+            if self.finished:
+                return
+            self.status = status
+            self.error = error
+            self.error_status = error_status if status == "failed" else None
+            self.finished_at = datetime.datetime.now(datetime.timezone.utc)
+            self._emit_locked(status)
+
+    def snapshot(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "filename": self.filename,
+            "status": self.status,
+            "phase": self.phase,
+            "progress": dict(self.progress),
+            "error": self.error,
+            "document_id": self.document_id,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+    def _emit_locked(self, event: str) -> None:
+        # Caller holds the lock.
+        self._sequence += 1
+        self._events.append((self._sequence, event, self.snapshot()))
+        for loop, wakeup in list(self._listeners):
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:  # subscriber's loop already closed
+                self._listeners.discard((loop, wakeup))
+
+    def events_since(self, sequence: int) -> List[tuple]:
+        """
+        (sequence, event, snapshot) for every event after the given sequence number.
+        """
+        with self._lock:
+            return [entry for entry in self._events if entry[0] > sequence]
+
+    @property
+    def last_sequence(self) -> int:
+        return self._sequence
+
+    def subscribe(self) -> tuple:
+        # Call from the event loop; the returned asyncio.Event is set whenever an event arrives.
+        listener = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._listeners.add(listener)
+        self.touch()
+        return listener
+
+    def unsubscribe(self, listener: tuple) -> None:
+        with self._lock:
+            self._listeners.discard(listener)
+        self.touch()
+
+
+_current_job: contextvars.ContextVar[Optional[Job]] = contextvars.ContextVar("job", default=None)
+
+
+def current_job() -> Optional[Job]:
+    return _current_job.get()
+
+
+def checkpoint(phase: str, **progress) -> None:
+    """
+    Progress and cancellation point for whatever job is running the calling code (no-op outside
+    a job). Raises JobCancelled when the job has been cancelled.
+    """
+    job = _current_job.get()
+    if job is not None:
+        job.checkpoint(phase, **progress)
+
+
+class JobStore:
+    def __init__(self, max_jobs: int = MAX_JOBS):
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._tasks: dict = {}  # job id -> asyncio task running it, so it is not garbage-collected
+        self._lock = threading.Lock()
+
+    def add(self, job: Job) -> Job:
+        with self._lock:
+            self._jobs[job.id] = job
+            # Evict the oldest finished jobs past the limit; running jobs are never dropped.
+            for job_id in [jid for jid, j in self._jobs.items() if j.finished][: max(0, len(self._jobs) - self.max_jobs)]:
+                del self._jobs[job_id]
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def start(self, job: Job, runner) -> None:
+        """
+        Schedules the coroutine runner (which runs the job) on the current event loop.
+        """
+        # In a fresh context: the job outlives the request that started it, so it must not inherit
+        # that request's context (e.g. its memory accounting).
+        task = contextvars.Context().run(asyncio.get_running_loop().create_task, runner)
+        with self._lock:
+            self._tasks[job.id] = task
+        task.add_done_callback(lambda _: self._forget_task(job.id))
+
+    def _forget_task(self, job_id: str) -> None:
+        with self._lock:
+            self._tasks.pop(job_id, None)
+
+
+job_store = JobStore()
@@ -0,0 +1,287 @@
+import contextvars
+import datetime
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except Exception:  # not on Windows
+    RESOURCE_AVAILABLE = False
+
+# Optional per-request memory accounting. With REGGUARD_MEMORY_TRACKING=1, tracemalloc traces
+# Python allocations and each request records, per stage (read, extract, parse, serialise,
+# aggregate, html, render), how much it allocated and retained, plus how much the request moved
+# the process RSS and peak RSS. Requests that peak above REGGUARD_MEMORY_LOG_MB are logged.
+# tracemalloc is process-wide: while requests overlap, a stage's peak also includes what the
+# other requests allocated at the same time. Work done in other processes (renderer pool,
+# sharded parsing) is not traced; only its results arriving in this process are.
+
+logger = logging.getLogger(__name__)
+
+TRACKING_ENV = "REGGUARD_MEMORY_TRACKING"
+THRESHOLD_ENV = "REGGUARD_MEMORY_LOG_MB"
+DEFAULT_LOG_THRESHOLD_MB = 200
+TRACEBACK_FRAMES = 10  # frames kept per allocation, for grouping top sites by traceback
+RECENT_REQUESTS = 200
+MB = 1 << 20
+
+
+def tracking_requested() -> bool:
+    return os.environ.get(TRACKING_ENV, "").strip().lower() not in ("", "0", "false", "no", "off")
+
+
+def _log_threshold_mb() -> float:
+    try:
+        return float(os.environ.get(THRESHOLD_ENV, DEFAULT_LOG_THRESHOLD_MB))
+    except ValueError:
+        return DEFAULT_LOG_THRESHOLD_MB
+
+
+def current_rss() -> Optional[int]:
+    # Resident set size in bytes (Linux /proc); None where unavailable.
+    try:
+        with open("/proc/self/statm", "r") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_rss() -> Optional[int]:
+    if not RESOURCE_AVAILABLE:
+        return None
+    # ru_maxrss is in kilobytes on Linux (bytes on macOS).
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage if sys.platform == "darwin" else usage * 1024
+
+
+class _Stage:
+    __slots__ = ("name", "start", "peak")
+
+    def __init__(self, name: str, start: int):
+        self.name = name
+        self.start = start  # traced bytes when the stage began
+        self.peak = start  # highest traced bytes seen while it ran
+
+
+class RequestMemory:
+    """
+    Accounting for one request: finished stages in order, plus the request's own totals.
+    """
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.stages: List[dict] = []
+        self.started = time.perf_counter()
+        self.rss_start = current_rss()
+        self.peak_rss_start = peak_rss()
+
+
+_current_request: contextvars.ContextVar[Optional[RequestMemory]] = contextvars.ContextVar("request_memory", default=None)
+
+
+class MemoryTracker:
+    def __init__(self, log_threshold_mb: float = DEFAULT_LOG_THRESHOLD_MB, recent: int = RECENT_REQUESTS):
+        self.log_threshold = log_threshold_mb * MB
+        self.enabled = False
+        self._active: set = set()  # stages running in any thread
+        self._lock = threading.Lock()
+        self._recent: deque = deque(maxlen=recent)
+        self._routes: Dict[str, dict] = {}
+
+    def start(self) -> None:
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(TRACEBACK_FRAMES)
+            self.enabled = True
+
+    def stop(self) -> None:
+        with self._lock:
+            self.enabled = False
+            self._active.clear()
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+
+    def _fold_peak(self) -> None:
+        # Credit the peak so far to every running stage before it is reset. Caller holds the lock.
+        peak = tracemalloc.get_traced_memory()[1]
+        for stage in self._active:
+            if peak > stage.peak:
+                stage.peak = peak
+
+    def _enter(self, name: str) -> _Stage:
+        with self._lock:
+            self._fold_peak()
+            current = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            stage = _Stage(name, current)
+            self._active.add(stage)
+            return stage
+
+    def _exit(self, stage: _Stage) -> dict:
+        with self._lock:
+            self._fold_peak()
+            self._active.discard(stage)
+            current = tracemalloc.get_traced_memory()[0]
+        return {
+            "stage": stage.name,
+            "peak_bytes": stage.peak - stage.start,  # transient high-water mark above the start
+            "retained_bytes": current - stage.start,  # still allocated when the stage ended
+        }
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Records one processing stage of the current request. A no-op unless tracking is on and
+        the code runs inside a tracked request.
+        """
+        request = _current_request.get()
+        if not self.enabled or request is None:
+            yield
+            return
+        stage = self._enter(name)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            result = self._exit(stage)
+            result["seconds"] = time.perf_counter() - started
+            request.stages.append(result)
+
+    @contextmanager
+    def request(self, method: str, path: str):
+        """
+        Tracks one request. Yields a dict for the caller to fill in "status" and "route" (the
+        path template, so per-route aggregates do not split by document id).
+        """
+        request = RequestMemory(method, path)
+        token = _current_request.set(request)
+        stage = self._enter("request")
+        response = {"status": None, "route": None}
+        try:
+            yield response
+        finally:
+            _current_request.reset(token)
+            totals = self._exit(stage)
+            self._record(request, response["route"] or "(unmatched)", response["status"], totals)
+
+    def _record(self, request: RequestMemory, route: str, status_code: Optional[int], totals: dict) -> None:
+        rss_end, peak_rss_end = current_rss(), peak_rss()
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "status": status_code,
+            "finished_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "seconds": time.perf_counter() - request.started,
+            "peak_bytes": totals["peak_bytes"],
+            "retained_bytes": totals["retained_bytes"],
+            "rss_delta_bytes": None if rss_end is None or request.rss_start is None else rss_end - request.rss_start,
+            # How far this request pushed the process's lifetime peak RSS (0 if it stayed below).
+            "peak_rss_growth_bytes": None if peak_rss_end is None or request.peak_rss_start is None else peak_rss_end - request.peak_rss_start,
+            "stages": request.stages,
+        }
+        key = f"{request.method} {route}"
+        with self._lock:
+            self._recent.append(record)
+            stats = self._routes.setdefault(key, {"requests": 0, "max_peak_bytes": 0, "total_peak_bytes": 0, "max_peak_rss_growth_bytes": 0})
+            stats["requests"] += 1
+            stats["max_peak_bytes"] = max(stats["max_peak_bytes"], record["peak_bytes"])
+            stats["total_peak_bytes"] += record["peak_bytes"]
+            stats["max_peak_rss_growth_bytes"] = max(stats["max_peak_rss_growth_bytes"], record["peak_rss_growth_bytes"] or 0)
+        if record["peak_bytes"] >= self.log_threshold:
+            logger.warning(
+                "%s %s peaked at %.1f MB traced (%s)",
+                request.method,
+                request.path,
+                record["peak_bytes"] / MB,
+                ", ".join(f"{s['stage']} {s['peak_bytes'] / MB:.1f} MB" for s in request.stages) or "no stages",
+            )
+
+    def metrics(self, recent: int = 20) -> dict:
+        traced, traced_peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        with self._lock:
+            routes = {
+                key: {**stats, "mean_peak_bytes": stats["total_peak_bytes"] // max(1, stats["requests"])}
+                for key, stats in self._routes.items()
+            }
+            recent_records = list(self._recent)[-recent:] if recent > 0 else []
+        return {
+            "enabled": self.enabled,
+            "log_threshold_bytes": int(self.log_threshold),
+            "traced_bytes": traced,
+            "traced_peak_bytes": traced_peak,
+            "tracemalloc_overhead_bytes": tracemalloc.get_tracemalloc_memory() if tracemalloc.is_tracing() else 0,
+            "rss_bytes": current_rss(),
+            "peak_rss_bytes": peak_rss(),
+            "routes": routes,
+            "recent": recent_records,
+        }
+
+    def top_allocations(self, limit: int = 25, group_by: str = "lineno") -> List[dict]:
+        """
+        Largest live allocation sites right now, grouped by "lineno", "filename" or "traceback".
+        """
+        if not self.enabled:
+            raise RuntimeError(f"Memory tracking is off; start the server with {TRACKING_ENV}=1")
+        if group_by not in ("lineno", "filename", "traceback"):
+            raise ValueError("group_by must be 'lineno', 'filename' or 'traceback'")
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        return [
+            {
+                "size_bytes": stat.size,
+                "count": stat.count,
+                "trace": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+            }
+            for stat in snapshot.statistics(group_by)[:limit]
+        ]
+
+
+class MemoryMiddleware:
+    """
+    ASGI middleware that wraps every HTTP request in memory_tracker.request() while tracking is
+    on, so the stages recorded by the endpoints and services are attributed to it.
+    """
+
+    def __init__(self, app, tracker: "MemoryTracker" = None):
+        self.app = app
+        self.tracker = tracker or memory_tracker
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.tracker.enabled:
+            await self.app(scope, receive, send)
+            return
+        with self.tracker.request(scope["method"], scope["path"]) as response:
+            async def send_with_status(message):
+                if message["type"] == "http.response.start":
+                    response["status"] = message["status"]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                response["route"] = _route_template(scope)
+
+
+def _route_template(scope) -> Optional[str]:
+    # The matched route's path is relative to its router; put the request's prefix back on.
+    template = getattr(scope.get("route"), "path", None)
+    if not template:
+        return None
+    depth = template.count("/")
+    path = scope["path"]
+    prefix = path.rsplit("/", depth)[0] if path.count("/") >= depth else ""
+    return prefix + template
+
+
+memory_tracker = MemoryTracker(_log_threshold_mb())
@@ -0,0 +1,224 @@
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.schemas import RegulationItem
+from app.services.extraction import SourceText
+from app.services.jobs import JobCancelled, checkpoint
+from app.services.parser import parser as default_parser
+from app.services.serialization import decode_flags, encode_flags
+
+# Sharded parsing for large documents. Normalisation, marker splitting and list merging stay in
+# the parent (they are sequential and cheap); the merged major chunks are then independent apart
+# from control-id numbering, so contiguous shards of chunks are filtered, matched and scored in
+# worker processes. Chunks already in the parser's chunk cache are not sent at all. Workers send
+# back compact rows (offsets, interned reasons, flag bitmasks) instead of pickled models, and the
+# parent numbers items in document order, so the output is identical to a serial parse.
+#
+# On free-threaded CPython (3.13t/3.14t, GIL disabled) shards run in a thread pool instead: the
+# threads share the parser's compiled rules and chunk cache, nothing is pickled, and a smaller
+# document is already worth splitting. The parser keeps no per-parse state outside ParseSession.
+# With the GIL, threads cannot run the pure-Python matching in parallel, so processes stay the
+# default there; REGGUARD_PARSE_EXECUTOR=thread|process overrides the choice.
+
+PARALLEL_MIN_CHARS = 1_000_000  # below this, process start-up and transfer cost more than they save
+THREAD_PARALLEL_MIN_CHARS = 200_000  # threads only pay for scheduling the shards
+SHARDS_PER_WORKER = 4  # several shards per worker to even out uneven chunk densities
+CANCEL_POLL = 0.2  # seconds between cancellation checks while waiting on a shard
+EXECUTOR_ENV = "REGGUARD_PARSE_EXECUTOR"
+EXECUTOR_KINDS = ("thread", "process")
+
+_executors: Dict[str, Tuple[Executor, int]] = {}  # kind -> (executor, workers)
+_executor_lock = threading.Lock()
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+def gil_enabled() -> bool:
+    is_enabled = getattr(sys, "_is_gil_enabled", None)
+    return True if is_enabled is None else is_enabled()
+
+
+def executor_kind(kind: Optional[str] = None) -> str:
+    """
+    "thread" or "process": the given kind, else REGGUARD_PARSE_EXECUTOR, else ("auto") threads
+    when the GIL is disabled.
+    """
+    for choice in (kind, os.environ.get(EXECUTOR_ENV)):
+        choice = (choice or "").strip().lower()
+        if choice in EXECUTOR_KINDS:
+            return choice
+    return "process" if gil_enabled() else "thread"
+
+
+def _mp_context():
+    # The pool is started lazily from a request thread; forking a threaded server process is
+    # unsafe, so workers start from a clean interpreter (as the renderer pool's do).
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _get_executor(workers: int, kind: str = "process") -> Executor:
+    with _executor_lock:
+        executor, executor_workers = _executors.get(kind, (None, 0))
+        if executor is None or executor_workers != workers:
+            if executor is not None:
+                executor.shutdown(wait=False)
+            if kind == "thread":
+                executor = ThreadPoolExecutor(max_workers=workers)
+            else:
+                executor = ProcessPoolExecutor(max_workers=workers, mp_context=_mp_context())
+            _executors[kind] = (executor, workers)
+        return executor
+
+
+def _reset_executor(kind: str = "process") -> None:
+    with _executor_lock:
+        executor, _ = _executors.pop(kind, (None, 0))
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+def _shard_rows(chunk_texts: List[str], detection_rules: Optional[list], rules_only: bool) -> List[List[tuple]]:
+    """
+    Thread worker entry point: the parser's chunk rows for every chunk of a shard.
+    """
+    rules = detection_rules or default_parser.detection_rules
+    matcher = default_parser.compiled_rules(rules)  # once per rule set, shared by all threads
+    return [default_parser.chunk_rows(text, rules, rules_only, matcher) for text in chunk_texts]
+
+
+def _parse_shard(chunk_texts: List[str], detection_rules: Optional[list], rules_only: bool) -> Tuple[List[str], List[list]]:
+    """
+    Process worker entry point. Returns (reason table, rows per chunk); rows are the parser's
+    chunk rows with flags as a bitmask and reasons as indexes into the table.
+    """
+    reason_ids = {}
+    results = []
+    for chunk_rows in _shard_rows(chunk_texts, detection_rules, rules_only):
+        rows = []
+        for offset, length, digest, modal_verb, severity, score, category, flags, reasons, action in chunk_rows:
+            rows.append((
+                offset, length, digest, modal_verb, severity, score, category,
+                encode_flags(flags),
+                tuple(reason_ids.setdefault(reason, len(reason_ids)) for reason in reasons),
+                action,
+            ))
+        results.append(rows)
+    return list(reason_ids), results
+
+
+def _decode_rows_per_chunk(reasons: List[str], shard_rows: List[list]) -> List[List[tuple]]:
+    # Back to the parser's row layout, reasons interned so cached rows share the strings.
+    reasons = [sys.intern(reason) for reason in reasons]
+    return [
+        [
+            (offset, length, digest, modal_verb, severity, score, category, decode_flags(flag_bits), tuple(reasons[i] for i in reason_ids), action)
+            for offset, length, digest, modal_verb, severity, score, category, flag_bits, reason_ids, action in rows
+        ]
+        for rows in shard_rows
+    ]
+
+
+def _shard(texts: List[str], count: int) -> List[List[int]]:
+    # Contiguous shards (of chunk indexes) of roughly equal text volume.
+    total = sum(len(text) for text in texts)
+    target = max(1, total // max(1, count))
+    shards, current, size = [], [], 0
+    for index, text in enumerate(texts):
+        current.append(index)
+        size += len(text)
+        if size >= target:
+            shards.append(current)
+            current, size = [], 0
+    if current:
+        shards.append(current)
+    return shards
+
+
+def parse_document(
+    text: str,
+    detection_rules: list = None,
+    page_starts: List[int] = None,
+    workers: Optional[int] = None,
+    rules_only: Optional[bool] = None,
+    executor: Optional[str] = None,
+    keep_source: bool = True,
+) -> Tuple[List[RegulationItem], SourceText]:
+    """
+    Parses a whole document, sharding uncached chunks across a thread or process pool (see
+    executor_kind) when there is enough new text and more than one worker. Returns
+    (items, source); items equal parser.parse() output. Without keep_source the items hold their
+    own text and source only maps offsets (see ParseSession).
+    """
+    workers = default_workers() if workers is None else max(1, workers)
+    kind = executor_kind(executor)
+    min_chars = THREAD_PARALLEL_MIN_CHARS if kind == "thread" else PARALLEL_MIN_CHARS
+    session = default_parser.session(detection_rules, page_starts=page_starts, rules_only=rules_only, keep_source=keep_source)
+    if workers == 1 or len(text or "") < min_chars:
+        # Fed in slices, so a running job can be cancelled while a long text is normalised.
+        text = text or ""
+        items = []
+        for start in range(0, len(text), session.APPEND_SLICE):
+            checkpoint("split", characters_read=start, input_characters=len(text))
+            items.extend(session.feed(text[start:start + session.APPEND_SLICE]))
+        items.extend(session.close())
+        return items, session.source
+
+    chunks = session.merged_chunks(text)
+    rows_by_chunk = [session.cached_rows(chunk) for chunk in chunks]
+    missing = [index for index, rows in enumerate(rows_by_chunk) if rows is None]
+    missing_texts = [chunks[index].text for index in missing]
+
+    if sum(len(t) for t in missing_texts) < min_chars:
+        # Mostly cached (e.g. an amended re-upload): the few new chunks are quicker in-process.
+        for index in missing:
+            rows_by_chunk[index] = session.chunk_rows(chunks[index])
+    else:
+        shards = [[missing_texts[i] for i in shard] for shard in _shard(missing_texts, workers * SHARDS_PER_WORKER)]
+        if kind == "thread":
+            results = _collect_shards(_get_executor(workers, "thread"), _shard_rows, shards, detection_rules, session.custom_rules_supplied)
+            decoded = (rows for shard_rows in results for rows in shard_rows)
+        else:
+            try:
+                results = _collect_shards(_get_executor(workers), _parse_shard, shards, detection_rules, session.custom_rules_supplied)
+            except (BrokenProcessPool, OSError, NotImplementedError):
+                # No usable process pool here (restricted sandbox, killed worker): parse in-process.
+                _reset_executor()
+                results = []
+                for shard in shards:
+                    checkpoint("parse", shards_parsed=len(results), total_shards=len(shards))
+                    results.append(_parse_shard(shard, detection_rules, session.custom_rules_supplied))
+            decoded = (rows for reasons, shard_rows in results for rows in _decode_rows_per_chunk(reasons, shard_rows))
+        for index, rows in zip(missing, decoded):
+            rows_by_chunk[index] = rows
+            session.store_rows(chunks[index], rows)
+
+    items: List[RegulationItem] = []
+    for chunk, rows in zip(chunks, rows_by_chunk):
+        session.report_progress(chunk)
+        items.extend(session.items_from_rows(chunk, rows))
+    return items, session.source
+
+
+def _collect_shards(executor: Executor, work: Callable, shards: List[List[str]], detection_rules: Optional[list], rules_only: bool) -> list:
+    # Shard results in order, checking for cancellation while waiting. On cancel, shards not yet
+    # started are dropped from the pool's queue; running ones finish but are discarded.
+    futures = [executor.submit(work, shard, detection_rules, rules_only) for shard in shards]
+    results = []
+    try:
+        for future in futures:
+            while not wait([future], timeout=CANCEL_POLL).done:
+                checkpoint("parse", shards_parsed=len(results), total_shards=len(shards))
+            results.append(future.result())
+    except JobCancelled:
+        for future in futures:
+            future.cancel()
+        raise
+    return results
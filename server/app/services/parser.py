@@ -1,6 +1,28 @@
+import hashlib
+import json
 import re
-from typing import List
+import sys
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Dict, List, Optional
 from app.schemas import RegulationItem
+from app.services.chunk_cache import ChunkCache, chunk_digest
+from app.services.extraction import SourceText
+from app.services.jobs import checkpoint
+from app.services.rule_matcher import CompiledRules
+
+MAX_COMPILED_RULE_SETS = 64
+
+
+def rules_fingerprint(detection_rules: list, custom_rules_supplied: bool) -> str:
+    payload = json.dumps([detection_rules, custom_rules_supplied], sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def sentence_digest(sentence: str) -> str:
+    # Content-derived part of an item's stable_id.
+    return hashlib.blake2b(sentence.encode("utf-8"), digest_size=6).hexdigest()
 
 class RegulatoryParser:
     DEFAULT_DETECTION_RULES = [
@@ -15,12 +37,24 @@ class RegulatoryParser:
     def __init__(self, detection_rules=None):
         # Detection rules power the "Custom Detection Rules" concept shown in the mock:
         # defaults are pre-loaded, but callers can supply a new list to adapt to GDPR/HIPAA/ISO/custom frameworks.
-        self.detection_rules = detection_rules or [rule.copy() for rule in self.DEFAULT_DETECTION_RULES]
+        # A tuple: every parse session in every thread reads it, so it is never modified in place.
+        self.detection_rules = tuple(detection_rules or [rule.copy() for rule in self.DEFAULT_DETECTION_RULES])
+        # Scored rows per merged chunk, keyed by chunk text and rule set (see ParseSession).
+        self.chunk_cache = ChunkCache()
+        # Compiled matchers per rule-set fingerprint, shared by every request using that rule set.
+        self._compiled: "OrderedDict[str, CompiledRules]" = OrderedDict()
+        self._pinned: Dict[str, CompiledRules] = {}
+        self._pin_counts: Dict[str, int] = {}  # a rule set can be pinned by several packs
+        self._compiled_lock = threading.Lock()
 
         # Regex patterns for modal verbs
         self.high_risk_pattern = re.compile(r'\b(must|shall|required|prohibited|strictly)\b', re.IGNORECASE)
         self.medium_risk_pattern = re.compile(r'\b(should|ensure|monitor|verify)\b', re.IGNORECASE)
         self.low_risk_pattern = re.compile(r'\b(may|can|optional|recommend)\b', re.IGNORECASE)
+        # Expanded actor/modal pattern for cross-framework applicability (GDPR/HIPAA/ISO/custom)
+        actors = r'(organisation|organization|commission|individual|person|applicant|data intermediary|controller|processor|entity|provider|service|company|team|customer)'
+        modals = r'(shall|must|is required to|may|should|required|prohibited)'
+        self.actor_modal_pattern = re.compile(fr'(?i)\b{actors}\b.*\b{modals}\b')
         self.penalty_keywords = ["liable", "fine", "imprisonment", "penalty", "prosecution"]
         self.breach_keywords = [
             "breach",
@@ -69,6 +103,56 @@ class RegulatoryParser:
                 return False
         return True
 
+    def compiled_rules(self, detection_rules: list = None, fingerprint: str = None, pin: bool = False) -> CompiledRules:
+        """
+        The compiled matcher for a rule set (the parser's own rules when None), built once per
+        distinct rule set. fingerprint, when the caller already has one, skips hashing the rules.
+        pin=True keeps the matcher from being evicted until a matching unpin() (the latest version
+        of each rule pack).
+        """
+        rules = detection_rules or self.detection_rules
+        key = fingerprint or rules_fingerprint(rules, False)
+        with self._compiled_lock:
+            compiled = self._pinned.get(key) or self._compiled.get(key)
+            if compiled is not None:
+                if key in self._compiled:
+                    self._compiled.move_to_end(key)
+                if pin:
+                    self._pin_locked(key, compiled)
+                return compiled
+        compiled = CompiledRules(rules)
+        with self._compiled_lock:
+            # Another thread may have compiled the same rules meanwhile; keep a single instance.
+            compiled = self._pinned.get(key) or self._compiled.get(key) or compiled
+            if pin:
+                self._pin_locked(key, compiled)
+            elif key not in self._pinned:
+                self._cache_locked(key, compiled)
+        return compiled
+
+    def unpin(self, fingerprint: str) -> None:
+        # Releases one pin; the last one hands the matcher back to the LRU.
+        with self._compiled_lock:
+            count = self._pin_counts.get(fingerprint, 0) - 1
+            if count > 0:
+                self._pin_counts[fingerprint] = count
+                return
+            self._pin_counts.pop(fingerprint, None)
+            compiled = self._pinned.pop(fingerprint, None)
+            if compiled is not None:
+                self._cache_locked(fingerprint, compiled)
+
+    def _pin_locked(self, key: str, compiled: CompiledRules) -> None:
+        self._compiled.pop(key, None)
+        self._pinned[key] = compiled
+        self._pin_counts[key] = self._pin_counts.get(key, 0) + 1
+
+    def _cache_locked(self, key: str, compiled: CompiledRules) -> None:
+        self._compiled[key] = compiled
+        self._compiled.move_to_end(key)
+        while len(self._compiled) > MAX_COMPILED_RULE_SETS:
+            self._compiled.popitem(last=False)
+
     @staticmethod
     def severity_rank(severity: str) -> int:
         order = {"Critical": 0, "High": 1, "Medium": 2, "Low": 3, "Unknown": 4}
@@ -117,11 +201,24 @@ class RegulatoryParser:
 
         return matches
 
-    def classify_score(self, text: str, severity: str = "Unknown", matched_rules: list = None) -> (int, str, dict, list):
+    def score_signals(self, text: str) -> dict:
         """
-        Return (score, category, flags, reasons) based on keyword presence.
+        Returns the keyword flags used by classify_score; independent of severity and rules.
         """
         lower = text.lower()
+        return {
+            "penalty": any(kw in lower for kw in self.penalty_keywords),
+            "mandatory": bool(re.search(r'\b(shall|must)\b', lower)),
+            "breach": any(kw in lower for kw in self.breach_keywords),
+            "enforcement": any(case in lower for case in self.enforcement_cases),
+        }
+
+    def classify_score(self, text: str, severity: str = "Unknown", matched_rules: list = None, signals: dict = None) -> (int, str, dict, list):
+        """
+        Return (score, category, flags, reasons) based on keyword presence.
+        Pass precomputed score_signals() to avoid rescanning text scored several times.
+        """
+        signals = signals or self.score_signals(text)
         matched_rules = matched_rules or []
         severity = severity.title()
 
@@ -136,10 +233,10 @@ class RegulatoryParser:
         score = base_by_severity.get(severity, 15)
         reasons = [f"+base severity ({severity})"]
 
-        penalty_hit = any(kw in lower for kw in self.penalty_keywords)
-        mandatory_hit = bool(re.search(r'\b(shall|must)\b', lower))
-        breach_hit = any(kw in lower for kw in self.breach_keywords)
-        enforcement_hit = any(case in lower for case in self.enforcement_cases)
+        penalty_hit = signals["penalty"]
+        mandatory_hit = signals["mandatory"]
+        breach_hit = signals["breach"]
+        enforcement_hit = signals["enforcement"]
 
         if matched_rules:
             # Surface which detection rules triggered the item.
@@ -182,11 +279,13 @@ class RegulatoryParser:
             return "MEDIUM"
         return "LOW"
 
-    def determine_severity(self, text: str, detection_rules=None, rules_only: bool = False) -> (str, str, list):
+    def determine_severity(self, text: str, detection_rules=None, rules_only: bool = False, matched_rules: list = None) -> (str, str, list):
         """
         Returns (Severity, Detected Modal Verb, matched_rules)
+        matched_rules can be passed when the caller already ran match_detection_rules.
         """
-        matched_rules = self.match_detection_rules(text, detection_rules)
+        if matched_rules is None:
+            matched_rules = self.match_detection_rules(text, detection_rules)
         if matched_rules:
             # Pick the highest severity rule; sorted by defined rank.
             matched_rules = sorted(
@@ -221,154 +320,466 @@ class RegulatoryParser:
         ]
         return any(sig in lower for sig in signals)
 
-    def parse(self, text: str, detection_rules: list = None) -> List[RegulationItem]:
-        items = []
-        custom_rules_supplied = detection_rules is not None
-        detection_rules = detection_rules or self.detection_rules
-        
-        # 1. Cleaning: Remove common PDF artifacts (page numbers, headers repetition if predictable)
-        # This is hard to do perfectly generically, but we can normalize whitespace.
-        text = re.sub(r'\s+', ' ', text).strip()
+    def parse(self, text: str, detection_rules: list = None, page_starts: List[int] = None, rules_only: Optional[bool] = None) -> List[RegulationItem]:
+        # One-shot parse is a single-feed session, so chunked and whole-text parsing share one code path.
+        session = self.session(detection_rules, page_starts=page_starts, rules_only=rules_only)
+        items = session.feed(text)
+        items.extend(session.close())
+        return items
 
-        # 2. Splitting Strategy:
-        # First, split by major legal markers to respect document structure.
-        # This prevents a rule from one section merging with the header of the next.
+    def session(self, detection_rules: list = None, page_starts: List[int] = None, rules_only: Optional[bool] = None,
+                keep_source: bool = False) -> "ParseSession":
+        """
+        Returns a resumable parsing session: feed(chunk) any number of times, then close().
+        page_starts (raw offsets of extracted pages) lets items report the page they start on.
+        rules_only turns the heuristic fallbacks off (True) or on (False); by default they are
+        off exactly when detection_rules are given. keep_source keeps the normalised text, so
+        items are spans into session.source (stored documents); otherwise each item holds its own
+        text and memory stays flat while streaming.
+        """
+        return ParseSession(self, detection_rules, page_starts=page_starts, rules_only=rules_only, keep_source=keep_source)
+
+    def chunk_rows(self, chunk_text: str, detection_rules: list, custom_rules_supplied: bool, matcher: CompiledRules = None) -> List[tuple]:
+        """
+        Extracts obligations from one merged major chunk as rows of
+        (offset, length, digest, modal_verb, severity, score, category, flags, reasons, action),
+        offsets relative to the chunk. Rows depend only on the chunk text and the rules, so they
+        can be memoized or computed in another process; ParseSession turns them into items.
+        matcher is the rules' compiled matcher (looked up when not given).
+        """
+        match = (matcher or self.compiled_rules(detection_rules)).match
+        rows = []
+        for clean_sentence, offset in self._candidate_sentences(self._chunk_sentences(chunk_text)):
+            # --- FILTER 3: OBLIGATION DETECTION (rules + generic signals) ---
+            matches = match(clean_sentence)
+
+            if not self.is_obligation(clean_sentence, matches, custom_rules_supplied):
+                continue
+
+            # If we get here, it's a valid rule.
+            modal_found, severity, score, category, flags, reasons, action = self.score_sentence(
+                clean_sentence, detection_rules, custom_rules_supplied, matches
+            )
+            rows.append((
+                offset,
+                len(clean_sentence),
+                sentence_digest(clean_sentence),
+                modal_found,
+                severity,
+                score,
+                category,
+                flags,
+                tuple(sys.intern(reason) for reason in reasons),
+                action,
+            ))
+        return rows
+
+    def segment(self, text: str) -> List[str]:
+        """
+        Returns the candidate sentences of a document (structural filters applied, no rule matching),
+        in the order parse() would consider them. Lets callers score several rule sets on one segmentation.
+        """
+        session = self.session()
+        sentences = []
+        for chunk in session.split_chunks(text):
+            sentences.extend(sentence for sentence, _ in self._candidate_sentences(self._chunk_sentences(chunk)))
+        return sentences
+
+    def _chunk_sentences(self, chunk: str) -> List[tuple]:
+        """
+        Returns (sentence, offset) pairs; offsets are into the normalised chunk, which for merged
+        chunks is the chunk itself.
+        """
+        # Inside each major chunk (e.g. "13. Consent..."), we likely have multiple sentences.
+        # We must split them to filter out headers/definitions effectively.
         
-        split_pattern = r'(?=(\bPART\s+[IVX]+|\bDivision\s+\d+|\b\d+\.\s+[A-Z]|\(\d+\)))'
+        # Normalize whitespace within the chunk (replace newlines with spaces)
+        # This makes sentence splitting by punctuation easier.
+        chunk_normalized = re.sub(r'\s+', ' ', chunk).strip()
         
-        # Note: We do NOT normalize whitespace globally yet, to preserve newlines for initial structure if needed.
-        # But for robustness against formatting artifacts, we'll split by pattern first.
+        if not chunk_normalized:
+            return []
         
-        # Pre-clean: replace non-breaking spaces
-        text = text.replace('\xa0', ' ')
-        text = text.replace('\u2014', '-').replace('\u2013', '-')
+        # If a lead-in with list items exists (e.g., "shall be — (a)... (b)..."),
+        # keep the whole block together so list items stay with the actor/modal.
+        has_list_items = len(re.findall(r'\([a-z]\)', chunk_normalized, re.IGNORECASE)) >= 2
+        has_leadin = bool(re.search(r'—|:|-', chunk_normalized))
+        if has_list_items and has_leadin:
+            return [(chunk_normalized, 0)]
+        # Split by sentence endings (. ! ?)
+        # Lookbehind (?<=[.!?]) ensures we keep the punctuation.
+        sentences = []
+        last = 0
+        for match in re.finditer(r'(?<=[.!?])\s+', chunk_normalized):
+            sentences.append((chunk_normalized[last:match.start()], last))
+            last = match.end()
+        sentences.append((chunk_normalized[last:], last))
+        return sentences
+
+    def _candidate_sentences(self, sentences: List[tuple]):
+        """
+        Yields (sentence, offset) pairs that survive the structural filters (headers, short titles, definitions).
+        """
+        for sentence, offset in sentences:
+            clean_sentence = sentence.strip()
+            if not clean_sentence:
+                continue
+            
+            # --- FILTER 1: IGNORE HEADERS & STRUCTURAL TEXT ---
         
-        major_chunks = re.split(split_pattern, text)
-        merged_chunks = []
-        list_item_pattern = re.compile(r'^\([a-z]{1,2}\)\b', re.IGNORECASE)
-        roman_item_pattern = re.compile(r'^\([ivx]+\)\b', re.IGNORECASE)
-        numeric_item_pattern = re.compile(r'^\(\d+\)\b')
-        lead_in_pattern = re.compile(r'[:—–-]\s*$')
-        lead_in_index = None
-
-        for chunk in major_chunks:
-            if not chunk or not chunk.strip():
+            # Check for PART/Division/Schedule at start
+            if re.match(r'^(PART|Division|SECTION|Schedule)\b', clean_sentence, re.IGNORECASE):
                 continue
-            chunk_clean = chunk.strip()
-
-            is_list_item = list_item_pattern.match(chunk_clean) or roman_item_pattern.match(chunk_clean)
-            if is_list_item and lead_in_index is not None:
-                merged_chunks[lead_in_index] = f"{merged_chunks[lead_in_index].rstrip()} {chunk_clean}"
+            
+            # Check for fully uppercase (allow some symbols)
+            if any(c.isalpha() for c in clean_sentence) and clean_sentence.isupper():
+                continue
+            
+            # Check for short lines (titles/headers often < 5 words)
+            # But be careful not to kill short valid rules? 
+            # Valid rules with Actor+Modal are usually longer. "Commission may act." (3 words).
+            # Let's trust the Actor+Modal check for short sentences, but filter generic short titles.
+            word_count = len(clean_sentence.split())
+            if word_count <= 4 and not re.search(r'\b(shall|must|may)\b', clean_sentence, re.IGNORECASE):
                 continue
 
-            if numeric_item_pattern.match(chunk_clean) and lead_in_index is not None:
-                merged_chunks[lead_in_index] = f"{merged_chunks[lead_in_index].rstrip()} {chunk_clean}"
+            # --- FILTER 2: IGNORE DEFINITION CLAUSES ---
+        
+            # Pattern: "X" means ... or “X” means
+            if re.search(r'("|“)[^"”]+("|”)\s+means\b', clean_sentence, re.IGNORECASE):
                 continue
 
-            merged_chunks.append(chunk_clean)
+            yield clean_sentence, offset + len(sentence) - len(sentence.lstrip())
 
-            if lead_in_pattern.search(chunk_clean):
-                lead_in_index = len(merged_chunks) - 1
-                continue
+    def is_obligation(self, sentence: str, matches: list, custom_rules_supplied: bool) -> bool:
+        # If user supplied custom rules (even empty), require matches only; otherwise allow fallbacks.
+        if custom_rules_supplied:
+            return bool(matches)
+        if matches:
+            return True
+        has_actor_modal = self.actor_modal_pattern.search(sentence) is not None
+        return has_actor_modal or self.has_minimum_obligation_signals(sentence)
 
-            if re.search(r'\b(shall|must|may|is required to)\b.*\b(be|include|consist of)\b', chunk_clean, re.IGNORECASE):
-                lead_in_index = len(merged_chunks) - 1
-            else:
-                lead_in_index = None
-        
+    def build_item(self, sentence: str, control_id: str, detection_rules: list, custom_rules_supplied: bool, matches: list, signals: dict = None) -> RegulationItem:
+        """
+        Scores an accepted sentence into a standalone item that keeps its own text (parse
+        sessions build span-based items from chunk rows instead).
+        """
+        modal_found, severity, score, category, flags, reasons, action = self.score_sentence(
+            sentence, detection_rules, custom_rules_supplied, matches, signals=signals
+        )
+        return RegulationItem(
+            control_id=control_id,
+            text=sentence,
+            modal_verb=modal_found,
+            severity=severity,
+            score=score,
+            category=category,
+            score_flags=flags,
+            score_reasons=reasons,
+            action=action,
+        )
+
+    def score_sentence(self, sentence: str, detection_rules: list, custom_rules_supplied: bool, matches: list, signals: dict = None) -> tuple:
+        """
+        Returns (modal_verb, severity, score, category, flags, reasons, action) for an accepted sentence.
+        """
+        severity, modal_found, matched_rules = self.determine_severity(
+            sentence,
+            detection_rules,
+            rules_only=custom_rules_supplied,
+            matched_rules=matches,
+        )
+        score, category, flags, reasons = self.classify_score(sentence, severity, matched_rules, signals=signals)
+        action = "Immediate Action" if category in ("CRITICAL", "HIGH") or severity == "High" else "Review"
+        return modal_found, severity, score, category, flags, reasons, action
+
+
+class MergedChunk:
+    """
+    A merged major chunk: its text plus where each of its pieces starts in the document's
+    normalised buffer, so chunk offsets map back to document offsets.
+    """
+
+    __slots__ = ("text", "chunk_offsets", "document_offsets", "end")
+
+    def __init__(self, text: str, offset: int):
+        self.text = text
+        self.chunk_offsets = [0]
+        self.document_offsets = [offset]
+        self.end = offset + len(text)
+
+    def extend(self, text: str, offset: int) -> bool:
+        """
+        Appends a piece after a space. Returns True when the piece abutted the previous one in the
+        buffer, i.e. the joining space is not part of the source text.
+        """
+        abutting = offset == self.end
+        self.chunk_offsets.append(len(self.text) + 1)
+        self.document_offsets.append(offset)
+        self.text = f"{self.text} {text}"
+        self.end = offset + len(text)
+        return abutting
+
+    def document_span(self, start: int, end: int) -> tuple:
+        i = bisect_right(self.chunk_offsets, start) - 1
+        j = bisect_right(self.chunk_offsets, end - 1) - 1
+        return (
+            self.document_offsets[i] + start - self.chunk_offsets[i],
+            self.document_offsets[j] + end - self.chunk_offsets[j],
+        )
+
+
+class ParseSession:
+    """
+    Stateful, chunk-fed version of RegulatoryParser.parse().
+
+    Text can arrive in arbitrary pieces (e.g. while streaming a multi-hundred-MB dump). The session
+    keeps the whitespace-normalisation, major-marker splitting and list-merging state between
+    feed() calls and emits items as soon as the chunk they belong to can no longer change, so the
+    concatenated output of feed()/close() equals a one-shot parse of the whole text.
+    """
+
+    # Split by major legal markers to respect document structure.
+    # This prevents a rule from one section merging with the header of the next.
+    # The leading character class lets the scan reject most positions before trying the markers.
+    SPLIT_PATTERN = re.compile(r'(?=[PD(0-9])(?=(\bPART\s+[IVX]+|\bDivision\s+\d+|\b\d+\.\s+[A-Z]|\(\d+\)))')
+    LIST_ITEM_PATTERN = re.compile(r'^\([a-z]{1,2}\)\b', re.IGNORECASE)
+    ROMAN_ITEM_PATTERN = re.compile(r'^\([ivx]+\)\b', re.IGNORECASE)
+    NUMERIC_ITEM_PATTERN = re.compile(r'^\(\d+\)\b')
+    LEAD_IN_PATTERN = re.compile(r'[:—–-]\s*$')
+    LEAD_IN_MODAL_PATTERN = re.compile(r'\b(shall|must|may|is required to)\b.*\b(be|include|consist of)\b', re.IGNORECASE)
+    # Split points this close to the end of the buffer are held back: a marker such as
+    # "PART II" may still be growing with the next chunk.
+    SPLIT_LOOKAHEAD_MARGIN = 64
+    # Markers merged between progress/cancellation checks of a running job.
+    SPLIT_CHECK_EVERY = 512
+    APPEND_SLICE = 1 << 20  # characters normalised between checks in merged_chunks()
+
+    def __init__(self, parser: RegulatoryParser, detection_rules: list = None, page_starts: List[int] = None, rules_only: Optional[bool] = None,
+                 keep_source: bool = False):
+        self.parser = parser
+        self.custom_rules_supplied = detection_rules is not None if rules_only is None else rules_only
+        self.detection_rules = detection_rules or parser.detection_rules
+        self.closed = False
+        self.keep_source = keep_source
+        # Normalised document buffer; items point into it only when keep_source is set.
+        self.source = SourceText(page_starts, keep_text=keep_source)
+        self.rules_fingerprint = rules_fingerprint(self.detection_rules, self.custom_rules_supplied)
+        self.matcher = parser.compiled_rules(self.detection_rules, self.rules_fingerprint)
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        self._started = False  # leading whitespace has been stripped
+        self._raw_tail = ""  # trailing whitespace whose collapse depends on the next chunk
+        self._raw_offset = 0  # raw offset where _raw_tail starts
+        self._buffer = ""  # normalised text not yet split into major chunks
+        self._buffer_offset = 0  # offset of _buffer in the normalised document
+        self._merged_chunks: List[MergedChunk] = []  # merged chunks not yet parsed
+        self._lead_in_index = None  # chunk that may still absorb following list items
+        self._rule_counter = 0
+        self._digest_counts = {}  # sentence digest -> occurrences, to keep stable ids unique
+
+    def feed(self, chunk: str) -> List[RegulationItem]:
+        if self.closed:
+            raise RuntimeError("Parse session is closed")
+        self._append(chunk or "")
+        self._split(final=False)
+        return self._emit(final=False)
+
+    def close(self) -> List[RegulationItem]:
+        if self.closed:
+            return []
+        self.closed = True
+        # Trailing whitespace is dropped, matching strip() on the whole text.
+        self._raw_tail = ""
+        self._split(final=True)
+        self.source.sections.finish(self.source.length)
+        return self._emit(final=True)
+
+    @property
+    def items_emitted(self) -> int:
+        return self._rule_counter
+
+    def _append(self, chunk: str) -> None:
+        # 1. Cleaning: normalise whitespace. Trailing whitespace is held back so a run split across
+        # two chunks still collapses to a single space.
+        raw = self._raw_tail + chunk
+        raw_offset = self._raw_offset
+        cut = len(raw.rstrip())  # same characters as \s; a \s*$ search rescans the whole chunk
+        head, self._raw_tail = raw[:cut], raw[cut:]
+        self._raw_offset = raw_offset + cut
+        if not self._started:
+            stripped = head.lstrip()
+            raw_offset += len(head) - len(stripped)
+            head = stripped
+            if not head:
+                self._raw_tail = ""
+                self._raw_offset = raw_offset + len(raw) - cut
+                return
+            self._started = True
+        self._buffer += self.source.append(head, raw_offset)
+
+    def _split(self, final: bool) -> None:
+        # 2. Splitting Strategy: only split up to a marker whose match can no longer change.
+        matches = []
+        if final:
+            matches = list(self.SPLIT_PATTERN.finditer(self._buffer))
+            cut = len(self._buffer)
+        else:
+            limit = len(self._buffer) - self.SPLIT_LOOKAHEAD_MARGIN
+            for match in self.SPLIT_PATTERN.finditer(self._buffer):
+                if match.start() > limit:
+                    break
+                matches.append(match)
+            if len(matches) < 2 and not (matches and matches[0].start() > 0):
+                return
+            cut = matches.pop().start()
+
+        base = self._buffer_offset
+        last = 0
+        # Same pieces as re.split(): text before each marker, then the captured marker.
+        sections = self.source.sections
+        for count, match in enumerate(matches):
+            if not count % self.SPLIT_CHECK_EVERY:
+                checkpoint("split", characters_split=base + match.start(), normalised_characters=self.source.length)
+            self._merge(self._buffer[last:match.start()], base + last)
+            sections.add_marker(match.group(1), base + match.start())
+            self._merge(match.group(1), base + match.start())
+            last = match.start()
+        self._merge(self._buffer[last:cut], base + last)
+        self._buffer = self._buffer[cut:]
+        self._buffer_offset = base + cut
+
+    def _merge(self, chunk: str, offset: int) -> None:
+        if not chunk or not chunk.strip():
+            return
+        chunk_clean = chunk.strip()
+        offset += len(chunk) - len(chunk.lstrip())
+        merged_chunks = self._merged_chunks
+
+        is_list_item = self.LIST_ITEM_PATTERN.match(chunk_clean) or self.ROMAN_ITEM_PATTERN.match(chunk_clean)
+        is_numeric_item = self.NUMERIC_ITEM_PATTERN.match(chunk_clean)
+        if (is_list_item or is_numeric_item) and self._lead_in_index is not None:
+            if merged_chunks[self._lead_in_index].extend(chunk_clean, offset) and self.keep_source:
+                self.source.joints.append(offset)
+            return
+
+        merged_chunks.append(MergedChunk(chunk_clean, offset))
+
+        if self.LEAD_IN_PATTERN.search(chunk_clean):
+            self._lead_in_index = len(merged_chunks) - 1
+            return
+
+        if self.LEAD_IN_MODAL_PATTERN.search(chunk_clean):
+            self._lead_in_index = len(merged_chunks) - 1
+        else:
+            self._lead_in_index = None
+
+    def split_chunks(self, text: str) -> List[str]:
+        """
+        Runs normalisation, marker splitting and list merging over the whole text and returns
+        the merged major chunks without parsing them. Closes the session.
+        """
+        return [chunk.text for chunk in self.merged_chunks(text)]
+
+    def merged_chunks(self, text: str) -> List[MergedChunk]:
+        """
+        Like split_chunks() but keeps each chunk's document offsets; the session's source holds
+        the normalised text afterwards. Chunks can be parsed independently of each other.
+        """
+        if self.closed:
+            raise RuntimeError("Parse session is closed")
+        self.closed = True
+        text = text or ""
+        # Normalised in slices, so a running job can be cancelled between them.
+        for start in range(0, len(text), self.APPEND_SLICE):
+            checkpoint("split", characters_read=start, input_characters=len(text))
+            self._append(text[start:start + self.APPEND_SLICE])
+        self._raw_tail = ""
+        self._split(final=True)
+        self.source.sections.finish(self.source.length)
+        return self._take_ready(final=True)
+
+    def _take_ready(self, final: bool) -> List[MergedChunk]:
+        # A merged chunk is final once it is no longer the lead-in that list items attach to.
+        if final or self._lead_in_index is None:
+            ready, self._merged_chunks = self._merged_chunks, []
+        else:
+            ready = self._merged_chunks[:self._lead_in_index]
+            self._merged_chunks = self._merged_chunks[self._lead_in_index:]
+            self._lead_in_index = 0
+        if final:
+            self._lead_in_index = None
+        return ready
+
+    def _emit(self, final: bool) -> List[RegulationItem]:
         items = []
-        rule_counter = 0
+        for chunk in self._take_ready(final):
+            self.report_progress(chunk)
+            items.extend(self.items_from_rows(chunk, self.chunk_rows(chunk)))
+        if not self.keep_source:
+            # Later items all start in a pending chunk or in the unsplit buffer.
+            self.source.forget_before(self._merged_chunks[0].document_offsets[0] if self._merged_chunks else self._buffer_offset)
+        return items
 
-        for chunk in merged_chunks:
-            # Inside each major chunk (e.g. "13. Consent..."), we likely have multiple sentences.
-            # We must split them to filter out headers/definitions effectively.
-            
-            # Normalize whitespace within the chunk (replace newlines with spaces)
-            # This makes sentence splitting by punctuation easier.
-            chunk_normalized = re.sub(r'\s+', ' ', chunk).strip()
-            
-            if not chunk_normalized:
-                continue
-            
-            # If a lead-in with list items exists (e.g., "shall be — (a)... (b)..."),
-            # keep the whole block together so list items stay with the actor/modal.
-            has_list_items = len(re.findall(r'\([a-z]\)', chunk_normalized, re.IGNORECASE)) >= 2
-            has_leadin = bool(re.search(r'—|:|-', chunk_normalized))
-            if has_list_items and has_leadin:
-                sentences = [chunk_normalized]
-            else:
-                # Split by sentence endings (. ! ?)
-                # Lookbehind (?<=[.!?]) ensures we keep the punctuation.
-                sentences = re.split(r'(?<=[.!?])\s+', chunk_normalized)
-            
-            for sentence in sentences:
-                clean_sentence = sentence.strip()
-                if not clean_sentence:
-                    continue
-                    
-                # --- FILTER 1: IGNORE HEADERS & STRUCTURAL TEXT ---
-                
-                # Check for PART/Division/Schedule at start
-                if re.match(r'^(PART|Division|SECTION|Schedule)\b', clean_sentence, re.IGNORECASE):
-                    continue
-                    
-                # Check for fully uppercase (allow some symbols)
-                if any(c.isalpha() for c in clean_sentence) and clean_sentence.isupper():
-                    continue
-                    
-                # Check for short lines (titles/headers often < 5 words)
-                # But be careful not to kill short valid rules? 
-                # Valid rules with Actor+Modal are usually longer. "Commission may act." (3 words).
-                # Let's trust the Actor+Modal check for short sentences, but filter generic short titles.
-                word_count = len(clean_sentence.split())
-                if word_count <= 4 and not re.search(r'\b(shall|must|may)\b', clean_sentence, re.IGNORECASE):
-                    continue
-
-                # --- FILTER 2: IGNORE DEFINITION CLAUSES ---
-                
-                # Pattern: "X" means ... or “X” means
-                if re.search(r'("|“)[^"”]+("|”)\s+means\b', clean_sentence, re.IGNORECASE):
-                    continue
-                    
-                # --- FILTER 3: OBLIGATION DETECTION (rules + generic signals) ---
-                matches = self.match_detection_rules(clean_sentence, detection_rules)
-
-                # Expanded actor/modal pattern for cross-framework applicability (GDPR/HIPAA/ISO/custom)
-                actors = r'(organisation|organization|commission|individual|person|applicant|data intermediary|controller|processor|entity|provider|service|company|team|customer)'
-                modals = r'(shall|must|is required to|may|should|required|prohibited)'
-                actor_modal_pattern = fr'(?i)\b{actors}\b.*\b{modals}\b'
-                has_actor_modal = re.search(actor_modal_pattern, clean_sentence) is not None
-
-                # If user supplied custom rules (even empty), require matches only; otherwise allow fallbacks.
-                if custom_rules_supplied:
-                    if not matches:
-                        continue
-                else:
-                    if not matches and not has_actor_modal and not self.has_minimum_obligation_signals(clean_sentence):
-                        continue
-
-                # If we get here, it's a valid rule.
-                severity, modal_found, matched_rules = self.determine_severity(
-                    clean_sentence,
-                    detection_rules,
-                    rules_only=custom_rules_supplied,
-                )
-                score, category, flags, reasons = self.classify_score(clean_sentence, severity, matched_rules)
-                
-                rule_counter += 1
-                item = RegulationItem(
-                    control_id=f"rule-{rule_counter:03d}",
-                    text=clean_sentence,
-                    modal_verb=modal_found,
-                    severity=severity,
-                    score=score,
-                    category=category,
-                    score_flags=flags,
-                    score_reasons=reasons,
-                    action="Immediate Action" if category in ("CRITICAL", "HIGH") or severity == "High" else "Review"
-                )
-                items.append(item)
-            
+    def report_progress(self, chunk: MergedChunk) -> None:
+        # Progress and cancellation point of a running job, once per merged chunk.
+        checkpoint("parse", characters_parsed=chunk.document_offsets[0], normalised_characters=self.source.length, items_found=self._rule_counter)
+
+    def cache_key(self, chunk: MergedChunk) -> tuple:
+        return chunk_digest(chunk.text), self.rules_fingerprint
+
+    def cached_rows(self, chunk: MergedChunk) -> Optional[List[tuple]]:
+        rows = self.parser.chunk_cache.get(self.cache_key(chunk))
+        if rows is not None:
+            self.cache_hits += 1
+        return rows
+
+    def store_rows(self, chunk: MergedChunk, rows: List[tuple]) -> None:
+        self.cache_misses += 1
+        self.parser.chunk_cache.put(self.cache_key(chunk), rows)
+
+    def chunk_rows(self, chunk: MergedChunk) -> List[tuple]:
+        # Amended documents repeat most chunks verbatim, so their rows come from the cache.
+        rows = self.cached_rows(chunk)
+        if rows is None:
+            rows = self.parser.chunk_rows(chunk.text, self.detection_rules, self.custom_rules_supplied, self.matcher)
+            self.store_rows(chunk, rows)
+        return rows
+
+    def items_from_rows(self, chunk: MergedChunk, rows: List[tuple]) -> List[RegulationItem]:
+        """
+        Numbers a chunk's rows in document order: positional control ids plus content-derived
+        stable ids (the n-th repeat of a sentence gets a -n suffix).
+        """
+        items = []
+        sections = self.source.sections
+        for offset, length, digest, modal_verb, severity, score, category, flags, reasons, action in rows:
+            self._rule_counter += 1
+            seen = self._digest_counts.get(digest, 0) + 1
+            self._digest_counts[digest] = seen
+            start, end = chunk.document_span(offset, offset + length)
+            section = sections.node_at(start)
+            items.append(RegulationItem(
+                control_id=f"rule-{self._rule_counter:03d}",
+                stable_id=f"obl-{digest}" if seen == 1 else f"obl-{digest}-{seen}",
+                text=None if self.keep_source else chunk.text[offset:offset + length],
+                source=self.source if self.keep_source else None,
+                start=start,
+                end=end,
+                page=self.source.page_of(start),
+                section_id=section.id if section is not None else None,
+                section=section.citation if section is not None else None,
+                modal_verb=modal_verb,
+                severity=severity,
+                score=score,
+                category=category,
+                score_flags=dict(flags),
+                score_reasons=list(reasons),
+                action=action,
+            ))
         return items
 
+
 parser = RegulatoryParser()
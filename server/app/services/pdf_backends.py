@@ -0,0 +1,224 @@
+import io
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.services.pdf_writer import build_text_pdf
+
+try:
+    from pypdf import PdfReader
+    PYPDF_AVAILABLE = True
+except Exception:
+    PYPDF_AVAILABLE = False
+
+try:
+    from pdfminer.converter import TextConverter
+    from pdfminer.layout import LAParams
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
+    PDFMINER_AVAILABLE = True
+except Exception:
+    PDFMINER_AVAILABLE = False
+
+try:
+    import pypdfium2 as pdfium
+    PDFIUM_AVAILABLE = True
+except Exception:
+    PDFIUM_AVAILABLE = False
+
+# PDF text extraction backends. Each backend opens a document and yields the text of its pages
+# one at a time; extract_pdf (extraction.py) tries them in order and falls back to the next one
+# when a backend raises or finds no text at all. The order comes from REGGUARD_PDF_BACKENDS if
+# set, otherwise from a benchmark run once per process over a sample PDF (generated, or the file
+# named by REGGUARD_PDF_BENCHMARK_FILE), so each deployment uses the fastest backend it has
+# installed without code changes. Per-backend counters show what production documents cost.
+
+logger = logging.getLogger(__name__)
+
+BACKENDS_ENV = "REGGUARD_PDF_BACKENDS"  # comma-separated preference, e.g. "pdfium,pypdf"
+BENCHMARK_FILE_ENV = "REGGUARD_PDF_BENCHMARK_FILE"
+BENCHMARK_PAGES = 8
+BENCHMARK_LINES = 60
+
+# pdfium is not thread-safe: every call into it, from any thread, goes through this lock.
+_PDFIUM_LOCK = threading.Lock()
+
+
+class PdfBackend:
+    name = ""
+    available = False
+
+    def open(self, data: bytes) -> Tuple[int, Iterator[str]]:
+        """
+        (page count, iterator over the text of each page) for a PDF.
+        """
+        raise NotImplementedError
+
+
+class PypdfBackend(PdfBackend):
+    name = "pypdf"
+    available = PYPDF_AVAILABLE
+
+    def open(self, data: bytes) -> Tuple[int, Iterator[str]]:
+        reader = PdfReader(io.BytesIO(data))
+        return len(reader.pages), (page.extract_text() or "" for page in reader.pages)
+
+
+class PdfminerBackend(PdfBackend):
+    name = "pdfminer"
+    available = PDFMINER_AVAILABLE
+
+    def open(self, data: bytes) -> Tuple[int, Iterator[str]]:
+        pages = list(PDFPage.get_pages(io.BytesIO(data)))
+        resources = PDFResourceManager(caching=True)
+
+        def texts():
+            for page in pages:
+                out = io.StringIO()
+                device = TextConverter(resources, out, laparams=LAParams())
+                try:
+                    PDFPageInterpreter(resources, device).process_page(page)
+                finally:
+                    device.close()
+                yield out.getvalue().replace("\x0c", "")
+
+        return len(pages), texts()
+
+
+class PdfiumBackend(PdfBackend):
+    name = "pdfium"
+    available = PDFIUM_AVAILABLE
+
+    def open(self, data: bytes) -> Tuple[int, Iterator[str]]:
+        with _PDFIUM_LOCK:
+            document = pdfium.PdfDocument(data)
+            count = len(document)
+
+        def texts():
+            try:
+                for number in range(count):
+                    with _PDFIUM_LOCK:
+                        page = document[number]
+                        textpage = page.get_textpage()
+                        text = textpage.get_text_range()
+                        textpage.close()
+                        page.close()
+                    yield text.replace("\r\n", "\n")
+            finally:
+                with _PDFIUM_LOCK:
+                    document.close()
+
+        return count, texts()
+
+
+BACKENDS: Dict[str, PdfBackend] = {backend.name: backend for backend in (PdfiumBackend(), PdfminerBackend(), PypdfBackend())}
+
+
+def _sample_pdf() -> bytes:
+    path = os.environ.get(BENCHMARK_FILE_ENV)
+    if path:
+        try:
+            with open(path, "rb") as fh:
+                return fh.read()
+        except OSError as e:
+            logger.warning("Cannot read %s=%s (%s); benchmarking a generated sample", BENCHMARK_FILE_ENV, path, e)
+    line = "(1) An organisation shall protect personal data in its possession or under its control."
+    return build_text_pdf([[f"{number}. {line}" for number in range(BENCHMARK_LINES)] for _ in range(BENCHMARK_PAGES)])
+
+
+class BackendSelector:
+    def __init__(self):
+        self._order: Optional[List[str]] = None
+        self._source = None  # "env" or "benchmark"
+        self._benchmark: Dict[str, dict] = {}
+        self._stats: Dict[str, dict] = {name: self._empty_stats() for name in BACKENDS}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _empty_stats() -> dict:
+        return {"documents": 0, "pages": 0, "seconds": 0.0, "slowest_page_seconds": 0.0, "failures": 0, "empty": 0}
+
+    def benchmark(self, data: Optional[bytes] = None) -> Dict[str, dict]:
+        """
+        Extracts a sample PDF with every installed backend; seconds per page, or the error for
+        backends that failed or found no text.
+        """
+        data = data or _sample_pdf()
+        results = {}
+        for name, backend in BACKENDS.items():
+            if not backend.available:
+                continue
+            started = time.perf_counter()
+            try:
+                count, pages = backend.open(data)
+                characters = sum(len(text) for text in pages)
+            except Exception as e:
+                results[name] = {"seconds_per_page": None, "error": f"{type(e).__name__}: {e}"}
+                continue
+            elapsed = time.perf_counter() - started
+            results[name] = {
+                "seconds_per_page": elapsed / max(1, count),
+                "error": None if characters else "no text extracted",
+            }
+        return results
+
+    def order(self) -> List[str]:
+        """
+        Installed backends, preferred first. Benchmarks on first use unless REGGUARD_PDF_BACKENDS
+        fixes the order.
+        """
+        with self._lock:
+            if self._order is None:
+                self._order, self._source = self._choose()
+                logger.info("PDF extraction backends (%s): %s", self._source, ", ".join(self._order) or "none")
+            return list(self._order)
+
+    def _choose(self) -> Tuple[List[str], str]:
+        installed = [name for name, backend in BACKENDS.items() if backend.available]
+        configured = [name.strip().lower() for name in os.environ.get(BACKENDS_ENV, "").split(",") if name.strip()]
+        if configured:
+            unknown = [name for name in configured if name not in installed]
+            if unknown:
+                logger.warning("%s names backends that are not installed: %s", BACKENDS_ENV, ", ".join(unknown))
+            chosen = [name for name in configured if name in installed]
+            if chosen:
+                return chosen, "env"
+        self._benchmark = self.benchmark()
+        # Working backends fastest first; ones that failed the sample stay as last resorts.
+        ranked = sorted(
+            self._benchmark,
+            key=lambda name: (self._benchmark[name]["error"] is not None, self._benchmark[name]["seconds_per_page"] or 0.0),
+        )
+        return ranked, "benchmark"
+
+    def record(self, name: str, page_seconds: List[float], failed: bool = False, empty: bool = False) -> None:
+        with self._lock:
+            stats = self._stats[name]
+            stats["documents"] += 1
+            stats["pages"] += len(page_seconds)
+            stats["seconds"] += sum(page_seconds)
+            stats["slowest_page_seconds"] = max(stats["slowest_page_seconds"], max(page_seconds, default=0.0))
+            stats["failures"] += failed
+            stats["empty"] += empty
+
+    def report(self) -> dict:
+        order = self.order()
+        with self._lock:
+            return {
+                "order": order,
+                "source": self._source,
+                "backends": [
+                    {
+                        "name": name,
+                        "available": backend.available,
+                        "benchmark": self._benchmark.get(name),
+                        **self._stats[name],
+                    }
+                    for name, backend in BACKENDS.items()
+                ],
+            }
+
+
+backend_selector = BackendSelector()
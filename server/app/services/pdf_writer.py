@@ -0,0 +1,89 @@
+import zlib
+from typing import List, Sequence
+
+# Minimal PDF 1.5 writer for the text-only fallback report (used when WeasyPrint is missing).
+# Page content streams are FlateDecode-compressed, the font and media box live once on the page
+# tree and are inherited by every page, and all dictionaries (catalog, page tree, font, pages) are
+# packed into one compressed object stream indexed by a cross-reference stream.
+
+FLATE_LEVEL = 6
+PAGE_WIDTH = 612
+PAGE_HEIGHT = 792
+FONT_SIZE = 11
+LEADING = 14
+LEFT_MARGIN = 40
+FIRST_BASELINE = 760
+
+_CATALOG, _PAGES, _FONT = 1, 2, 3
+_FIRST_PAGE = 4  # page i is object 4 + 2i, its content stream 5 + 2i
+
+
+def _escape(data: bytes) -> bytes:
+    return data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)").replace(b"\r", b"\\r")
+
+
+def _content_stream(lines: Sequence[str]) -> bytes:
+    # ' moves to the next line and shows the string, so one operator per line. Starting one
+    # leading above the first baseline puts the first line at FIRST_BASELINE. The page is
+    # encoded and escaped as one string (Courier with WinAnsiEncoding; characters outside cp1252
+    # become '?'), then cut into lines at the newlines.
+    stream = b"BT /F1 %d Tf %d TL %d %d Td\n" % (FONT_SIZE, LEADING, LEFT_MARGIN, FIRST_BASELINE + LEADING)
+    if lines:
+        text = _escape("\n".join(line.replace("\n", " ") for line in lines).encode("cp1252", "replace"))
+        stream += b"(" + text.replace(b"\n", b")'\n(") + b")'\n"
+    return zlib.compress(stream + b"ET", FLATE_LEVEL)
+
+
+def build_text_pdf(pages: List[List[str]]) -> bytes:
+    """
+    Writes pages of monospace text lines as a PDF and returns its bytes.
+    """
+    if not pages:
+        pages = [[]]
+    page_ids = [_FIRST_PAGE + 2 * i for i in range(len(pages))]
+    object_stream_id = _FIRST_PAGE + 2 * len(pages)
+    xref_id = object_stream_id + 1
+
+    # Dictionaries that go into the object stream, in object-number order.
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    packed = [
+        (_CATALOG, b"<</Type/Catalog/Pages %d 0 R>>" % _PAGES),
+        (_PAGES, b"<</Type/Pages/Kids[%s]/Count %d/MediaBox[0 0 %d %d]/Resources<</Font<</F1 %d 0 R>>>>>>"
+            % (kids, len(pages), PAGE_WIDTH, PAGE_HEIGHT, _FONT)),
+        (_FONT, b"<</Type/Font/Subtype/Type1/BaseFont/Courier/Encoding/WinAnsiEncoding>>"),
+    ]
+    packed.extend((page_id, b"<</Type/Page/Parent %d 0 R/Contents %d 0 R>>" % (_PAGES, page_id + 1)) for page_id in page_ids)
+
+    header, body, position = [], [], 0
+    for object_id, data in packed:
+        header.append(b"%d %d" % (object_id, position))
+        body.append(data)
+        position += len(data) + 1
+    header_bytes = b" ".join(header) + b"\n"
+    object_stream = zlib.compress(header_bytes + b"\n".join(body), FLATE_LEVEL)
+
+    out = bytearray(b"%PDF-1.5\n%\xe2\xe3\xcf\xd3\n")
+    offsets = {}
+
+    def write_stream(object_id: int, dictionary: bytes, data: bytes) -> None:
+        offsets[object_id] = len(out)
+        out.extend(b"%d 0 obj\n<<%s/Length %d/Filter/FlateDecode>>\nstream\n" % (object_id, dictionary, len(data)))
+        out.extend(data)
+        out.extend(b"\nendstream\nendobj\n")
+
+    for page_id, lines in zip(page_ids, pages):
+        write_stream(page_id + 1, b"", _content_stream(lines))
+    write_stream(object_stream_id, b"/Type/ObjStm/N %d/First %d" % (len(packed), len(header_bytes)), object_stream)
+
+    # Cross-reference stream rows: type (1 byte), offset or object stream (4), generation or index (2).
+    offsets[xref_id] = len(out)
+    in_stream = {object_id: index for index, (object_id, _) in enumerate(packed)}
+    rows = [b"\x00\x00\x00\x00\x00\xff\xff"]
+    for object_id in range(1, xref_id + 1):
+        if object_id in in_stream:
+            rows.append(b"\x02" + object_stream_id.to_bytes(4, "big") + in_stream[object_id].to_bytes(2, "big"))
+        else:
+            rows.append(b"\x01" + offsets[object_id].to_bytes(4, "big") + b"\x00\x00")
+    write_stream(xref_id, b"/Type/XRef/Size %d/W[1 4 2]/Root %d 0 R" % (xref_id + 1, _CATALOG), zlib.compress(b"".join(rows), FLATE_LEVEL))
+    out.extend(b"startxref\n%d\n%%%%EOF\n" % offsets[xref_id])
+    return bytes(out)
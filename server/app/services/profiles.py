@@ -0,0 +1,195 @@
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.services.storage import DATA_DIR, load_json, write_json
+
+# Company-profile applicability. Profile attributes (roles, industries, jurisdictions, size) are
+# compiled into one alternation regex of trigger phrases; each document keeps an inverted index
+# from (dimension, value) to the obligations that mention it. When a profile changes, only the
+# obligations indexed under the changed attributes are re-evaluated.
+
+PROFILES_PATH = os.path.join(DATA_DIR, "company_profiles.json")
+
+APPLICABLE = "applicable"
+NOT_APPLICABLE = "not_applicable"
+NEEDS_REVIEW = "needs_review"
+
+DIMENSIONS = ("roles", "industries", "jurisdictions", "size")
+
+PROFILE_CRITERIA: Dict[str, Dict[str, List[str]]] = {
+    "roles": {
+        "data_intermediary": ["data intermediary", "data intermediaries"],
+        "controller": ["controller", "controllers"],
+        "processor": ["processor", "processors"],
+        "public_agency": ["public agency", "public agencies"],
+        "network_service_provider": ["network service provider"],
+        "telemarketer": ["specified message", "do not call register", "telemarketing"],
+        "covered_entity": ["covered entity", "covered entities"],
+        "business_associate": ["business associate"],
+    },
+    "industries": {
+        "healthcare": ["patient", "medical record", "health information", "healthcare", "health care"],
+        "finance": ["financial institution", "bank", "insurer", "payment card"],
+        "telecommunications": ["telecommunication", "telephone number", "telecommunications service"],
+        "education": ["school", "student", "educational institution"],
+    },
+    "jurisdictions": {
+        "singapore": ["singapore"],
+        "eu": ["european union", "member state", "union law"],
+        "uk": ["united kingdom"],
+        "us": ["united states"],
+    },
+    "size": {
+        "small": ["small business", "small enterprise", "small organisation", "small organization"],
+        "large": ["large enterprise", "large organisation", "large organization"],
+    },
+}
+
+# Obligations addressed to every organisation apply whatever the profile says.
+GENERAL_ACTORS = ["organisation", "organization", "company", "entity", "business"]
+
+DIMENSION_LABELS = {"roles": "role", "industries": "industry", "jurisdictions": "jurisdiction", "size": "size"}
+
+
+def _compile_matcher():
+    phrases: Dict[str, Tuple[str, str]] = {}
+    for dim, values in PROFILE_CRITERIA.items():
+        for value, triggers in values.items():
+            for phrase in triggers:
+                phrases[phrase] = (dim, value)
+    for phrase in GENERAL_ACTORS:
+        phrases[phrase] = ("general", "any")
+    # Longest phrases first so "data intermediary" wins over shorter overlapping triggers.
+    alternation = "|".join(re.escape(p) for p in sorted(phrases, key=len, reverse=True))
+    return re.compile(rf"\b(?:{alternation})\b", re.IGNORECASE), phrases
+
+
+_MATCHER, _PHRASES = _compile_matcher()
+
+
+def normalize_profile(profile: dict) -> Dict[str, frozenset]:
+    normalized = {}
+    for dim in DIMENSIONS:
+        raw = (profile or {}).get(dim)
+        if raw is None or raw == "":
+            values = []
+        elif isinstance(raw, str):
+            values = [raw]
+        else:
+            values = list(raw)
+        normalized[dim] = frozenset(str(v).strip().lower().replace(" ", "_") for v in values if str(v).strip())
+    return normalized
+
+
+class ProfileIndex:
+    """
+    Per-document index of which profile attributes each obligation mentions.
+    """
+
+    def __init__(self, texts: Iterable[str]):
+        self.triggers: List[Dict[str, Set[str]]] = []
+        self.general: List[bool] = []
+        self.by_value: Dict[Tuple[str, str], Set[int]] = {}
+        self.by_dimension: Dict[str, Set[int]] = {}
+        for pos, text in enumerate(texts):
+            found: Dict[str, Set[str]] = {}
+            general = False
+            for match in _MATCHER.finditer(text or ""):
+                dim, value = _PHRASES[match.group(0).lower()]
+                if dim == "general":
+                    general = True
+                    continue
+                found.setdefault(dim, set()).add(value)
+                self.by_value.setdefault((dim, value), set()).add(pos)
+                self.by_dimension.setdefault(dim, set()).add(pos)
+            self.triggers.append(found)
+            self.general.append(general)
+
+    def evaluate_item(self, pos: int, profile: Dict[str, frozenset]) -> Tuple[str, List[str]]:
+        applicable_reasons, excluded_reasons, review_reasons = [], [], []
+        for dim, values in self.triggers[pos].items():
+            label = DIMENSION_LABELS[dim]
+            mentioned = ", ".join(sorted(values))
+            held = profile.get(dim) or frozenset()
+            if not held:
+                review_reasons.append(f"Mentions {label} '{mentioned}'; profile has no {label} set")
+            elif values & held:
+                applicable_reasons.append(f"Mentions {label} '{', '.join(sorted(values & held))}' which matches profile")
+            else:
+                excluded_reasons.append(f"Scoped to {label} '{mentioned}', which is not in the profile")
+
+        if excluded_reasons:
+            return NOT_APPLICABLE, excluded_reasons
+        if review_reasons:
+            return NEEDS_REVIEW, review_reasons
+        if applicable_reasons:
+            return APPLICABLE, applicable_reasons
+        if self.general[pos]:
+            return APPLICABLE, ["Addressed to all organisations"]
+        return NEEDS_REVIEW, ["No profile-specific scope detected"]
+
+    def affected(self, old: Dict[str, frozenset], new: Dict[str, frozenset]) -> Set[int]:
+        """
+        Positions whose decision can differ between two profiles.
+        """
+        positions: Set[int] = set()
+        for dim in DIMENSIONS:
+            before, after = old.get(dim, frozenset()), new.get(dim, frozenset())
+            if before == after:
+                continue
+            if not before or not after:
+                # Switching between "unset" and "set" changes every obligation scoped on this dimension.
+                positions |= self.by_dimension.get(dim, set())
+                continue
+            for value in before ^ after:
+                positions |= self.by_value.get((dim, value), set())
+        return positions
+
+
+class ProfileEvaluation:
+    def __init__(self, profile: Dict[str, frozenset], decisions: List[Tuple[str, List[str]]]):
+        self.profile = profile
+        self.decisions = decisions
+
+
+def evaluate(index: ProfileIndex, profile: Dict[str, frozenset], previous: Optional[ProfileEvaluation] = None) -> Tuple[ProfileEvaluation, int]:
+    """
+    Returns (evaluation, number of obligations evaluated). With a previous evaluation of the same
+    document, only obligations affected by the profile change are recomputed.
+    """
+    if previous is None:
+        decisions = [index.evaluate_item(pos, profile) for pos in range(len(index.triggers))]
+        return ProfileEvaluation(profile, decisions), len(decisions)
+    positions = index.affected(previous.profile, profile)
+    decisions = list(previous.decisions)
+    for pos in positions:
+        decisions[pos] = index.evaluate_item(pos, profile)
+    return ProfileEvaluation(profile, decisions), len(positions)
+
+
+class ProfileStore:
+    def __init__(self, path: str = PROFILES_PATH):
+        self.path = path
+        self._profiles: Optional[Dict[str, dict]] = None
+        self._lock = threading.Lock()
+
+    def _all(self) -> Dict[str, dict]:
+        if self._profiles is None:
+            self._profiles = load_json(self.path, {})
+        return self._profiles
+
+    def get(self, company_id: str) -> Optional[dict]:
+        with self._lock:
+            return self._all().get(company_id)
+
+    def save(self, company_id: str, profile: dict) -> dict:
+        with self._lock:
+            profiles = self._all()
+            profiles[company_id] = profile
+            write_json(self.path, profiles)
+            return profile
+
+
+profile_store = ProfileStore()
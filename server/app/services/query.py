@@ -0,0 +1,236 @@
+import base64
+import heapq
+import json
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.schemas import RegulationItem
+
+# Report bucket order; any other severity follows in first-seen order.
+SEVERITY_BUCKET_ORDER = ["high", "critical", "medium", "low", "unknown"]
+SEVERITY_RANK = {"critical": 0, "high": 1, "medium": 2, "low": 3, "unknown": 4}
+CATEGORY_RANK = {"CRITICAL": 0, "HIGH": 1, "MEDIUM": 2, "LOW": 3}
+SORT_FIELDS = ("score", "severity", "category", "position")
+
+
+def _score(item) -> int:
+    return getattr(item, "score", 0)
+
+
+def severity_key(item) -> str:
+    return (getattr(item, "severity", None) or "unknown").lower()
+
+
+def top_n(items: Iterable[RegulationItem], n: int) -> List[RegulationItem]:
+    # heapq.nlargest keeps the same order (ties included) as sorted(..., reverse=True)[:n].
+    return heapq.nlargest(n, items, key=_score)
+
+
+def top_by_severity(items: Iterable[RegulationItem], limits: Dict[str, int]) -> List[RegulationItem]:
+    """
+    Groups items by severity and keeps the top-scoring `limits[severity]` per group (all when no
+    limit is given, none for 0). Groups are emitted in SEVERITY_BUCKET_ORDER.
+    """
+    grouped: Dict[str, List[RegulationItem]] = {}
+    for item in items:
+        grouped.setdefault(severity_key(item), []).append(item)
+
+    ordered_keys = [k for k in SEVERITY_BUCKET_ORDER if k in grouped]
+    ordered_keys += [k for k in grouped if k not in SEVERITY_BUCKET_ORDER]
+    limited = []
+    for key in ordered_keys:
+        bucket = grouped[key]
+        limit = limits.get(key)
+        if limit is None:
+            limited.extend(sorted(bucket, key=_score, reverse=True))
+        elif limit > 0:
+            limited.extend(top_n(bucket, limit))
+        # limit == 0 skips the bucket
+    return limited
+
+
+class ReportFilter:
+    """
+    The report endpoint's item selection, shared by the PDF report and the bulk export.
+    """
+
+    def __init__(self, rule_ids: Optional[set] = None, severity_map: Optional[dict] = None, score_cutoff: Optional[int] = None,
+                 severity_top_counts: Optional[Dict[str, int]] = None, limit: Optional[int] = None):
+        self.rule_ids = rule_ids
+        self.severity_map = severity_map or {}
+        self.score_cutoff = score_cutoff
+        self.severity_top_counts = severity_top_counts
+        self.limit = limit  # top_n
+
+    def apply(self, items: Iterable[RegulationItem]) -> List[RegulationItem]:
+        # Filter items by provided rule ids and/or top-N
+        if self.rule_ids is not None:
+            items = [i for i in items if getattr(i, "control_id", None) in self.rule_ids]
+
+        # Override severities with client-visible values when provided (copies, stored items stay untouched)
+        if self.severity_map:
+            items = [
+                item.model_copy(update={"severity": self.severity_map[item.control_id]})
+                if getattr(item, "control_id", None) in self.severity_map else item
+                for item in items
+            ]
+
+        if self.score_cutoff is not None:
+            items = [i for i in items if getattr(i, "score", 0) >= self.score_cutoff]
+
+        if self.severity_top_counts:
+            items = top_by_severity(items, self.severity_top_counts)
+
+        if self.limit:
+            try:
+                n = int(self.limit)
+                if n > 0:
+                    items = top_n(items, n)
+            except Exception:
+                pass
+        return items
+
+
+def _sort_key(item: RegulationItem, position: int, field: str, descending: bool) -> tuple:
+    # Every key ends with the position so keys are unique and usable as keyset cursors.
+    if field == "score":
+        return (-item.score, position) if descending else (item.score, position)
+    if field == "severity":
+        rank = SEVERITY_RANK.get(severity_key(item), 5)
+        return (rank, -item.score, position) if descending else (-rank, item.score, position)
+    if field == "category":
+        rank = CATEGORY_RANK.get((item.category or "").upper(), 4)
+        return (rank, -item.score, position) if descending else (-rank, item.score, position)
+    return (-position,) if descending else (position,)
+
+
+class ItemIndex:
+    """
+    Precomputed orderings over a parsed document. Per-severity lists are kept in score order so
+    severity-filtered, score-sorted pages are a k-way merge starting at the cursor instead of a
+    filter-and-sort over every item. Other orderings are built on first use and cached.
+    """
+
+    def __init__(self, items: Sequence[RegulationItem]):
+        self.items = items
+        self._section_ids: Optional[Tuple[List[int], bool]] = None  # (section id per item, ids ascending)
+        self._orders: Dict[Tuple[str, bool], Tuple[List[tuple], List[int]]] = {}
+        self.by_severity: Dict[str, Tuple[List[tuple], List[int]]] = {}
+        grouped: Dict[str, List[int]] = {}
+        for pos, item in enumerate(items):
+            grouped.setdefault(severity_key(item), []).append(pos)
+        for sev, positions in grouped.items():
+            self.by_severity[sev] = self._build(positions, "score", True)
+
+    def _build(self, positions: Iterable[int], field: str, descending: bool):
+        keyed = sorted((_sort_key(self.items[p], p, field, descending), p) for p in positions)
+        return [k for k, _ in keyed], [p for _, p in keyed]
+
+    def order(self, field: str, descending: bool):
+        spec = (field, descending)
+        if spec not in self._orders:
+            self._orders[spec] = self._build(range(len(self.items)), field, descending)
+        return self._orders[spec]
+
+    def section_positions(self, first_id: int, last_id: int) -> Sequence[int]:
+        """
+        Positions of the items inside section nodes first_id..last_id (inclusive). Parsed items are
+        in document order, so their section ids never decrease and the range is a slice.
+        """
+        if self._section_ids is None:
+            ids = [-1 if item.section_id is None else item.section_id for item in self.items]
+            # Published together, so a concurrent request never sees the ids with a stale flag.
+            self._section_ids = (ids, all(a <= b for a, b in zip(ids, ids[1:])))
+        ids, ids_sorted = self._section_ids
+        if ids_sorted:
+            return range(bisect_left(ids, first_id), bisect_right(ids, last_id))
+        return [pos for pos, section_id in enumerate(ids) if first_id <= section_id <= last_id]
+
+    def iter_positions(self, field: str, descending: bool, severities: Optional[List[str]] = None, after: Optional[tuple] = None, positions: Optional[Sequence[int]] = None):
+        """
+        Yields (key, position) in the requested order, strictly after the `after` key.
+        """
+        if positions is not None:
+            # A section slice: order just those items.
+            keys, ordered = self._build(positions, field, descending)
+            start = bisect_right(keys, after) if after is not None else 0
+            yield from zip(keys[start:], ordered[start:])
+            return
+        if severities and field == "score" and descending:
+            streams = []
+            for sev in severities:
+                keys, positions = self.by_severity.get(sev, ([], []))
+                start = bisect_right(keys, after) if after is not None else 0
+                streams.append(zip(keys[start:], positions[start:]))
+            yield from heapq.merge(*streams)
+            return
+        keys, positions = self.order(field, descending)
+        start = bisect_right(keys, after) if after is not None else 0
+        for i in range(start, len(keys)):
+            yield keys[i], positions[i]
+
+
+def encode_cursor(field: str, descending: bool, key: tuple) -> str:
+    payload = json.dumps({"f": field, "d": descending, "k": list(key)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, field: str, descending: bool) -> tuple:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8"))
+        key = tuple(payload["k"])
+    except Exception:
+        raise ValueError("malformed cursor")
+    if payload.get("f") != field or payload.get("d") != descending:
+        raise ValueError("cursor was issued for a different sort")
+    return key
+
+
+def query_items(
+    index: ItemIndex,
+    severities: Optional[List[str]] = None,
+    categories: Optional[List[str]] = None,
+    flags: Optional[List[str]] = None,
+    min_score: Optional[int] = None,
+    max_score: Optional[int] = None,
+    rule_ids: Optional[List[str]] = None,
+    section_range: Optional[Tuple[int, int]] = None,
+    sort: str = "score",
+    descending: bool = True,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+) -> Tuple[List[RegulationItem], Optional[str]]:
+    """
+    Returns one page of filtered items and the cursor for the next page (None on the last page).
+    section_range is an inclusive range of section node ids (see SectionIndex.id_range).
+    """
+    if sort not in SORT_FIELDS:
+        raise ValueError(f"sort must be one of {', '.join(SORT_FIELDS)}")
+    after = decode_cursor(cursor, sort, descending) if cursor else None
+    severities = [s.lower() for s in severities] if severities else None
+    categories = {c.upper() for c in categories} if categories else None
+    rule_ids = set(rule_ids) if rule_ids else None
+
+    page = []
+    last_key = None
+    positions = index.section_positions(*section_range) if section_range is not None else None
+    for key, pos in index.iter_positions(sort, descending, severities, after, positions):
+        item = index.items[pos]
+        if severities and severity_key(item) not in severities:
+            continue
+        if categories and (item.category or "").upper() not in categories:
+            continue
+        if rule_ids and item.control_id not in rule_ids:
+            continue
+        if min_score is not None and item.score < min_score:
+            continue
+        if max_score is not None and item.score > max_score:
+            continue
+        if flags and not all((item.score_flags or {}).get(flag) for flag in flags):
+            continue
+        if len(page) == limit:
+            # One more match exists, so hand out a cursor.
+            return page, encode_cursor(sort, descending, last_key)
+        page.append(item)
+        last_key = key
+    return page, None
@@ -0,0 +1,179 @@
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+from typing import Dict, Sequence, Set
+
+from app.services.jobs import checkpoint
+
+try:
+    from weasyprint import HTML, CSS
+    try:
+        from weasyprint.text.fonts import FontConfiguration
+    except ImportError:  # WeasyPrint < 53
+        from weasyprint.fonts import FontConfiguration
+    WEASYPRINT_AVAILABLE = True
+except Exception:
+    WEASYPRINT_AVAILABLE = False
+
+# Long-lived WeasyPrint renderer processes. Each worker imports WeasyPrint, runs font discovery
+# and parses the page stylesheets once (pool initializer), then renders HTML jobs taken from
+# the pool's queue. Workers are replaced after MAX_JOBS_PER_WORKER renders to bound leaks.
+# A render that exceeds RENDER_TIMEOUT fails its own request only: the pool it is stuck in is
+# retired (new renders go to a fresh pool), requests still waiting on the retired pool submit
+# again to the fresh one and take whichever copy finishes first, and the retired pool is
+# terminated in the background once nobody waits on it any more.
+
+MAX_JOBS_PER_WORKER = 50
+RENDER_TIMEOUT = 120  # seconds
+CANCEL_POLL = 0.2  # seconds between cancellation checks while a worker renders
+DEFAULT_PROCESSES = max(1, min(4, (os.cpu_count() or 1) // 2))
+
+_worker_state = None  # (font_config, stylesheets) in the current process
+_worker_error = None
+
+
+def _init_worker(stylesheets: Sequence[str]) -> None:
+    global _worker_state, _worker_error
+    try:
+        font_config = FontConfiguration()
+        parsed = [CSS(string=css, font_config=font_config) for css in stylesheets]
+        # Render once so font discovery and layout caches are warm before the first real job.
+        HTML(string="<p>warm-up</p>").write_pdf(stylesheets=parsed, font_config=font_config)
+        _worker_state = (font_config, parsed)
+    except Exception as e:
+        # A raising initializer makes the pool respawn workers forever; fail the jobs instead.
+        _worker_error = str(e)
+
+
+def _render(html: str) -> bytes:
+    if _worker_state is None:
+        raise RuntimeError(f"PDF renderer failed to start: {_worker_error}")
+    font_config, stylesheets = _worker_state
+    return HTML(string=html).write_pdf(stylesheets=stylesheets, font_config=font_config)
+
+
+def _start_method() -> str:
+    # Forking a threaded server process is unsafe; prefer a clean interpreter per worker.
+    methods = multiprocessing.get_all_start_methods()
+    return "forkserver" if "forkserver" in methods else "spawn"
+
+
+class RendererPool:
+    def __init__(
+        self,
+        stylesheets: Sequence[str],
+        processes: int = DEFAULT_PROCESSES,
+        max_jobs_per_worker: int = MAX_JOBS_PER_WORKER,
+        timeout: float = RENDER_TIMEOUT,
+    ):
+        self.stylesheets = tuple(stylesheets)
+        self.processes = processes
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.timeout = timeout
+        self._pool = None
+        self._in_flight: Dict[object, Set] = {}  # pool -> AsyncResults requests are waiting on
+        self._lock = threading.Lock()
+        self._local_lock = threading.Lock()
+        atexit.register(self.close)
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                context = multiprocessing.get_context(_start_method())
+                self._pool = context.Pool(
+                    processes=self.processes,
+                    initializer=_init_worker,
+                    initargs=(self.stylesheets,),
+                    maxtasksperchild=self.max_jobs_per_worker,
+                )
+            return self._pool
+
+    def start(self) -> None:
+        """
+        Starts the workers ahead of the first report (no-op without WeasyPrint).
+        """
+        if WEASYPRINT_AVAILABLE:
+            self._get_pool()
+
+    def render(self, html: str, in_process: bool = False) -> bytes:
+        """
+        Renders HTML to PDF bytes on a worker. in_process=True renders in the calling process
+        (still with cached stylesheets), for callers that are already pool workers themselves.
+        """
+        if not WEASYPRINT_AVAILABLE:
+            raise RuntimeError("WeasyPrint is not installed")
+        if in_process:
+            return self._render_local(html)
+        try:
+            attempts = [self._submit(html)]
+        except (OSError, NotImplementedError):
+            # No process pool available here: render in-process with the same cached stylesheets.
+            return self._render_local(html)
+        deadline = time.monotonic() + self.timeout
+        try:
+            while True:
+                for _, pending in attempts:
+                    if pending.ready():
+                        return pending.get()
+                pool, pending = attempts[-1]
+                if time.monotonic() >= deadline:
+                    # A stuck layout would hold its worker forever; retire that pool (unless
+                    # another render already did).
+                    self._retire(pool, pending)
+                    raise RuntimeError(f"Report rendering timed out after {self.timeout}s")
+                if pool is not self._pool:
+                    # Another render timed out and retired this pool; queue a copy on the new one.
+                    attempts.append(self._submit(html))
+                    continue
+                pending.wait(max(0.0, min(CANCEL_POLL, deadline - time.monotonic())))
+                # A cancelled job stops waiting here; the worker finishes the layout and takes the next job.
+                checkpoint("render")
+        finally:
+            with self._lock:
+                for pool, pending in attempts:
+                    self._in_flight.get(pool, set()).discard(pending)
+
+    def _submit(self, html: str) -> tuple:
+        pool = self._get_pool()
+        pending = pool.apply_async(_render, (html,))
+        with self._lock:
+            self._in_flight.setdefault(pool, set()).add(pending)
+        return pool, pending
+
+    def _retire(self, pool, stuck) -> None:
+        # Later renders start a fresh pool; the old one takes no new work and is terminated once
+        # the renders other requests are still waiting on have finished (or after a timeout).
+        with self._lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+            self._in_flight.get(pool, set()).discard(stuck)
+        pool.close()
+        threading.Thread(target=self._drain, args=(pool,), name="renderer-drain", daemon=True).start()
+
+    def _drain(self, pool) -> None:
+        deadline = time.monotonic() + self.timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                if not any(not pending.ready() for pending in self._in_flight.get(pool, ())):
+                    break
+            time.sleep(CANCEL_POLL)
+        pool.terminate()
+        pool.join()
+        with self._lock:
+            self._in_flight.pop(pool, None)
+
+    def _render_local(self, html: str) -> bytes:
+        with self._local_lock:
+            if _worker_state is None and _worker_error is None:
+                _init_worker(self.stylesheets)
+            return _render(html)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.terminate()
+                self._pool.join()
+                self._pool = None
@@ -1,141 +1,175 @@
 import datetime
-import math
 import re
-import io
 import html
-from typing import List, Tuple, Dict, Any
+from typing import List, Dict, Any
 
 from app.schemas import RegulationItem
-
-try:
-    from weasyprint import HTML, CSS
-    WEASYPRINT_AVAILABLE = True
-except Exception:
-    WEASYPRINT_AVAILABLE = False
-
-def _escape_text(text: str) -> str:
-    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
-
-# Stakeholder profiles for scoring relevance
-STAKEHOLDER_PROFILES = [
-    ("Compliance Analysts", ["shall", "must", "regulation", "obligation", "section", "chapter", "compliance"]),
-    ("Data Protection Officers", ["personal data", "controller", "processor", "consent", "notice", "retention", "transfer", "data protection", "dpo"]),
-    ("IT Auditors", ["security", "access", "audit", "log", "encryption", "system", "technical", "controls", "monitor"]),
-    ("GRC Consultants", ["risk", "governance", "policy", "framework", "assessment", "control", "scope", "gap analysis"]),
-]
-
-
-def _compute_stakeholders(items: List[RegulationItem]) -> List[Tuple[str, int]]:
-    corpus = " ".join([i.text for i in items]).lower()
-    scores = []
-    for name, keywords in STAKEHOLDER_PROFILES:
-        score = 0
-        for kw in keywords:
-            score += corpus.count(kw.lower())
-        scores.append((name, score))
-    scores.sort(key=lambda x: x[1], reverse=True)
-    return scores
-
-
-def _percent(part: int, total: int) -> int:
-    return int(round((part / total) * 100)) if total else 0
-
-
-def _count_rule_hits(items: List[RegulationItem], rule: dict) -> int:
-    keyword = (rule.get("keyword") or "").lower().strip()
-    if not keyword:
-        return 0
-    match_type = (rule.get("match_type") or "contains").lower()
-    cnt = 0
-    for item in items:
-        text = (item.text or "").lower()
-        if match_type == "exact":
-            if text.strip() == keyword:
-                cnt += 1
-        elif match_type == "startswith":
-            if text.strip().startswith(keyword):
-                cnt += 1
-        elif match_type == "regex":
-            try:
-                if re.search(rule.get("keyword", ""), item.text or "", re.IGNORECASE):
-                    cnt += 1
-            except re.error:
-                continue
-        else:
-            if keyword in text:
-                cnt += 1
-    return cnt
-
-
-def _render_html(filename: str, items: List[RegulationItem], detection_rules: list = None, tasks_data: Dict[str, Any] = None) -> str:
+from app.services.jobs import checkpoint
+from app.services.memory import memory_tracker
+from app.services.pdf_writer import build_text_pdf
+from app.services.report_model import ReportModel
+from app.services.renderer import WEASYPRINT_AVAILABLE, RendererPool
+
+# PAGE_CSS is the user stylesheet passed to WeasyPrint, so renderer workers parse it once (see
+# renderer.py). REPORT_CSS stays inline in the HTML, where the baseline report had it, so its
+# place in the cascade (and the @page margins it overrides) is unchanged.
+PAGE_CSS = "@page { size: A4; margin: 20mm; }"
+REPORT_CSS = """
+@page {
+  size: A4;
+  margin: 15mm 15mm 18mm 15mm;
+}
+body {
+  font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+  color: #1f2937;
+  background: #f8fafc;
+  font-size: 13px;
+}
+h1, h2, h3, h4 {
+  margin: 0;
+  font-weight: 700;
+}
+.header {
+  background: linear-gradient(135deg, #1e3a8a 0%, #312e81 100%);
+  color: white;
+  padding: 18px;
+  border-radius: 12px;
+  margin-bottom: 14px;
+  box-shadow: 0 4px 14px rgba(0,0,0,0.12);
+}
+.header .title {
+  font-size: 20px;
+  letter-spacing: 0.3px;
+}
+.header .subtitle {
+  opacity: 0.9;
+  font-size: 13px;
+  margin-top: 4px;
+}
+.tag {
+  display: inline-block;
+  padding: 4px 8px;
+  border-radius: 999px;
+  font-size: 12px;
+  background: rgba(255,255,255,0.15);
+  margin-left: 6px;
+}
+.section {
+  background: #fff;
+  border-radius: 10px;
+  padding: 14px;
+  box-shadow: 0 1px 4px rgba(0,0,0,0.06);
+  margin-bottom: 10px;
+  border: 1px solid #e5e7eb;
+}
+.section h3 {
+  margin-bottom: 8px;
+  color: #111827;
+  font-size: 15px;
+  letter-spacing: 0.2px;
+}
+.grid {
+  display: grid;
+  grid-template-columns: repeat(auto-fit, minmax(220px, 1fr));
+  gap: 8px;
+}
+.card {
+  background: #f8fafc;
+  border: 1px solid #e5e7eb;
+  border-radius: 8px;
+  padding: 10px 12px;
+  box-shadow: inset 0 1px 0 rgba(255,255,255,0.6);
+}
+.label {
+  font-size: 11px;
+  color: #6b7280;
+  text-transform: uppercase;
+  letter-spacing: 0.3px;
+}
+.value {
+  font-size: 22px;
+  font-weight: 800;
+  color: #1d4ed8;
+}
+.pill {
+  display: inline-block;
+  padding: 3px 8px;
+  border-radius: 999px;
+  font-size: 11px;
+  font-weight: 700;
+  margin-left: 6px;
+}
+.pill-high { background: #fee2e2; color: #b91c1c; }
+.pill-medium { background: #fef9c3; color: #b45309; }
+.pill-low { background: #dcfce7; color: #166534; }
+.list {
+  margin: 6px 0 0 0;
+  padding-left: 16px;
+  color: #374151;
+  font-size: 13px;
+  line-height: 1.5;
+}
+.rule {
+  border: 1px solid #e5e7eb;
+  border-radius: 10px;
+  padding: 12px;
+  margin-bottom: 8px;
+  background: linear-gradient(180deg, #ffffff 0%, #f8fafc 100%);
+  box-shadow: 0 1px 3px rgba(0,0,0,0.08);
+}
+.rule-title {
+  display: flex;
+  align-items: center;
+  gap: 10px;
+  font-weight: 700;
+  margin-bottom: 6px;
+  color: #111827;
+}
+.rule-body {
+  font-size: 13px;
+  color: #1f2937;
+  line-height: 1.5;
+  white-space: pre-wrap;
+}
+.subhead {
+  font-weight: 700;
+  margin-top: 8px;
+  margin-bottom: 4px;
+  color: #111827;
+}
+.muted {
+  color: #6b7280;
+  font-size: 12px;
+}
+.spacer { margin-top: 8px; }
+.footer-note {
+  font-size: 12px;
+  color: #6b7280;
+  margin-top: 8px;
+}
+"""
+
+def _render_html(filename: str, model: ReportModel, tasks_data: Dict[str, Any] = None) -> str:
     now = datetime.datetime.now().strftime("%d %B %Y, %I:%M %p")
 
-    def bucket(item: RegulationItem) -> str:
-        sev = (getattr(item, "severity", None) or "").lower()
-        if sev in ("high", "medium", "low"):
-            return sev
-        cat = (getattr(item, "category", None) or "").upper()
-        if cat in ("HIGH", "CRITICAL"):
-            return "high"
-        if cat == "MEDIUM":
-            return "medium"
-        if cat == "LOW":
-            return "low"
-        return "unknown"
-
-    def count_by_sev(item_list: List[RegulationItem]):
-        hi = med = lo = 0
-        for i in item_list:
-            b = bucket(i)
-            if b == "high":
-                hi += 1
-            elif b == "medium":
-                med += 1
-            elif b == "low":
-                lo += 1
-        return hi, med, lo
-
-    total = len(items)
-    high, medium, low = count_by_sev(items)
-    high_pct = _percent(high, total)
-    medium_pct = _percent(medium, total)
-    low_pct = _percent(low, total)
-
-    manual_hours_baseline = 8.8 if total >= 200 else 4.5
-    manual_hours_calc = max(manual_hours_baseline, (total * 2.2) / 60)
-    auto_minutes = max(1, min(5, math.ceil(total / 50)))
-    time_saved_hours = max(0, manual_hours_calc - (auto_minutes / 60))
-    hourly_rate = 100
-    value_saved = int(time_saved_hours * hourly_rate)
-
-    stakeholders = _compute_stakeholders(items)
-    high_items = sorted(
-        [i for i in items if bucket(i) == "high"],
-        key=lambda r: getattr(r, "score", 0),
-        reverse=True,
-    )
-    sample_high = high_items[:3]
-
-    medium_items = sorted(
-        [i for i in items if bucket(i) == "medium"],
-        key=lambda r: getattr(r, "score", 0),
-        reverse=True,
-    )
-    sample_medium = medium_items[:3]
-
-    low_items = sorted(
-        [i for i in items if bucket(i) == "low"],
-        key=lambda r: getattr(r, "score", 0),
-        reverse=True,
-    )
-    sample_low = low_items[:3]
-
-    applied_rules = []
-    for r in (detection_rules or []):
-        if not r.get("enabled", True):
-            continue
-        hits = _count_rule_hits(items, r)
-        applied_rules.append((html.escape(r.get("keyword") or "?"), html.escape(r.get("severity") or "Unknown"), hits))
+    total = model.total
+    high, medium, low = model.counts["high"], model.counts["medium"], model.counts["low"]
+    high_pct = model.percent("high")
+    medium_pct = model.percent("medium")
+    low_pct = model.percent("low")
+
+    manual_hours_calc = model.manual_hours
+    auto_minutes = model.auto_minutes
+    time_saved_hours = model.time_saved_hours
+    hourly_rate = model.hourly_rate
+    value_saved = model.value_saved
+
+    stakeholders = model.stakeholders
+    sample_high = model.top["high"]
+    sample_medium = model.top["medium"]
+    sample_low = model.top["low"]
+
+    applied_rules = [(html.escape(kw), html.escape(sev), hits) for kw, sev, hits in model.rule_hits]
 
     # Tasks / workflow extraction
     columns = (tasks_data or {}).get("columns") if tasks_data else {}
@@ -147,16 +181,13 @@ def _render_html(filename: str, items: List[RegulationItem], detection_rules: li
             return collected
         for key in target_keys:
             for rule in (columns_dict.get(key) or []):
-                # rule can be dict or model; normalize
-                rid = getattr(rule, "control_id", None) or (rule.get("control_id") if isinstance(rule, dict) else "")
+                # rule can be dict or model; only the fields rendered below are read
                 if isinstance(rule, dict):
-                    rdict = dict(rule)
-                elif hasattr(rule, "model_dump"):
-                    rdict = rule.model_dump()
-                elif hasattr(rule, "dict"):
-                    rdict = rule.dict()
+                    rid = rule.get("control_id") or ""
+                    rdict = {"control_id": rid, "text": rule.get("text"), "severity": rule.get("severity"), "section": rule.get("section")}
                 else:
-                    rdict = {}
+                    rid = getattr(rule, "control_id", None) or ""
+                    rdict = {"control_id": rid, "text": getattr(rule, "text", None), "severity": getattr(rule, "severity", None), "section": getattr(rule, "section", None)}
                 rdict["__steps"] = steps_by_rule.get(rid, []) if isinstance(steps_by_rule, dict) else []
                 collected.append(rdict)
         return collected
@@ -238,17 +269,14 @@ def _render_html(filename: str, items: List[RegulationItem], detection_rules: li
         parts = re.split(r'(?<=[.!?])\s+', text.strip())
         return parts[0] if parts else text.strip()
 
-    def _section_label(text: str) -> str:
-        match = re.search(r"\b[Ss]ection\s+\d+[A-Za-z0-9()]*", text or "")
-        return match.group(0) if match else ""
-
     def _format_rule_header(item) -> str:
-        section = _section_label(getattr(item, "text", ""))
+        # Citation of the item's node in the parse-time section tree.
+        section = getattr(item, "section", None) or ""
         section_part = f" | {html.escape(section)}" if section else ""
         return f"{html.escape(getattr(item, 'control_id', '') or '')}{section_part} | {html.escape(getattr(item, 'severity', '') or '')}"
 
     def _format_rule_header_dict(rule_dict: dict) -> str:
-        section = _section_label(rule_dict.get("text") or "")
+        section = rule_dict.get("section") or ""
         section_part = f" | {html.escape(section)}" if section else ""
         return f"{html.escape(rule_dict.get('control_id') or '')}{section_part} | {html.escape(rule_dict.get('severity') or '')}"
 
@@ -258,140 +286,7 @@ def _render_html(filename: str, items: List[RegulationItem], detection_rules: li
     <head>
       <meta charset="UTF-8">
       <title>ReguGuard Analysis Report</title>
-      <style>
-        @page {{
-          size: A4;
-          margin: 15mm 15mm 18mm 15mm;
-        }}
-        body {{
-          font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-          color: #1f2937;
-          background: #f8fafc;
-          font-size: 13px;
-        }}
-        h1, h2, h3, h4 {{
-          margin: 0;
-          font-weight: 700;
-        }}
-        .header {{
-          background: linear-gradient(135deg, #1e3a8a 0%, #312e81 100%);
-          color: white;
-          padding: 18px;
-          border-radius: 12px;
-          margin-bottom: 14px;
-          box-shadow: 0 4px 14px rgba(0,0,0,0.12);
-        }}
-        .header .title {{
-          font-size: 20px;
-          letter-spacing: 0.3px;
-        }}
-        .header .subtitle {{
-          opacity: 0.9;
-          font-size: 13px;
-          margin-top: 4px;
-        }}
-        .tag {{
-          display: inline-block;
-          padding: 4px 8px;
-          border-radius: 999px;
-          font-size: 12px;
-          background: rgba(255,255,255,0.15);
-          margin-left: 6px;
-        }}
-        .section {{
-          background: #fff;
-          border-radius: 10px;
-          padding: 14px;
-          box-shadow: 0 1px 4px rgba(0,0,0,0.06);
-          margin-bottom: 10px;
-          border: 1px solid #e5e7eb;
-        }}
-        .section h3 {{
-          margin-bottom: 8px;
-          color: #111827;
-          font-size: 15px;
-          letter-spacing: 0.2px;
-        }}
-        .grid {{
-          display: grid;
-          grid-template-columns: repeat(auto-fit, minmax(220px, 1fr));
-          gap: 8px;
-        }}
-        .card {{
-          background: #f8fafc;
-          border: 1px solid #e5e7eb;
-          border-radius: 8px;
-          padding: 10px 12px;
-          box-shadow: inset 0 1px 0 rgba(255,255,255,0.6);
-        }}
-        .label {{
-          font-size: 11px;
-          color: #6b7280;
-          text-transform: uppercase;
-          letter-spacing: 0.3px;
-        }}
-        .value {{
-          font-size: 22px;
-          font-weight: 800;
-          color: #1d4ed8;
-        }}
-        .pill {{
-          display: inline-block;
-          padding: 3px 8px;
-          border-radius: 999px;
-          font-size: 11px;
-          font-weight: 700;
-          margin-left: 6px;
-        }}
-        .pill-high {{ background: #fee2e2; color: #b91c1c; }}
-        .pill-medium {{ background: #fef9c3; color: #b45309; }}
-        .pill-low {{ background: #dcfce7; color: #166534; }}
-        .list {{
-          margin: 6px 0 0 0;
-          padding-left: 16px;
-          color: #374151;
-          font-size: 13px;
-          line-height: 1.5;
-        }}
-        .rule {{
-          border: 1px solid #e5e7eb;
-          border-radius: 10px;
-          padding: 12px;
-          margin-bottom: 8px;
-          background: linear-gradient(180deg, #ffffff 0%, #f8fafc 100%);
-          box-shadow: 0 1px 3px rgba(0,0,0,0.08);
-        }}
-        .rule-title {{
-          display: flex;
-          align-items: center;
-          gap: 10px;
-          font-weight: 700;
-          margin-bottom: 6px;
-          color: #111827;
-        }}
-        .rule-body {{
-          font-size: 13px;
-          color: #1f2937;
-          line-height: 1.5;
-          white-space: pre-wrap;
-        }}
-        .subhead {{
-          font-weight: 700;
-          margin-top: 8px;
-          margin-bottom: 4px;
-          color: #111827;
-        }}
-        .muted {{
-          color: #6b7280;
-          font-size: 12px;
-        }}
-        .spacer {{ margin-top: 8px; }}
-        .footer-note {{
-          font-size: 12px;
-          color: #6b7280;
-          margin-top: 8px;
-        }}
-      </style>
+      <style>{REPORT_CSS}</style>
     </head>
     <body>
       <div class="header">
@@ -576,47 +471,24 @@ def _render_html(filename: str, items: List[RegulationItem], detection_rules: li
     return html_doc
 
 
-def _build_plain_pdf(filename: str, items: List[RegulationItem], detection_rules: list = None) -> bytes:
-    def bucket(item: RegulationItem) -> str:
-        sev = (getattr(item, "severity", None) or "").lower()
-        if sev in ("high", "medium", "low"):
-            return sev
-        cat = (getattr(item, "category", None) or "").upper()
-        if cat in ("HIGH", "CRITICAL"):
-            return "high"
-        if cat == "MEDIUM":
-            return "medium"
-        if cat == "LOW":
-            return "low"
-        return "unknown"
-
+def _build_plain_pdf(filename: str, model: ReportModel) -> bytes:
     # Basic text-only PDF fallback (monospace), paginated.
     now = datetime.datetime.now().strftime("%d %B %Y, %I:%M %p")
-    total = len(items)
-    high = sum(1 for i in items if bucket(i) == "high")
-    medium = sum(1 for i in items if bucket(i) == "medium")
-    low = sum(1 for i in items if bucket(i) == "low")
-    high_pct = _percent(high, total)
-    medium_pct = _percent(medium, total)
-    low_pct = _percent(low, total)
-
-    manual_hours_baseline = 8.8 if total >= 200 else 4.5
-    manual_hours_calc = max(manual_hours_baseline, (total * 2.2) / 60)
-    auto_minutes = max(1, min(5, math.ceil(total / 50)))
-    time_saved_hours = max(0, manual_hours_calc - (auto_minutes / 60))
-    hourly_rate = 100
-    value_saved = int(time_saved_hours * hourly_rate)
-
-    stakeholders = _compute_stakeholders(items)
-    high_items = [i for i in items if bucket(i) == "high"]
-    sample_high = high_items[:3]
-
-    applied_rules = []
-    for r in (detection_rules or []):
-        if not r.get("enabled", True):
-            continue
-        hits = _count_rule_hits(items, r)
-        applied_rules.append((r.get("keyword") or "?", r.get("severity") or "Unknown", hits))
+    total = model.total
+    high, medium, low = model.counts["high"], model.counts["medium"], model.counts["low"]
+    high_pct = model.percent("high")
+    medium_pct = model.percent("medium")
+    low_pct = model.percent("low")
+
+    manual_hours_calc = model.manual_hours
+    auto_minutes = model.auto_minutes
+    time_saved_hours = model.time_saved_hours
+    hourly_rate = model.hourly_rate
+    value_saved = model.value_saved
+
+    stakeholders = model.stakeholders
+    sample_high = model.first["high"]  # the first high-priority items, in document order
+    applied_rules = model.rule_hits
 
     def wrap(text: str, width: int = 70) -> List[str]:
         words = text.split()
@@ -665,7 +537,8 @@ def _build_plain_pdf(filename: str, items: List[RegulationItem], detection_rules
     lines.append(f"HIGH PRIORITY OBLIGATIONS ({high})")
     lines.append("-" * 30)
     for item in sample_high:
-        lines.append(f"{item.control_id} | {item.severity}")
+        section_part = f" | {item.section}" if item.section else ""
+        lines.append(f"{item.control_id}{section_part} | {item.severity}")
         lines.append("-" * 60)
         lines.append("Legal Requirement:")
         lines.extend(wrap(item.text))
@@ -711,62 +584,24 @@ def _build_plain_pdf(filename: str, items: List[RegulationItem], detection_rules
     if cur:
         pages.append(cur)
 
-    buf = io.BytesIO()
-    objs = []
-
-    def add_obj(content: str):
-        objs.append(content)
-        return len(objs)
-
-    font_obj = add_obj("<< /Type /Font /Subtype /Type1 /BaseFont /Courier >>")
-    page_ids = []
-    for page_lines in pages:
-        content_parts = ["BT", "/F1 11 Tf", "40 760 Td", "14 TL"]
-        for line in page_lines:
-            content_parts.append(f"({_escape_text(line)}) Tj")
-            content_parts.append("T*")
-        content_parts.append("ET")
-        content_stream = "\n".join(content_parts)
-        content_obj = add_obj(f"<< /Length {len(content_stream.encode('utf-8'))} >>\nstream\n{content_stream}\nendstream")
-        page_obj = add_obj(f"<< /Type /Page /Parent 0 0 R /MediaBox [0 0 612 792] /Contents {content_obj} 0 R /Resources << /Font << /F1 {font_obj} 0 R >> >> >>")
-        page_ids.append(page_obj)
-
-    kids = " ".join([f"{pid} 0 R" for pid in page_ids])
-    pages_obj = add_obj(f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>")
-
-    corrected = []
-    for idx, obj in enumerate(objs, start=1):
-        if idx in page_ids:
-            corrected.append(obj.replace("/Parent 0 0 R", f"/Parent {pages_obj} 0 R"))
-        else:
-            corrected.append(obj)
-    objs = corrected
-
-    catalog_obj = add_obj(f"<< /Type /Catalog /Pages {pages_obj} 0 R >>")
-
-    offsets = []
-    buf.write(b"%PDF-1.4\n")
-    for obj_id, obj in enumerate(objs, start=1):
-        offsets.append(buf.tell())
-        buf.write(f"{obj_id} 0 obj\n".encode("utf-8"))
-        buf.write(obj.encode("utf-8"))
-        buf.write(b"\nendobj\n")
-    xref_offset = buf.tell()
-    buf.write(f"xref\n0 {len(objs)+1}\n".encode("utf-8"))
-    buf.write(b"0000000000 65535 f \n")
-    for off in offsets:
-        buf.write(f"{off:010d} 00000 n \n".encode("utf-8"))
-    buf.write(b"trailer\n")
-    buf.write(f"<< /Size {len(objs)+1} /Root {catalog_obj} 0 R >>\n".encode("utf-8"))
-    buf.write(b"startxref\n")
-    buf.write(f"{xref_offset}\n".encode("utf-8"))
-    buf.write(b"%%EOF")
-    return buf.getvalue()
-
-
-def build_pdf_report(filename: str, items: List[RegulationItem], detection_rules: list = None, tasks_data: Dict[str, Any] = None) -> bytes:
+    return build_text_pdf(pages)
+
+
+def build_pdf_report(filename: str, items: List[RegulationItem], detection_rules: list = None, tasks_data: Dict[str, Any] = None, in_process: bool = False) -> bytes:
+    checkpoint("aggregate", report_items=len(items))
+    with memory_tracker.stage("aggregate"):
+        model = ReportModel.build(items, detection_rules)
     if WEASYPRINT_AVAILABLE:
-        html = _render_html(filename, items, detection_rules, tasks_data=tasks_data)
-        return HTML(string=html).write_pdf(stylesheets=[CSS(string="@page { size: A4; margin: 20mm; }")])
+        checkpoint("html")
+        with memory_tracker.stage("html"):
+            html = _render_html(filename, model, tasks_data=tasks_data)
+        checkpoint("render")
+        with memory_tracker.stage("render"):
+            return renderer_pool.render(html, in_process=in_process)
     # Fallback to plain PDF
-    return _build_plain_pdf(filename, items, detection_rules)
+    checkpoint("render")
+    with memory_tracker.stage("render"):
+        return _build_plain_pdf(filename, model)
+
+
+renderer_pool = RendererPool((PAGE_CSS,))
@@ -0,0 +1,144 @@
+import heapq
+import math
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.schemas import RegulationItem
+
+# Everything the reports and the summary endpoint show about a set of obligations, computed in a
+# single pass over the items: severity buckets and counts, the top-scoring and the first items per
+# bucket, detection-rule hit counts, stakeholder relevance and the "value delivered" KPIs.
+
+BUCKETS = ("high", "medium", "low")
+DEFAULT_TOP_K = 3
+HOURLY_RATE = 100
+
+# Stakeholder profiles for scoring relevance
+STAKEHOLDER_PROFILES = [
+    ("Compliance Analysts", ["shall", "must", "regulation", "obligation", "section", "chapter", "compliance"]),
+    ("Data Protection Officers", ["personal data", "controller", "processor", "consent", "notice", "retention", "transfer", "data protection", "dpo"]),
+    ("IT Auditors", ["security", "access", "audit", "log", "encryption", "system", "technical", "controls", "monitor"]),
+    ("GRC Consultants", ["risk", "governance", "policy", "framework", "assessment", "control", "scope", "gap analysis"]),
+]
+
+
+def bucket(item: RegulationItem) -> str:
+    sev = (getattr(item, "severity", None) or "").lower()
+    if sev in BUCKETS:
+        return sev
+    cat = (getattr(item, "category", None) or "").upper()
+    if cat in ("HIGH", "CRITICAL"):
+        return "high"
+    if cat == "MEDIUM":
+        return "medium"
+    if cat == "LOW":
+        return "low"
+    return "unknown"
+
+
+def percent(part: int, total: int) -> int:
+    return int(round((part / total) * 100)) if total else 0
+
+
+def _rule_matcher(rule: dict) -> Optional[Callable[[str, str], bool]]:
+    # Returns matcher(text, lowered_text), or None for rules that can never match.
+    keyword = (rule.get("keyword") or "").lower().strip()
+    if not keyword:
+        return None
+    match_type = (rule.get("match_type") or "contains").lower()
+    if match_type == "exact":
+        return lambda text, lowered: lowered.strip() == keyword
+    if match_type == "startswith":
+        return lambda text, lowered: lowered.strip().startswith(keyword)
+    if match_type == "regex":
+        try:
+            pattern = re.compile(rule.get("keyword", ""), re.IGNORECASE)
+        except re.error:
+            return None
+        return lambda text, lowered: pattern.search(text) is not None
+    return lambda text, lowered: keyword in lowered
+
+
+class ReportModel:
+    """
+    Aggregates for one report. Build it with ReportModel.build(items, detection_rules).
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.counts: Dict[str, int] = {name: 0 for name in BUCKETS + ("unknown",)}
+        self.top: Dict[str, List[RegulationItem]] = {name: [] for name in BUCKETS}  # highest score first
+        self.first: Dict[str, List[RegulationItem]] = {name: [] for name in BUCKETS}  # document order
+        self.rule_hits: List[Tuple[str, str, int]] = []  # (keyword, severity, matches) per enabled rule
+        self.stakeholders: List[Tuple[str, int]] = []  # most relevant first
+
+    @classmethod
+    def build(cls, items: List[RegulationItem], detection_rules: list = None, top_k: int = DEFAULT_TOP_K) -> "ReportModel":
+        model = cls()
+        rules = [rule for rule in (detection_rules or []) if rule.get("enabled", True)]
+        matchers = [_rule_matcher(rule) for rule in rules]
+        hits = [0] * len(rules)
+        # Min-heaps of (score, -position, item): the first-listed item wins ties, like a stable sort.
+        heaps: Dict[str, list] = {name: [] for name in BUCKETS}
+        lowered_texts = []
+
+        for position, item in enumerate(items):
+            name = bucket(item)
+            model.counts[name] += 1
+            heap = heaps.get(name)
+            if heap is not None and len(model.first[name]) < top_k:
+                model.first[name].append(item)
+            if heap is not None and top_k > 0:
+                entry = (getattr(item, "score", 0), -position, item)
+                if len(heap) < top_k:
+                    heapq.heappush(heap, entry)
+                elif entry[:2] > heap[0][:2]:
+                    heapq.heapreplace(heap, entry)
+
+            text = item.text or ""
+            lowered = text.lower()
+            lowered_texts.append(lowered)
+            for index, matcher in enumerate(matchers):
+                if matcher is not None and matcher(text, lowered):
+                    hits[index] += 1
+
+        model.total = len(items)
+        for name, heap in heaps.items():
+            model.top[name] = [item for _, _, item in sorted(heap, key=lambda entry: entry[:2], reverse=True)]
+        model.rule_hits = [
+            (rule.get("keyword") or "?", rule.get("severity") or "Unknown", count)
+            for rule, count in zip(rules, hits)
+        ]
+
+        # Keyword counts run over the joined corpus, so phrases spanning two items still count.
+        corpus = " ".join(lowered_texts)
+        model.stakeholders = sorted(
+            ((name, sum(corpus.count(kw) for kw in keywords)) for name, keywords in STAKEHOLDER_PROFILES),
+            key=lambda x: x[1],
+            reverse=True,
+        )
+        return model
+
+    def percent(self, name: str) -> int:
+        return percent(self.counts[name], self.total)
+
+    @property
+    def manual_hours(self) -> float:
+        baseline = 8.8 if self.total >= 200 else 4.5
+        return max(baseline, (self.total * 2.2) / 60)
+
+    @property
+    def auto_minutes(self) -> int:
+        return max(1, min(5, math.ceil(self.total / 50)))
+
+    @property
+    def time_saved_hours(self) -> float:
+        return max(0, self.manual_hours - (self.auto_minutes / 60))
+
+    @property
+    def hourly_rate(self) -> int:
+        return HOURLY_RATE
+
+    @property
+    def value_saved(self) -> int:
+        return int(self.time_saved_hours * HOURLY_RATE)
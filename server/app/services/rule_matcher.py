@@ -0,0 +1,130 @@
+import re
+from typing import Callable, Dict, List, Tuple
+
+# Combined matcher for several detection rule sets. Every distinct (match_type, keyword) test and
+# every distinct must_also/must_not term is evaluated once per sentence, then each rule set only
+# combines the precomputed booleans. Semantics mirror RegulatoryParser.match_detection_rules().
+
+_Test = Callable[[str, str, str], bool]
+
+
+def _compile_test(match_type: str, keyword: str, raw_keyword: str) -> _Test:
+    if match_type == "exact":
+        return lambda text, lower, stripped: stripped == keyword
+    if match_type == "startswith":
+        return lambda text, lower, stripped: stripped.startswith(keyword)
+    if match_type == "regex":
+        try:
+            pattern = re.compile(raw_keyword, re.IGNORECASE)
+        except re.error:
+            return lambda text, lower, stripped: False
+        return lambda text, lower, stripped: pattern.search(text) is not None
+    # contains (default)
+    return lambda text, lower, stripped: keyword in lower
+
+
+class MultiRuleSetMatcher:
+    def __init__(self, rule_sets: List[list]):
+        self._test_index: Dict[Tuple[str, str], int] = {}
+        self._tests: List[_Test] = []
+        self._term_index: Dict[str, int] = {}
+        self._terms: List[str] = []
+        self._plans = [self._plan(rules or []) for rules in rule_sets]
+
+    def _test_id(self, rule: dict) -> int:
+        match_type = rule.get("match_type", "contains").lower()
+        raw_keyword = rule.get("keyword", "")
+        keyword = (rule.get("keyword") or "").lower()
+        # Regex tests use the raw keyword; the others compare lower-cased text.
+        key = (match_type, raw_keyword if match_type == "regex" else keyword)
+        if key not in self._test_index:
+            self._test_index[key] = len(self._tests)
+            self._tests.append(_compile_test(match_type, keyword, raw_keyword))
+        return self._test_index[key]
+
+    def _term_ids(self, terms) -> Tuple[int, ...]:
+        ids = []
+        for term in terms or []:
+            if not term:
+                continue
+            term = term.lower()
+            if term not in self._term_index:
+                self._term_index[term] = len(self._terms)
+                self._terms.append(term)
+            ids.append(self._term_index[term])
+        return tuple(ids)
+
+    def _plan(self, rules: list):
+        plan = []
+        for rule in rules:
+            if not rule.get("enabled", True):
+                continue
+            plan.append((
+                rule,
+                self._test_id(rule),
+                self._term_ids(rule.get("must_also_contain", [])),
+                self._term_ids(rule.get("must_not_contain", [])),
+            ))
+        return plan
+
+    @property
+    def rule_set_count(self) -> int:
+        return len(self._plans)
+
+    def match(self, text: str) -> List[List[dict]]:
+        """
+        Returns, for each rule set in order, the list of rules matching the text.
+        """
+        lower = text.lower()
+        stripped = lower.strip()
+        tests = [test(text, lower, stripped) for test in self._tests]
+        terms = [term in lower for term in self._terms]
+        results = []
+        for plan in self._plans:
+            matched = []
+            for rule, test_id, also_ids, not_ids in plan:
+                if not tests[test_id]:
+                    continue
+                if also_ids and not all(terms[i] for i in also_ids):
+                    continue
+                if not_ids and any(terms[i] for i in not_ids):
+                    continue
+                matched.append(rule)
+            results.append(matched)
+        return results
+
+
+class CompiledRules:
+    """
+    One rule set compiled for repeated matching: match(text) returns the same rules, in the same
+    order, as RegulatoryParser.match_detection_rules(text, rules).
+    """
+
+    def __init__(self, rules: list):
+        self.rules = rules
+        self._plan = []
+        for rule in rules:
+            if not rule.get("enabled", True):
+                continue
+            match_type = rule.get("match_type", "contains").lower()
+            keyword = (rule.get("keyword") or "").lower()
+            self._plan.append((
+                rule,
+                _compile_test(match_type, keyword, rule.get("keyword", "")),
+                tuple(term.lower() for term in rule.get("must_also_contain", []) or [] if term),
+                tuple(term.lower() for term in rule.get("must_not_contain", []) or [] if term),
+            ))
+
+    def match(self, text: str) -> List[dict]:
+        lower = text.lower()
+        stripped = lower.strip()
+        matched = []
+        for rule, test, must_also, must_not in self._plan:
+            if not test(text, lower, stripped):
+                continue
+            if must_also and not all(term in lower for term in must_also):
+                continue
+            if must_not and any(term in lower for term in must_not):
+                continue
+            matched.append(rule)
+        return matched
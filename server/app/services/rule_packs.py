@@ -0,0 +1,254 @@
+import datetime
+import os
+import re
+import threading
+from typing import Dict, List, Optional
+
+from app.services.parser import RegulatoryParser, parser, rules_fingerprint
+from app.services.storage import DATA_DIR, load_json, write_json
+
+# Named, versioned detection rule packs kept on the server, so requests send a pack id (and
+# optionally a version) instead of the full rule list. Built-in packs ship with the code and are
+# read-only; user packs are stored in rule_packs.json and every save that changes a pack adds a
+# version. Each version is validated when it is loaded or saved; the latest version of every pack
+# is compiled then and its matcher stays pinned in the parser, while older versions are compiled
+# on use and share the parser's LRU of matchers. A pack states explicitly whether the
+# parser's heuristic fallbacks (actor + modal, generic obligation signals) apply on top of its
+# rules, replacing the field-by-field comparison with the defaults for pack requests.
+
+RULE_PACKS_PATH = os.path.join(DATA_DIR, "rule_packs.json")
+DEFAULT_PACK_ID = "pdpa-default"
+MATCH_TYPES = ("contains", "exact", "startswith", "regex")
+SEVERITIES = ("critical", "high", "medium", "low", "unknown", "any")
+_PACK_ID = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
+
+
+def _rule(rule_id: str, keyword: str, severity: str, **extra) -> dict:
+    return {"id": rule_id, "keyword": keyword, "severity": severity, "match_type": "contains", "enabled": True, **extra}
+
+
+BUILTIN_PACKS = {
+    DEFAULT_PACK_ID: {
+        "name": "PDPA (default)",
+        "description": "The parser's default modal-verb rules, with heuristic fallbacks.",
+        "heuristics": True,
+        "rules": RegulatoryParser.DEFAULT_DETECTION_RULES,
+    },
+    "gdpr": {
+        "name": "GDPR",
+        "description": "Controller and processor duties, deadlines and prohibitions.",
+        "heuristics": False,
+        "rules": [
+            _rule("gdpr-shall", "shall", "High"),
+            _rule("gdpr-must", "must", "High"),
+            _rule("gdpr-prohibited", "prohibited", "High"),
+            _rule("gdpr-undue-delay", "without undue delay", "High"),
+            _rule("gdpr-72-hours", "72 hours", "Critical"),
+            _rule("gdpr-required", "required", "Medium"),
+            _rule("gdpr-ensure", "ensure", "Medium"),
+            _rule("gdpr-should", "should", "Low"),
+            _rule("gdpr-may", "may", "Low", must_also_contain=["controller"]),
+        ],
+    },
+    "hipaa": {
+        "name": "HIPAA Security Rule",
+        "description": "Standards and required or addressable implementation specifications.",
+        "heuristics": False,
+        "rules": [
+            _rule("hipaa-must", "must", "High"),
+            _rule("hipaa-shall", "shall", "High"),
+            _rule("hipaa-required", "(required)", "High"),
+            _rule("hipaa-addressable", "(addressable)", "Medium"),
+            _rule("hipaa-implement", "implement", "Medium"),
+            _rule("hipaa-should", "should", "Low"),
+            _rule("hipaa-may", "may", "Low", must_also_contain=["covered entity"]),
+        ],
+    },
+    "iso-27001": {
+        "name": "ISO/IEC 27001",
+        "description": "ISO verbal forms: shall is a requirement, should a recommendation, may a permission.",
+        "heuristics": False,
+        "rules": [
+            _rule("iso-shall", "shall", "High"),
+            _rule("iso-should", "should", "Medium"),
+            _rule("iso-may", "may", "Low"),
+        ],
+    },
+}
+
+
+def validate_rules(rules) -> List[dict]:
+    """
+    Normalised copy of a rule list; raises ValueError naming the first invalid rule.
+    """
+    if not isinstance(rules, list):
+        raise ValueError("rules must be a list")
+    normalized = []
+    for index, rule in enumerate(rules):
+        if not isinstance(rule, dict):
+            raise ValueError(f"rule {index} must be an object")
+        keyword = rule.get("keyword")
+        if not isinstance(keyword, str) or not keyword.strip():
+            raise ValueError(f"rule {index} needs a keyword")
+        match_type = str(rule.get("match_type") or "contains").lower()
+        if match_type not in MATCH_TYPES:
+            raise ValueError(f"rule {index} has unknown match_type '{match_type}'")
+        if match_type == "regex":
+            try:
+                re.compile(keyword)
+            except re.error as e:
+                raise ValueError(f"rule {index} has an invalid regex: {e}")
+        severity = str(rule.get("severity") or "Unknown")
+        if severity.lower() not in SEVERITIES:
+            raise ValueError(f"rule {index} has unknown severity '{severity}'")
+        cleaned = {**rule, "id": str(rule.get("id") or f"rule-{index + 1}"), "match_type": match_type, "severity": severity}
+        for field in ("must_also_contain", "must_not_contain"):
+            terms = rule.get(field) or []
+            if not isinstance(terms, list) or not all(isinstance(term, str) for term in terms):
+                raise ValueError(f"rule {index}: {field} must be a list of strings")
+            if terms:
+                cleaned[field] = terms
+        normalized.append(cleaned)
+    return normalized
+
+
+class RulePack:
+    def __init__(self, pack_id: str, version: int, name: str, rules: List[dict], heuristics: bool = False,
+                 description: str = "", builtin: bool = False, created_at: Optional[str] = None):
+        self.id = pack_id
+        self.version = version
+        self.name = name
+        self.description = description
+        self.rules = rules
+        self.heuristics = heuristics
+        self.builtin = builtin
+        self.created_at = created_at
+        # Same fingerprint as a parse session with these rules, so the session finds this pack's
+        # compiled matcher and shares chunk cache entries with equivalent inline rules.
+        self.fingerprint = rules_fingerprint(rules, self.rules_only)
+
+    @property
+    def rules_only(self) -> bool:
+        return not self.heuristics
+
+    @property
+    def matcher(self):
+        return parser.compiled_rules(self.rules, self.fingerprint)
+
+    def pin(self) -> None:
+        parser.compiled_rules(self.rules, self.fingerprint, pin=True)
+
+    def unpin(self) -> None:
+        parser.unpin(self.fingerprint)
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "version": self.version,
+            "name": self.name,
+            "description": self.description,
+            "heuristics": self.heuristics,
+            "builtin": self.builtin,
+            "rule_count": len(self.rules),
+            "fingerprint": self.fingerprint,
+            "created_at": self.created_at,
+        }
+
+    def to_json(self) -> dict:
+        return {
+            "version": self.version,
+            "name": self.name,
+            "description": self.description,
+            "heuristics": self.heuristics,
+            "rules": self.rules,
+            "created_at": self.created_at,
+        }
+
+
+class RulePackStore:
+    def __init__(self, path: str = RULE_PACKS_PATH):
+        self.path = path
+        self._packs: Optional[Dict[str, List[RulePack]]] = None  # id -> versions, oldest first
+        self._lock = threading.Lock()
+
+    def _all(self) -> Dict[str, List[RulePack]]:
+        if self._packs is None:
+            packs = {
+                pack_id: [RulePack(pack_id, 1, spec["name"], validate_rules(spec["rules"]), spec["heuristics"], spec["description"], builtin=True)]
+                for pack_id, spec in BUILTIN_PACKS.items()
+            }
+            for pack_id, versions in load_json(self.path, {}).items():
+                if pack_id in packs:
+                    continue
+                packs[pack_id] = [
+                    RulePack(pack_id, v["version"], v["name"], validate_rules(v["rules"]), v.get("heuristics", False), v.get("description", ""), created_at=v.get("created_at"))
+                    for v in versions
+                ]
+            for versions in packs.values():
+                versions[-1].pin()
+            self._packs = packs
+        return self._packs
+
+    def load(self) -> int:
+        """
+        Reads and compiles every pack version (at startup). Returns the number of packs.
+        """
+        with self._lock:
+            return len(self._all())
+
+    def list(self) -> List[RulePack]:
+        # Latest version of every pack.
+        with self._lock:
+            return [versions[-1] for versions in self._all().values()]
+
+    def get(self, pack_id: str, version: Optional[int] = None) -> Optional[RulePack]:
+        with self._lock:
+            versions = self._all().get(pack_id)
+        if not versions:
+            return None
+        if version is None:
+            return versions[-1]
+        return next((pack for pack in versions if pack.version == version), None)
+
+    def versions(self, pack_id: str) -> List[RulePack]:
+        with self._lock:
+            return list(self._all().get(pack_id, []))
+
+    def save(self, pack_id: str, name: str, rules: list, heuristics: bool = False, description: str = "") -> RulePack:
+        """
+        Adds a version of a user pack (or creates the pack). Saving the latest version's content
+        again returns it unchanged. Raises ValueError for invalid ids or rules and built-in ids.
+        """
+        if not _PACK_ID.match(pack_id or ""):
+            raise ValueError("pack id must be 1-64 lowercase letters, digits, '-' or '_'")
+        if pack_id in BUILTIN_PACKS:
+            raise ValueError(f"'{pack_id}' is a built-in pack and cannot be changed; save a copy under another id")
+        rules = validate_rules(rules)
+        with self._lock:
+            packs = self._all()
+            versions = packs.setdefault(pack_id, [])
+            latest = versions[-1] if versions else None
+            if latest is not None and (latest.name, latest.description, latest.heuristics, latest.rules) == (name, description, heuristics, rules):
+                return latest
+            pack = RulePack(
+                pack_id,
+                latest.version + 1 if latest else 1,
+                name,
+                rules,
+                heuristics,
+                description,
+                created_at=datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            )
+            versions.append(pack)
+            pack.pin()
+            if latest is not None:
+                latest.unpin()
+            write_json(self.path, {
+                pid: [v.to_json() for v in vs]
+                for pid, vs in packs.items()
+                if vs and not vs[0].builtin
+            })
+            return pack
+
+
+rule_pack_store = RulePackStore()
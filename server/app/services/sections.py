@@ -0,0 +1,148 @@
+from bisect import bisect_right
+from typing import List, Optional, Tuple
+
+# Structural index of one parsed document. The parser splits on PART, Division, numbered-section
+# ("12. An organisation ...") and subsection ("(3)") markers; each marker it splits on opens a node
+# here, nested PART > Division > section > subsection. Nodes are numbered in document order, so a
+# node's subtree is the contiguous id range [id, last] and the node enclosing any offset is the
+# last one that started at or before it.
+
+LEVELS = {"part": 0, "division": 1, "section": 2, "subsection": 3}
+FORGET_MIN = 256  # nodes dropped at once by forget_before()
+# Numbers above these are years or citations ("Act 2012. The", "(2020)"), not structure.
+MAX_SECTION_NUMBER = 999
+MAX_SUBSECTION_NUMBER = 99
+
+
+def classify_marker(marker: str) -> Optional[Tuple[str, str]]:
+    """
+    (kind, number) for a split marker such as "PART II", "Division 1", "12. A" or "(3)".
+    """
+    if marker.startswith("PART"):
+        return "part", marker.split()[-1]
+    if marker.startswith("Division"):
+        return "division", marker.split()[-1]
+    if marker.startswith("("):
+        number = marker[1:-1]
+        return ("subsection", number) if int(number) <= MAX_SUBSECTION_NUMBER else None
+    number = marker.split(".", 1)[0]
+    return ("section", number) if int(number) <= MAX_SECTION_NUMBER else None
+
+
+class SectionNode:
+    __slots__ = ("id", "kind", "number", "parent", "start", "end", "last", "citation")
+
+    def __init__(self, node_id: int, kind: str, number: str, parent: Optional["SectionNode"], start: int):
+        self.id = node_id
+        self.kind = kind
+        self.number = number
+        self.parent = parent
+        self.start = start  # normalised offset of the marker
+        self.end: Optional[int] = None  # set when a marker at the same or a higher level starts
+        self.last = node_id  # id of the last node in this subtree
+        self.citation = self._cite()
+
+    @property
+    def level(self) -> int:
+        return LEVELS[self.kind]
+
+    @property
+    def label(self) -> str:
+        if self.kind == "part":
+            return f"Part {self.number}"
+        if self.kind == "division":
+            return f"Division {self.number}"
+        if self.kind == "section":
+            return f"Section {self.number}"
+        return f"({self.number})"
+
+    def _cite(self) -> str:
+        # "Section 12(3)": the section number plus the subsection chain below it ("Part VI (4)"
+        # for subsections outside any numbered section).
+        if self.kind != "subsection":
+            return self.label
+        suffix = f"({self.number})"
+        node = self.parent
+        while node is not None and node.kind == "subsection":
+            suffix = f"({node.number}){suffix}"
+            node = node.parent
+        if node is not None and node.kind == "section":
+            return f"Section {node.number}{suffix}"
+        return f"{node.label} {suffix}" if node is not None else suffix
+
+    def path(self) -> List["SectionNode"]:
+        nodes, node = [], self
+        while node is not None:
+            nodes.append(node)
+            node = node.parent
+        return nodes[::-1]
+
+
+class SectionIndex:
+    def __init__(self):
+        self.nodes: List[SectionNode] = []
+        self._starts: List[int] = []
+        self._open: List[SectionNode] = []  # innermost last
+        self.length: Optional[int] = None  # document length once finished
+        self._first_id = 0  # id of nodes[0]; streaming parses drop the nodes they are past
+
+    def __len__(self) -> int:
+        return self._first_id + len(self.nodes)
+
+    def add_marker(self, marker: str, offset: int) -> Optional[SectionNode]:
+        classified = classify_marker(marker)
+        if classified is None:
+            return None
+        kind, number = classified
+        level = LEVELS[kind]
+        while self._open and self._open[-1].level >= level:
+            self._open.pop().end = offset
+        parent = self._open[-1] if self._open else None
+        node = SectionNode(len(self), kind, number, parent, offset)
+        self.nodes.append(node)
+        self._starts.append(offset)
+        self._open.append(node)
+        ancestor = parent
+        while ancestor is not None:
+            ancestor.last = node.id
+            ancestor = ancestor.parent
+        return node
+
+    def finish(self, length: int) -> None:
+        self.length = length
+        while self._open:
+            self._open.pop().end = length
+
+    def forget_before(self, offset: int) -> None:
+        # Keeps the node enclosing offset and everything after it; ancestors stay reachable
+        # through parent links.
+        i = bisect_right(self._starts, offset) - 1
+        if i >= FORGET_MIN and 2 * i >= len(self._starts):
+            del self.nodes[:i]
+            del self._starts[:i]
+            self._first_id += i
+
+    def node_at(self, offset: int) -> Optional[SectionNode]:
+        # Innermost node enclosing the offset; None before the first marker.
+        i = bisect_right(self._starts, offset) - 1
+        return self.nodes[i] if i >= 0 else None
+
+    def get(self, node_id: int) -> Optional[SectionNode]:
+        index = node_id - self._first_id
+        return self.nodes[index] if 0 <= index < len(self.nodes) else None
+
+    def id_range(self, first_id: int, last_id: Optional[int] = None) -> Tuple[int, int]:
+        """
+        Inclusive node-id range covering the subtrees of first_id through last_id (document
+        order), e.g. Section 12 to Section 15 including their subsections.
+        """
+        first = self.get(first_id)
+        last = self.get(first_id if last_id is None else last_id)
+        if first is None or last is None:
+            raise ValueError("unknown section id")
+        if last.id < first.id:
+            raise ValueError("section range ends before it starts")
+        return first.id, last.last
+
+    def end_of(self, node: SectionNode) -> int:
+        return node.end if node.end is not None else (self.length or node.start)
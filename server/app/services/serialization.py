@@ -0,0 +1,117 @@
+import json
+from typing import List, Optional, Tuple
+
+from pydantic import BaseModel
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except Exception:
+    ORJSON_AVAILABLE = False
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except Exception:
+    BROTLI_AVAILABLE = False
+
+# Response encoding for item-heavy endpoints. Models are serialised by pydantic-core directly to
+# JSON bytes (skipping FastAPI's jsonable_encoder round trip). Clients sending
+# `Accept: application/vnd.regguard.compact+json` get a columnar form where score reasons are
+# interned into a table and score flags are a bitmask, which is most of a large upload's bytes.
+
+COMPACT_MEDIA_TYPE = "application/vnd.regguard.compact+json"
+COMPACT_FORMAT = "compact-v1"
+FLAG_NAMES = ("penalty", "mandatory", "breach", "enforcement")
+ITEM_COLUMNS = (
+    "control_id", "text", "modal_verb", "severity", "score", "category",
+    "flags", "reasons", "action", "duplicates", "start", "end", "page", "stable_id",
+    "section_id", "section",
+)
+BROTLI_QUALITY = 5  # close to gzip's CPU cost with noticeably smaller output
+MIN_COMPRESS_SIZE = 1024
+
+
+def encode_flags(flags: dict) -> int:
+    bits = 0
+    for bit, name in enumerate(FLAG_NAMES):
+        if flags.get(name):
+            bits |= 1 << bit
+    return bits
+
+
+def decode_flags(bits: int) -> dict:
+    return {name: bool(bits & (1 << bit)) for bit, name in enumerate(FLAG_NAMES)}
+
+
+def wants_compact(accept: Optional[str]) -> bool:
+    return bool(accept) and COMPACT_MEDIA_TYPE in accept
+
+
+def dumps(data) -> bytes:
+    if isinstance(data, BaseModel):
+        return data.model_dump_json().encode("utf-8")
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def compact_items(items) -> Tuple[List[str], list]:
+    """
+    Returns (reason table, rows) with rows laid out as ITEM_COLUMNS.
+    """
+    reason_ids = {}
+    rows = []
+    for item in items:
+        rows.append([
+            item.control_id,
+            item.text,
+            item.modal_verb,
+            item.severity,
+            item.score,
+            item.category,
+            encode_flags(item.score_flags or {}),
+            [reason_ids.setdefault(reason, len(reason_ids)) for reason in item.score_reasons],
+            item.action,
+            item.duplicates,
+            item.start,
+            item.end,
+            item.page,
+            item.stable_id,
+            item.section_id,
+            item.section,
+        ])
+    return list(reason_ids), rows
+
+
+def compact_payload(model: BaseModel) -> dict:
+    """
+    Compact form of any response model with an `items` list: the other fields are kept as-is.
+    """
+    payload = model.model_dump(exclude={"items"})
+    reasons, rows = compact_items(model.items)
+    payload.update({
+        "format": COMPACT_FORMAT,
+        "flags": list(FLAG_NAMES),
+        "reasons": reasons,
+        "columns": list(ITEM_COLUMNS),
+        "items": rows,
+    })
+    return payload
+
+
+def compress(body: bytes, accept_encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+    """
+    Brotli-encodes the body when the client accepts it and brotli is installed. Anything else is
+    left to the app-wide GZip middleware.
+    """
+    if not BROTLI_AVAILABLE or len(body) < MIN_COMPRESS_SIZE:
+        return body, None
+    accepted = set()
+    for part in (accept_encoding or "").lower().split(","):
+        coding, _, params = part.partition(";")
+        if params.strip().replace(" ", "") not in ("q=0", "q=0.0"):
+            accepted.add(coding.strip())
+    if "br" not in accepted:
+        return body, None
+    return brotli.compress(body, quality=BROTLI_QUALITY), "br"
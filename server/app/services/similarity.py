@@ -0,0 +1,97 @@
+import hashlib
+import random
+import re
+import zlib
+from typing import Dict, Hashable, Iterable, List, Sequence, Set, Tuple
+
+# Shared text fingerprinting helpers: exact hashes for identical obligations,
+# MinHash signatures + LSH banding to find near-duplicates without comparing every pair.
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+# Leading list/section numbering ("(1)", "(a)", "13.") changes between amendments without changing meaning.
+_NUMBERING_PATTERN = re.compile(r"^\s*(?:\(\w{1,4}\)\s*|\d+[A-Za-z]?\.\s+)+")
+_MERSENNE_PRIME = (1 << 31) - 1
+
+
+def normalize_text(text: str) -> str:
+    stripped = _NUMBERING_PATTERN.sub("", text or "")
+    return " ".join(_TOKEN_PATTERN.findall(stripped.lower()))
+
+
+def fingerprint(text: str) -> str:
+    return hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def shingles(text: str, size: int = 3) -> Set[int]:
+    """
+    Returns the set of hashed word n-grams for the text. Short texts collapse to a single shingle.
+    """
+    tokens = normalize_text(text).split()
+    if not tokens:
+        return set()
+    if len(tokens) <= size:
+        return {zlib.crc32(" ".join(tokens).encode("utf-8"))}
+    return {
+        zlib.crc32(" ".join(tokens[i:i + size]).encode("utf-8"))
+        for i in range(len(tokens) - size + 1)
+    }
+
+
+def jaccard(a: Set[int], b: Set[int]) -> float:
+    if not a and not b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        # Universal hash family h(x) = (a*x + b) mod p; a*x stays below 2**63 for 32-bit shingles.
+        self.params = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, shingle_set: Iterable[int]) -> Tuple[int, ...]:
+        values = list(shingle_set)
+        if not values:
+            return tuple([_MERSENNE_PRIME] * self.num_perm)
+        return tuple(
+            min((a * x + b) % _MERSENNE_PRIME for x in values)
+            for a, b in self.params
+        )
+
+
+class LSHIndex:
+    """
+    Banded locality-sensitive hash over MinHash signatures. Items sharing any band land in the
+    same bucket, so candidate lookup costs one dict probe per band instead of a scan.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.buckets: Dict[Tuple[int, Tuple[int, ...]], List[Hashable]] = {}
+
+    def _band_keys(self, signature: Sequence[int]):
+        for band in range(self.bands):
+            start = band * self.rows
+            yield band, tuple(signature[start:start + self.rows])
+
+    def add(self, key: Hashable, signature: Sequence[int]) -> None:
+        for band_key in self._band_keys(signature):
+            self.buckets.setdefault(band_key, []).append(key)
+
+    def candidates(self, signature: Sequence[int]) -> Set[Hashable]:
+        found: Set[Hashable] = set()
+        for band_key in self._band_keys(signature):
+            found.update(self.buckets.get(band_key, ()))
+        return found
+
+
+minhasher = MinHasher()
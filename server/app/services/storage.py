@@ -0,0 +1,31 @@
+import json
+import os
+from typing import Optional
+
+# JSON file persistence for server/app/data (company profiles, feedback, models).
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+
+
+def load_json(path: str, default):
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return default
+
+
+def write_json(path: str, data, indent: Optional[int] = 2) -> None:
+    # Write to a temp file first so readers never see a half-written file.
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        json.dump(data, fh, indent=indent)
+    os.replace(tmp_path, path)
+
+
+def append_jsonl(path: str, record) -> None:
+    # One compact line per record; appending costs the same however long the log is.
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as fh:
+        fh.write(json.dumps(record) + "\n")
@@ -0,0 +1,206 @@
+import os
+import threading
+import urllib.parse
+import uuid
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+from app.services.storage import DATA_DIR, load_json, write_json
+
+# Server-side Kanban board per stored document. Columns hold control ids only (rule text and
+# scores stay on the document), so a drag or a step edit is a small PATCH and reports can
+# reference the board by document id instead of uploading it. Every board is written to its own
+# file when it is created or changed; the in-memory boards are only a cache of recently used
+# ones, so evicting one (or a restart) never loses an analyst's columns or steps.
+
+TASKS_DIR = os.path.join(DATA_DIR, "task_boards")  # one <document id>.json per board
+BOARD_COLUMNS = ["analyzed", "in-progress", "implemented", "completed-later"]
+MAX_BOARDS = 200
+
+
+class TaskConflictError(Exception):
+    pass
+
+
+class TaskBoardNotFoundError(Exception):
+    pass
+
+
+class TaskBoard:
+    def __init__(self, control_ids: Iterable[str] = (), data: Optional[dict] = None):
+        data = data or {}
+        self.columns: Dict[str, List[str]] = {col: [] for col in BOARD_COLUMNS}
+        self.columns["analyzed"] = list(control_ids)
+        self.columns.update({col: list(ids) for col, ids in (data.get("columns") or {}).items()})
+        self.steps: Dict[str, List[dict]] = data.get("steps") or {}
+        self.version = data.get("version", 0)
+
+    def snapshot(self) -> dict:
+        return {
+            "version": self.version,
+            "columns": {col: list(ids) for col, ids in self.columns.items()},
+            "steps": {rid: [dict(st) for st in steps] for rid, steps in self.steps.items()},
+        }
+
+    def to_dict(self) -> dict:
+        return {"version": self.version, "columns": self.columns, "steps": self.steps}
+
+    def column_of(self) -> Dict[str, str]:
+        return {rid: col for col, ids in self.columns.items() for rid in ids}
+
+
+def _rule_id(entry) -> Optional[str]:
+    # Accept bare ids or the full rule dicts the client board holds.
+    if isinstance(entry, str):
+        return entry
+    if isinstance(entry, dict):
+        return entry.get("control_id")
+    return getattr(entry, "control_id", None)
+
+
+class TaskStore:
+    def __init__(self, boards_dir: str = TASKS_DIR, max_boards: int = MAX_BOARDS):
+        self.boards_dir = boards_dir
+        self.max_boards = max_boards
+        self._boards: "OrderedDict[str, TaskBoard]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _board_path(self, document_id: str) -> str:
+        return os.path.join(self.boards_dir, f"{urllib.parse.quote(document_id, safe='')}.json")
+
+    def _cache(self, document_id: str, board: TaskBoard) -> TaskBoard:
+        self._boards[document_id] = board
+        self._boards.move_to_end(document_id)
+        while len(self._boards) > self.max_boards:
+            self._boards.popitem(last=False)
+        return board
+
+    def _board(self, document_id: str) -> Optional[TaskBoard]:
+        # Never creates a board: one that is neither cached nor on disk is reported as missing.
+        board = self._boards.get(document_id)
+        if board is not None:
+            self._boards.move_to_end(document_id)
+            return board
+        data = load_json(self._board_path(document_id), None)
+        return self._cache(document_id, TaskBoard(data=data)) if data is not None else None
+
+    def _save(self, document_id: str, board: TaskBoard) -> None:
+        write_json(self._board_path(document_id), board.to_dict(), indent=None)
+
+    def create(self, document_id: str, control_ids: Iterable[str]) -> int:
+        """
+        Stores the initial board of a new document: every obligation in "analyzed".
+        """
+        board = TaskBoard(control_ids)
+        with self._lock:
+            self._save(document_id, board)
+            self._cache(document_id, board)
+            return board.version
+
+    def get(self, document_id: str) -> Optional[dict]:
+        with self._lock:
+            board = self._board(document_id)
+            return board.snapshot() if board else None
+
+    def column_of(self, document_id: str) -> Dict[str, str]:
+        with self._lock:
+            board = self._board(document_id)
+            return board.column_of() if board else {}
+
+    def step_counts(self, document_id: str) -> Dict[str, int]:
+        # Read-only like column_of: neither creates a board nor copies the steps.
+        with self._lock:
+            board = self._board(document_id)
+            return {rid: len(steps) for rid, steps in board.steps.items()} if board else {}
+
+    def replace(self, document_id: str, control_ids: Iterable[str], tasks_data: dict) -> int:
+        """
+        Replaces the whole board (initial sync from an existing client board). Returns the new version.
+        """
+        known = set(control_ids)
+        with self._lock:
+            current = self._board(document_id)
+            columns = {col: [] for col in BOARD_COLUMNS}
+            for col, arr in (tasks_data.get("columns") or {}).items():
+                columns[col] = [rid for rid in map(_rule_id, arr or []) if rid in known]
+            steps = {
+                rid: [dict(st) for st in (rule_steps or [])]
+                for rid, rule_steps in (tasks_data.get("steps") or {}).items()
+                if rid in known
+            }
+            return self._commit(document_id, current, columns, steps)
+
+    def apply(self, document_id: str, control_ids: Iterable[str], ops: List[dict], expected_version: Optional[int] = None) -> int:
+        """
+        Applies a list of small edits atomically. Supported ops:
+        move (control_id, column, index), add_step (control_id, step),
+        update_step (control_id, step_id, step), remove_step (control_id, step_id),
+        set_steps (control_id, steps). Returns the new board version.
+        """
+        known = set(control_ids)
+        with self._lock:
+            board = self._board(document_id)
+            if board is None:
+                raise TaskBoardNotFoundError("no task board is stored for this document")
+            if expected_version is not None and expected_version != board.version:
+                raise TaskConflictError(f"board is at version {board.version}, expected {expected_version}")
+            # Work on copies so a failing op leaves the board untouched.
+            columns = {col: list(ids) for col, ids in board.columns.items()}
+            steps = {rid: list(lst) for rid, lst in board.steps.items()}
+            for op in ops:
+                self._apply_op(columns, steps, known, op)
+            return self._commit(document_id, board, columns, steps)
+
+    def _commit(self, document_id: str, board: Optional[TaskBoard], columns: Dict[str, List[str]], steps: Dict[str, List[dict]]) -> int:
+        # Written before it is cached, so a failed write leaves the stored board as it was.
+        updated = TaskBoard(data={"version": (board.version if board else 0) + 1, "columns": columns, "steps": steps})
+        self._save(document_id, updated)
+        self._cache(document_id, updated)
+        return updated.version
+
+    @staticmethod
+    def _apply_op(columns: Dict[str, List[str]], steps: Dict[str, List[dict]], known: set, op: dict) -> None:
+        kind = op.get("op")
+        rid = op.get("control_id")
+        if rid not in known:
+            raise ValueError(f"unknown control_id: {rid}")
+
+        if kind == "move":
+            target = op.get("column")
+            for ids in columns.values():
+                if rid in ids:
+                    ids.remove(rid)
+            if target:
+                dest = columns.setdefault(target, [])
+                index = op.get("index")
+                if index is None or index > len(dest):
+                    index = len(dest)
+                dest.insert(max(0, index), rid)
+            return
+
+        rule_steps = steps.setdefault(rid, [])
+        if kind == "add_step":
+            step = dict(op.get("step") or {})
+            step.setdefault("id", uuid.uuid4().hex[:12])
+            rule_steps.append(step)
+        elif kind == "update_step":
+            for pos, st in enumerate(rule_steps):
+                if st.get("id") == op.get("step_id"):
+                    rule_steps[pos] = {**st, **(op.get("step") or {}), "id": st.get("id")}
+                    break
+            else:
+                raise ValueError(f"unknown step_id: {op.get('step_id')}")
+        elif kind == "remove_step":
+            remaining = [st for st in rule_steps if st.get("id") != op.get("step_id")]
+            if len(remaining) == len(rule_steps):
+                raise ValueError(f"unknown step_id: {op.get('step_id')}")
+            steps[rid] = remaining
+        elif kind == "set_steps":
+            steps[rid] = [dict(st) for st in (op.get("steps") or [])]
+        else:
+            raise ValueError(f"unsupported op: {kind}")
+        if not steps.get(rid):
+            steps.pop(rid, None)
+
+
+task_store = TaskStore()
@@ -0,0 +1,95 @@
+from typing import Dict, List, Optional
+
+from app.schemas import ItemDifference, RuleSetOutcome
+from app.services.jobs import checkpoint
+from app.services.parser import RegulatoryParser, parser as default_parser
+from app.services.rule_matcher import MultiRuleSetMatcher
+
+CHECK_EVERY = 256  # sentences evaluated between progress/cancellation checks
+
+
+def evaluate_rule_sets(
+    text: str,
+    rule_sets: List[dict],
+    parser: Optional[RegulatoryParser] = None,
+) -> (int, List[RuleSetOutcome]):
+    """
+    Scores one document against several candidate rule sets. The document is segmented once and
+    every sentence goes through a single combined matching pass; each outcome matches what
+    parse(text, rules) would return for that set. Differences are reported against the first set.
+
+    rule_sets: [{"name": str, "rules": list}, ...]
+    Returns (sentences_evaluated, outcomes).
+    """
+    parser = parser or default_parser
+    sentences = parser.segment(text)
+
+    # Same decision the API makes per request: default payloads keep the heuristic fallbacks.
+    plans = []
+    for rule_set in rule_sets:
+        rules = rule_set.get("rules") or []
+        custom = not parser.is_default_rules(rules)
+        effective = (rules or parser.detection_rules) if custom else parser.detection_rules
+        plans.append((custom, effective))
+    matcher = MultiRuleSetMatcher([effective for _, effective in plans])
+
+    # Per set: sentence index -> (control_id, severity), plus aggregates.
+    accepted: List[Dict[int, tuple]] = [{} for _ in plans]
+    severity_counts: List[Dict[str, int]] = [{} for _ in plans]
+    category_counts: List[Dict[str, int]] = [{} for _ in plans]
+    rule_hits: List[Dict[str, int]] = [{} for _ in plans]
+
+    for idx, sentence in enumerate(sentences):
+        if not idx % CHECK_EVERY:
+            checkpoint("evaluate", sentences_evaluated=idx, total_sentences=len(sentences))
+        matches_per_set = matcher.match(sentence)
+        signals = None
+        for set_idx, (custom, effective) in enumerate(plans):
+            matches = matches_per_set[set_idx]
+            if not parser.is_obligation(sentence, matches, custom):
+                continue
+            # Keyword flags do not depend on the rule set; compute them once per sentence.
+            signals = signals or parser.score_signals(sentence)
+            control_id = f"rule-{len(accepted[set_idx]) + 1:03d}"
+            item = parser.build_item(sentence, control_id, effective, custom, matches, signals=signals)
+            accepted[set_idx][idx] = (control_id, item.severity)
+            severity_counts[set_idx][item.severity] = severity_counts[set_idx].get(item.severity, 0) + 1
+            category_counts[set_idx][item.category] = category_counts[set_idx].get(item.category, 0) + 1
+            for rule in matches:
+                key = rule.get("id") or rule.get("keyword") or "?"
+                rule_hits[set_idx][key] = rule_hits[set_idx].get(key, 0) + 1
+
+    baseline = accepted[0] if accepted else {}
+    outcomes = []
+    for set_idx, rule_set in enumerate(rule_sets):
+        current = accepted[set_idx]
+        differences = []
+        if set_idx:
+            for idx in sorted(set(baseline) | set(current)):
+                base = baseline.get(idx)
+                cur = current.get(idx)
+                if base and cur and base[1] == cur[1]:
+                    continue
+                if base and cur:
+                    change = "severity_changed"
+                elif cur:
+                    change = "added"
+                else:
+                    change = "removed"
+                differences.append(ItemDifference(
+                    change=change,
+                    text=sentences[idx],
+                    control_id=cur[0] if cur else None,
+                    baseline_control_id=base[0] if base else None,
+                    severity=cur[1] if cur else None,
+                    baseline_severity=base[1] if base else None,
+                ))
+        outcomes.append(RuleSetOutcome(
+            name=rule_set.get("name") or f"Rule set {set_idx + 1}",
+            total_items=len(current),
+            severity_counts=severity_counts[set_idx],
+            category_counts=category_counts[set_idx],
+            rule_hits=rule_hits[set_idx],
+            differences=differences,
+        ))
+    return len(sentences), outcomes